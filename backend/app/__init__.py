@@ -3,6 +3,8 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from .config import Config
 from flask_cors import CORS
+import click
+import time
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
@@ -14,30 +16,160 @@ def create_app():
     db.init_app(app)
     bcrypt.init_app(app)
 
+    from .services import database
+    database.init_app(app)
+
+    # Registered before the other services so request timing covers their hooks
+    from .services.metrics import metrics
+    metrics.init_app(app)
+
+    from .services.profiler import profiler
+    profiler.init_app(app)
+
+    from .services.mint_queue import mint_queue
+    mint_queue.init_app(app)
+
+    from .services.catalogue import event_catalogue
+    event_catalogue.init_app(app)
+
+    from .services.auth import auth_manager
+    auth_manager.init_app(app)
+
+    from .services.passwords import password_hasher
+    password_hasher.init_app(app)
+
+    from .services.activity import activity_feed
+    activity_feed.init_app(app)
+
+    from .services import stats
+    stats.init_app(app)
+
+    from .services import search
+    search.init_app(app)
+
+    from .services.checkin import checkin_service
+    checkin_service.init_app(app)
+
+    from .services import reconcile
+    reconcile.init_app(app)
+
+    from .services import nft_metadata
+    nft_metadata.init_app(app)
+
     # Set up cors to allow requests from the react frontend
     CORS(app, 
          origins=["http://localhost:5173", "https://ripplegate-1.onrender.com"],
          supports_credentials=True,
-         allow_headers=["Content-Type", "Authorization"],
-         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
+         allow_headers=["Content-Type", "Authorization", "Idempotency-Key"],
+         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+         expose_headers=["X-Next-Cursor", "Link", "Idempotent-Replayed"])
 
     # Register blueprints
     from .models import User
     from .models import Event
     from .models import Ticket
+    from .models import MintJob
+    from .models import Reservation
+    from .models import NFTOwnership
+    from .models import LedgerSyncState
+    from .models import EventStats
+    from .models import UserStats
+    from .models import CheckIn
+    from .models import NFTMetadata
+    from .models import WalletLease
     from .routes import auth
     from .routes import event
     from .routes import tickets
+    from .routes import monitoring
+    from .routes import checkin
+    from .routes import nft
     app.register_blueprint(auth, url_prefix="/api/auth")
     app.register_blueprint(event, url_prefix="/api/event")
     app.register_blueprint(tickets, url_prefix="/api/tickets")
+    app.register_blueprint(checkin, url_prefix="/api/checkin")
+    app.register_blueprint(nft, url_prefix="/api/nft")
+    app.register_blueprint(monitoring)
 
     @app.cli.command("init-db")
     def init_db_command():
-        db.drop_all()
-        db.create_all()
+        database.reset()
         print("Initialized the database.")
 
+    @app.cli.command("migrate-db")
+    def migrate_db_command():
+        """Add missing tables, columns and indexes without dropping data"""
+        changes = database.migrate()
+        for change in changes:
+            print(change)
+        if search.ensure_index():
+            print("Event search index is in place.")
+        print(f"Database is up to date ({len(changes)} changes applied).")
+
+    @app.cli.command("rebuild-search-index")
+    def rebuild_search_index_command():
+        """Re-index every event for full-text search"""
+        if search.ensure_index(rebuild=True):
+            print("Rebuilt the event search index.")
+        else:
+            print("This database has no full-text index; search falls back to substring matching.")
+
+    @app.cli.command("rebuild-stats")
+    @click.option("--check", is_flag=True, help="Only report totals that don't match the tickets")
+    def rebuild_stats_command(check):
+        """Recompute the event and user sales aggregates from the tickets"""
+        mismatches = stats.rebuild(check_only=check)
+        for mismatch in mismatches:
+            print(mismatch)
+        if check:
+            print(f"{len(mismatches)} aggregate rows out of date.")
+        else:
+            print(f"Rebuilt sales aggregates ({len(mismatches)} rows were out of date).")
+
+    @app.cli.command("sync-nft-index")
+    def sync_nft_index_command():
+        """Catch the local NFT ownership index up with the ledger"""
+        from .services.xrp import get_xrpl_service
+        from .services import nft_index
+        for account, applied in nft_index.sync(get_xrpl_service()).items():
+            print(f"{account}: applied {applied} transactions")
+
+    @app.cli.command("reconcile-mints")
+    @click.option("--limit", type=int, default=None, help="Stale jobs to look at (default RECONCILE_LIMIT)")
+    @click.option("--dry-run", is_flag=True, help="Report what would happen without changing anything")
+    def reconcile_mints_command(limit, dry_run):
+        """Resolve stale and half-completed mints against the ledger"""
+        from .services import wallet_leases
+        from .services.xrp import get_xrpl_service
+        service = get_xrpl_service()
+        # Offers are only created with wallets no minting process holds right now
+        wallet_leases.renew(service)
+        try:
+            summary = reconcile.reconcile(service, limit=limit, dry_run=dry_run)
+        finally:
+            wallet_leases.release(service)
+        print(', '.join(f"{outcome}: {count}" for outcome, count in summary.items()))
+
+    @app.cli.command("run-mint-workers")
+    def run_mint_workers_command():
+        """Process queued NFT mints without serving HTTP traffic"""
+        mint_queue.start()
+        print(f"Running {app.config['MINT_WORKERS']} mint workers. Press Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            pass
+
     return app
 
-app = create_app()
+_app = None
+
+def __getattr__(name):
+    # "from app import app" and WSGI servers pointed at app:app still work, but the
+    # app is only built when something asks for it; new code should call create_app()
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,7 @@
-from . import app
+from . import create_app
 import os
 
 if __name__ == "__main__":
+    app = create_app()
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=False)
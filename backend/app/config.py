@@ -5,7 +5,119 @@ load_dotenv()
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+
+def database_uri():
+    """
+    DATABASE_URL picks the database; without it the app uses the local SQLite file
+    """
+    uri = os.getenv("DATABASE_URL", 'sqlite:///' + os.path.join(basedir, '..', 'ripplegate.db'))
+    # Render and Heroku hand out postgres:// URLs, which SQLAlchemy no longer accepts
+    if uri.startswith("postgres://"):
+        uri = "postgresql://" + uri[len("postgres://"):]
+    return uri
+
+
+def database_engine_options(uri):
+    """
+    Engine options for the database profile: SQLite waits on locks instead of
+    failing (its pragmas are applied on connect, see app.services.database),
+    server databases get an explicitly sized pool with pre-ping
+    """
+    if uri.startswith("sqlite"):
+        return {
+            'connect_args': {
+                'timeout': int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000)) / 1000,
+                'check_same_thread': False
+            }
+        }
+    return {
+        'pool_size': int(os.getenv("DB_POOL_SIZE", 10)),
+        'max_overflow': int(os.getenv("DB_MAX_OVERFLOW", 20)),
+        'pool_timeout': int(os.getenv("DB_POOL_TIMEOUT", 30)),  # seconds to wait for a connection
+        'pool_recycle': int(os.getenv("DB_POOL_RECYCLE", 1800)),  # seconds before a connection is replaced
+        'pool_pre_ping': True
+    }
+
+
 class Config:
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, '..', 'ripplegate.db')
+    SQLALCHEMY_DATABASE_URI = database_uri()
+    SQLALCHEMY_ENGINE_OPTIONS = database_engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # SQLite tuning, applied to every new connection
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")  # readers don't block the writer
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # safe with WAL, far fewer fsyncs than FULL
+    SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000))  # milliseconds to wait for a write lock
     SECRET_KEY = os.getenv("SECRET_KEY")
+
+    # Background NFT minting
+    MINT_WORKERS = int(os.getenv("MINT_WORKERS", 4))
+    MINT_POLL_INTERVAL = float(os.getenv("MINT_POLL_INTERVAL", 1.0))  # seconds
+    MINT_JOB_MAX_ATTEMPTS = int(os.getenv("MINT_JOB_MAX_ATTEMPTS", 3))
+    MINT_BATCH_SIZE = int(os.getenv("MINT_BATCH_SIZE", 10))  # queued jobs a worker claims and mints together
+    # Seconds before a running job is considered stale. The default is the longest a live
+    # job can take: every worker's batch queues for the shared XRPL_BATCH_CONCURRENCY
+    # submission threads, and a mint is two transactions (mint, offer), each waiting up to
+    # 60s for a Ticket and then until its LastLedgerSequence (20 ledgers, ~5s each) passes
+    # or the stream has been silent for XRPL_CONFIRMATION_TIMEOUT
+    MINT_JOB_TIMEOUT = int(os.getenv("MINT_JOB_TIMEOUT", 0)) or (
+        -(-MINT_WORKERS * MINT_BATCH_SIZE // int(os.getenv("XRPL_BATCH_CONCURRENCY", 10)))
+        * 2 * (60 + 20 * 5 + int(os.getenv("XRPL_CONFIRMATION_TIMEOUT", 60)))
+    )
+    NFT_INDEX_SYNC_INTERVAL = int(os.getenv("NFT_INDEX_SYNC_INTERVAL", 30))  # seconds between ownership index syncs
+    # Outside wallets holding our NFTs are synced too, a few per run; ownership checks
+    # ask the ledger instead of the index for holders not synced within the TTL
+    NFT_INDEX_HOLDER_TTL = int(os.getenv("NFT_INDEX_HOLDER_TTL", 300))  # seconds
+    NFT_INDEX_HOLDER_SYNC_LIMIT = int(os.getenv("NFT_INDEX_HOLDER_SYNC_LIMIT", 50))  # holders per sync run
+    XRPL_RESERVE_REFRESH_INTERVAL = int(os.getenv("XRPL_RESERVE_REFRESH_INTERVAL", 60))  # seconds
+    # NFT URIs are <base><event metadata ref>/<ticket id>; point the base at the metadata
+    # resolver (e.g. https://api.example.com/api/nft/metadata/) so wallets can follow it
+    NFT_METADATA_URI_BASE = os.getenv("NFT_METADATA_URI_BASE", "rg:")
+    # A pool wallet's Tickets are allocated by one process at a time, the one holding its lease
+    WALLET_LEASE_TTL = int(os.getenv("WALLET_LEASE_TTL", 60))  # seconds
+    WALLET_LEASE_RENEW_INTERVAL = int(os.getenv("WALLET_LEASE_RENEW_INTERVAL", 15))  # seconds
+    RECONCILE_INTERVAL = int(os.getenv("RECONCILE_INTERVAL", 60))  # seconds between reconciliation runs
+    RECONCILE_AFTER = int(os.getenv("RECONCILE_AFTER", 600))  # seconds before a pending ticket with no mint job is adopted
+    RECONCILE_LIMIT = int(os.getenv("RECONCILE_LIMIT", 1000))  # stale jobs looked at per run
+    RECONCILE_BATCH_SIZE = int(os.getenv("RECONCILE_BATCH_SIZE", 100))  # jobs resolved per commit
+    RECONCILE_CONCURRENCY = int(os.getenv("RECONCILE_CONCURRENCY", 8))  # parallel ledger requests
+
+    # Ticket inventory holds
+    RESERVATION_TTL = int(os.getenv("RESERVATION_TTL", 900))  # seconds a seat stays held while its mint is queued
+    RESERVATION_SWEEP_INTERVAL = int(os.getenv("RESERVATION_SWEEP_INTERVAL", 30))  # seconds
+    BULK_PURCHASE_MAX = int(os.getenv("BULK_PURCHASE_MAX", 20))  # tickets per bulk order
+    IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", 86400))  # seconds a purchase's Idempotency-Key is kept
+    IDEMPOTENCY_SWEEP_INTERVAL = int(os.getenv("IDEMPOTENCY_SWEEP_INTERVAL", 600))  # seconds
+
+    # Live activity feed
+    ACTIVITY_FEED_SIZE = int(os.getenv("ACTIVITY_FEED_SIZE", 20))  # entries kept in memory and served by /activity
+    ACTIVITY_HEARTBEAT_INTERVAL = int(os.getenv("ACTIVITY_HEARTBEAT_INTERVAL", 15))  # seconds between SSE keep-alives
+    ACTIVITY_CATCH_UP_INTERVAL = float(os.getenv("ACTIVITY_CATCH_UP_INTERVAL", 2))  # seconds between checks for other processes' ticket changes
+
+    # Response caching. CACHE_BACKEND is a dotted path to a class with get/set/delete/incr
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "app.services.cache.MemoryCache")
+    CACHE_BACKEND_OPTIONS = {}
+    CATALOGUE_CACHE_TTL = int(os.getenv("CATALOGUE_CACHE_TTL", 30))  # seconds
+
+    # Authentication
+    JWT_EXPIRES_IN = int(os.getenv("JWT_EXPIRES_IN", 7 * 24 * 3600))  # seconds
+    AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+    AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", 300))  # seconds
+
+    # Password hashing
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", 12))  # work factor; hashes are upgraded on login
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_QUEUE_DEPTH = int(os.getenv("PASSWORD_HASH_QUEUE_DEPTH", 16))  # waiting hashes before answering 503
+    PASSWORD_HASH_TIMEOUT = int(os.getenv("PASSWORD_HASH_TIMEOUT", 10))  # seconds
+
+    # Metrics and profiling. /metrics and the profiler endpoints need
+    # "Authorization: Bearer <METRICS_TOKEN>"; without a token they are off.
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", 0.01))  # seconds between stack samples
+    PROFILER_MAX_DURATION = int(os.getenv("PROFILER_MAX_DURATION", 300))  # seconds a profiling run may last
+
+    # Door check-in. Credentials are signed with an Ed25519 XRPL seed (sEd...);
+    # without one the key is derived from SECRET_KEY
+    CHECKIN_SIGNING_SEED = os.getenv("CHECKIN_SIGNING_SEED")
+    CHECKIN_SYNC_MAX = int(os.getenv("CHECKIN_SYNC_MAX", 1000))  # scans per batch sync
+    CHECKIN_MANIFEST_TTL = int(os.getenv("CHECKIN_MANIFEST_TTL", 30))  # seconds the manifest ticket list is cached
@@ -1,3 +1,10 @@
 from .user import User
 from .event import Event
-from .ticket import Ticket
\ No newline at end of file
+from .ticket import Ticket
+from .mint_job import MintJob
+from .reservation import Reservation
+from .nft_ownership import NFTOwnership, LedgerSyncState
+from .stats import EventStats, UserStats
+from .checkin import CheckIn
+from .nft_metadata import NFTMetadata
+from .wallet_lease import WalletLease
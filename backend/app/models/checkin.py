@@ -0,0 +1,31 @@
+from .. import db
+from sqlalchemy import func
+
+class CheckIn(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # Unique: a ticket can be redeemed at the door once
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), unique=True, nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    scanner_id = db.Column(db.String(64), nullable=True)  # Device that scanned the ticket
+    scanned_at = db.Column(db.DateTime, nullable=False)  # Scanner's clock, may be earlier than the sync
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # Manifest downloads fetch an event's check-ins after a cursor
+        db.Index('ix_check_in_event_id_id', 'event_id', 'id'),
+    )
+
+    # Relationships
+    ticket = db.relationship('Ticket', backref=db.backref('check_in', uselist=False))
+
+    def to_json(self):
+        return {
+            'id': self.id,
+            'ticket_id': self.ticket_id,
+            'event_id': self.event_id,
+            'scanner_id': self.scanner_id,
+            'scanned_at': self.scanned_at.isoformat() + 'Z' if self.scanned_at else None
+        }
+
+    def __repr__(self):
+        return f"<CheckIn {self.ticket_id}>"
@@ -15,26 +15,17 @@ class Event(db.Model):
     host_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     created_at = db.Column(db.DateTime, nullable=False, server_default=func.now())
     
+    __table_args__ = (
+        # Keyset pagination and list filters
+        db.Index('ix_event_created_at_id', 'created_at', 'id'),
+        db.Index('ix_event_host_id_created_at_id', 'host_id', 'created_at', 'id'),
+        db.Index('ix_event_date', 'date'),
+        db.Index('ix_event_price', 'price'),
+    )
+    
     # Relationships
     host = db.relationship('User', backref='hosted_events')
 
     def to_json(self):
-        host_name = None
-        if self.host:
-            # Use full email as host name
-            host_name = self.host.email if self.host.email else 'Anonymous'
-        
-        return {
-            'id': self.id,
-            'title': self.title,
-            'location': self.location,
-            'description': self.description,
-            'tickets': self.tickets,
-            'price': self.price,
-            'image': self.image,
-            'date': self.date.strftime('%Y-%m-%d'),
-            'time': self.time.strftime('%H:%M:%S'),
-            'host_id': self.host_id,
-            'host_name': host_name,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        }
+        from app.serializers import serialize_event
+        return serialize_event(self)
@@ -0,0 +1,39 @@
+from .. import db
+from sqlalchemy import func
+
+class MintJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), unique=True, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, stale, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.String(255), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)  # Set when a worker claims the job
+    # The latest mint transaction, recorded before it is submitted: until the validated
+    # ledger passes last_ledger_sequence the mint may still land
+    transaction_hash = db.Column(db.String(64), nullable=True)
+    last_ledger_sequence = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.now())
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Workers claim the oldest queued jobs and look for stale running ones
+        db.Index('ix_mint_job_status_id', 'status', 'id'),
+        db.Index('ix_mint_job_status_locked_at', 'status', 'locked_at'),
+    )
+
+    # Relationships
+    ticket = db.relationship('Ticket', backref=db.backref('mint_job', uselist=False))
+
+    def to_json(self):
+        return {
+            'id': self.id,
+            'ticket_id': self.ticket_id,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() + 'Z',
+            'updated_at': self.updated_at.isoformat() + 'Z'
+        }
+
+    def __repr__(self):
+        return f"<MintJob {self.id}>"
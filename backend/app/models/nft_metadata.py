@@ -0,0 +1,12 @@
+from .. import db
+from sqlalchemy import func
+
+class NFTMetadata(db.Model):
+    # Content hash of the template: an edited event gets a new ref, minted URIs keep resolving
+    ref = db.Column(db.String(16), primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, index=True)
+    template = db.Column(db.Text, nullable=False)  # Event metadata as JSON, without the ticket
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<NFTMetadata {self.ref}>"
@@ -0,0 +1,37 @@
+from .. import db
+from sqlalchemy import func
+
+class NFTOwnership(db.Model):
+    nft_id = db.Column(db.String(64), primary_key=True)  # XRPL NFTokenID
+    issuer = db.Column(db.String(64), nullable=False)
+    owner = db.Column(db.String(64), nullable=False, index=True)  # Current on-ledger owner
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=True, index=True)
+    offer_id = db.Column(db.String(64), nullable=True)  # Open transfer offer, if any
+    offer_destination = db.Column(db.String(64), nullable=True)
+    burned = db.Column(db.Boolean, nullable=False, default=False)
+    ledger_index = db.Column(db.Integer, nullable=True)  # Ledger of the last change we saw
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
+
+    def to_json(self):
+        return {
+            'nft_id': self.nft_id,
+            'issuer': self.issuer,
+            'owner': self.owner,
+            'ticket_id': self.ticket_id,
+            'offer_id': self.offer_id,
+            'offer_destination': self.offer_destination,
+            'burned': self.burned,
+            'ledger_index': self.ledger_index
+        }
+
+    def __repr__(self):
+        return f"<NFTOwnership {self.nft_id}>"
+
+
+class LedgerSyncState(db.Model):
+    account = db.Column(db.String(64), primary_key=True)
+    last_ledger_index = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<LedgerSyncState {self.account}>"
@@ -0,0 +1,21 @@
+from .. import db
+from sqlalchemy import func
+
+class Reservation(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), unique=True, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='held')  # held, committed, released
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        db.Index('ix_reservation_status_expires_at', 'status', 'expires_at'),
+        db.Index('ix_reservation_event_id_status', 'event_id', 'status'),
+    )
+
+    # Relationships
+    ticket = db.relationship('Ticket', backref=db.backref('reservation', uselist=False))
+
+    def __repr__(self):
+        return f"<Reservation {self.id}>"
@@ -0,0 +1,46 @@
+from .. import db
+from sqlalchemy import func
+
+# Running totals kept in step with Ticket.status changes by app.services.stats
+class EventStats(db.Model):
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), primary_key=True)
+    tickets_pending = db.Column(db.Integer, nullable=False, default=0)
+    tickets_sold = db.Column(db.Integer, nullable=False, default=0)  # confirmed
+    tickets_failed = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Integer, nullable=False, default=0)  # sum of confirmed ticket prices
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
+
+    def to_json(self):
+        finished = self.tickets_sold + self.tickets_failed
+        return {
+            'event_id': self.event_id,
+            'tickets_pending': self.tickets_pending,
+            'tickets_sold': self.tickets_sold,
+            'tickets_failed': self.tickets_failed,
+            'revenue': self.revenue,
+            'failed_mint_rate': self.tickets_failed / finished if finished else 0.0
+        }
+
+    def __repr__(self):
+        return f"<EventStats {self.event_id}>"
+
+
+class UserStats(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    tickets_pending = db.Column(db.Integer, nullable=False, default=0)
+    tickets_confirmed = db.Column(db.Integer, nullable=False, default=0)
+    tickets_failed = db.Column(db.Integer, nullable=False, default=0)
+    total_spent = db.Column(db.Integer, nullable=False, default=0)  # sum of confirmed ticket prices
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
+
+    def to_json(self):
+        return {
+            'user_id': self.user_id,
+            'tickets_pending': self.tickets_pending,
+            'tickets_confirmed': self.tickets_confirmed,
+            'tickets_failed': self.tickets_failed,
+            'total_spent': self.total_spent
+        }
+
+    def __repr__(self):
+        return f"<UserStats {self.user_id}>"
@@ -9,25 +9,30 @@ class Ticket(db.Model):
     nft_id = db.Column(db.String(64), nullable=True)  # XRPL NFT ID
     transaction_hash = db.Column(db.String(64), nullable=True)  # XRPL transaction hash
     status = db.Column(db.String(20), nullable=False, default='pending')  # pending, confirmed, failed
+    idempotency_key = db.Column(db.String(80), nullable=True)  # Client's Idempotency-Key, cleared once it expires
     created_at = db.Column(db.DateTime, nullable=False, server_default=func.now())
+    # Nullable so migrate-db can add it; lets each process's activity feed catch up on the others
+    updated_at = db.Column(db.DateTime, nullable=True, server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # Keyset pagination of a user's tickets, optionally filtered by status
+        db.Index('ix_ticket_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_ticket_user_id_status_created_at_id', 'user_id', 'status', 'created_at', 'id'),
+        # Recent activity feed (newest tickets first) and per-event lookups
+        db.Index('ix_ticket_created_at_id', 'created_at', 'id'),
+        db.Index('ix_ticket_event_id_status', 'event_id', 'status'),
+        db.Index('ix_ticket_updated_at', 'updated_at'),
+        # A retried purchase finds its tickets instead of buying new ones
+        db.Index('uq_ticket_user_id_idempotency_key', 'user_id', 'idempotency_key', unique=True),
+    )
     
     # Relationships
     event = db.relationship('Event', backref='event_tickets')
     user = db.relationship('User', backref='user_tickets')
 
-    def to_json(self):
-        return {
-            'id': self.id,
-            'event_id': self.event_id,
-            'user_id': self.user_id,
-            'price': self.price,
-            'nft_id': self.nft_id,
-            'transaction_hash': self.transaction_hash,
-            'status': self.status,
-            'created_at': self.created_at.isoformat() + 'Z',
-            'event': self.event.to_json() if self.event else None,
-            'user_wallet': self.user.wallet_address if self.user else None
-        }
+    def to_json(self, slim=False):
+        from app.serializers import serialize_ticket
+        return serialize_ticket(self, slim=slim)
 
     def __repr__(self):
         return f"<Ticket {self.id}>"
\ No newline at end of file
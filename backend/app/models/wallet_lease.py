@@ -0,0 +1,10 @@
+from .. import db
+
+class WalletLease(db.Model):
+    # One row per pool wallet: only the holder may allocate its XRPL Tickets and submit for it
+    address = db.Column(db.String(64), primary_key=True)
+    holder = db.Column(db.String(128), nullable=False)  # host:pid:nonce of the holding XRPLService
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<WalletLease {self.address}>"
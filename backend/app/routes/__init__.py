@@ -1,3 +1,7 @@
 from .auth import auth 
 from .events import event
-from .tickets import tickets
\ No newline at end of file
+from .tickets import tickets
+from .monitoring import monitoring
+
+from .checkin import checkin
+from .nft import nft
\ No newline at end of file
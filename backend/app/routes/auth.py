@@ -1,13 +1,20 @@
-from flask import Blueprint, request, jsonify, make_response
-from app import db, bcrypt
+from flask import Blueprint, request, jsonify, make_response, g, current_app
+from app import db
 from app.models import User
+from app.services.auth import auth_manager
+from app.services.passwords import password_hasher, PoolSaturated
 from dotenv import load_dotenv
-from jwt import encode, decode
 import os
 load_dotenv()
 
 auth = Blueprint('auth', __name__)
 
+def server_busy():
+    # Fast failure when the password hashing pool is saturated
+    response = make_response(jsonify({"message": "Server is busy, please try again"}), 503)
+    response.headers['Retry-After'] = '1'
+    return response
+
 @auth.route('/me', methods=['GET', 'OPTIONS'])
 def me():
     if request.method == 'OPTIONS':
@@ -19,25 +26,17 @@ def me():
         response.headers.add('Access-Control-Allow-Credentials', 'true')
         return response, 200
     
-    token = request.cookies.get('token')
-    if not token:
-        return jsonify({"message": "Unauthorized"}), 401
-    
-    try:
-        data = decode(token, os.getenv("JWT_SECRET"), algorithms=["HS256"])
-        user = User.query.filter_by(id=data["user_id"]).first()
+    # The auth layer has already decoded the cookie and loaded the user
+    user = g.current_user
+    if not user:
+        return jsonify({"message": g.auth_error or "Unauthorized"}), 401
         
-        if not user:
-            return jsonify({"message": "User not found"}), 401
-            
-        return jsonify({
-            "user_id": user.id,
-            "email": user.email,
-            "profile_picture": user.profile_picture,
-            "wallet_address": user.wallet_address
-        }), 200
-    except Exception as e:
-        return jsonify({"message": "Invalid token"}), 401
+    return jsonify({
+        "user_id": user.id,
+        "email": user.email,
+        "profile_picture": user.profile_picture,
+        "wallet_address": user.wallet_address
+    }), 200
 
 @auth.route('/register', methods=['POST', 'OPTIONS'])
 def register():
@@ -66,8 +65,8 @@ def register():
         if existing_user:
             return jsonify({"message": "An account with this email already exists"}), 400
         
-        # Hash password
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+        # Hash password off the request thread
+        hashed_password = password_hasher.hash(password)
 
         # Create new user
         new_user = User(email=email, password=hashed_password, profile_picture=profile_picture, wallet_address=wallet_address)
@@ -75,11 +74,7 @@ def register():
         db.session.commit()
 
         # Generate JWT token
-        token = encode(
-            {"user_id": new_user.id, "email": email},
-            os.getenv("JWT_SECRET"),
-            algorithm="HS256"
-        )
+        token = auth_manager.issue_token(new_user)
 
         # Return success response
         resp = make_response(jsonify({
@@ -91,9 +86,11 @@ def register():
 
         # Set secure=True for production (HTTPS), False for development
         is_production = os.getenv("FLASK_ENV") == "production" or "onrender.com" in request.host
-        resp.set_cookie("token", token, httponly=True, secure=is_production, samesite="None" if is_production else "Lax")
+        resp.set_cookie("token", token, httponly=True, secure=is_production, samesite="None" if is_production else "Lax", max_age=current_app.config['JWT_EXPIRES_IN'])
         return resp
         
+    except PoolSaturated:
+        return server_busy()
     except Exception as e:
         return jsonify({"message": f"Server error: {str(e)}"}), 500
 
@@ -119,14 +116,15 @@ def login():
         if not user:
             return jsonify({"message": "Invalid email or password"}), 401
     
-        if not bcrypt.check_password_hash(user.password, password):
+        if not password_hasher.check(user.password, password):
             return jsonify({"message": "Invalid email or password"}), 401
+        
+        # Transparently upgrade hashes made with an old work factor
+        if password_hasher.needs_rehash(user.password):
+            user.password = password_hasher.hash(password)
+            db.session.commit()
     
-        token = encode(
-            {"user_id": user.id, "email": email},
-            os.getenv("JWT_SECRET"),
-            algorithm="HS256"
-        )
+        token = auth_manager.issue_token(user)
 
         resp = make_response(jsonify({
             "message": "Login successful",
@@ -136,8 +134,10 @@ def login():
 
         # Set secure=True for production (HTTPS), False for development
         is_production = os.getenv("FLASK_ENV") == "production" or "onrender.com" in request.host
-        resp.set_cookie("token", token, httponly=True, secure=is_production, samesite="None" if is_production else "Lax")
+        resp.set_cookie("token", token, httponly=True, secure=is_production, samesite="None" if is_production else "Lax", max_age=current_app.config['JWT_EXPIRES_IN'])
         return resp
         
+    except PoolSaturated:
+        return server_busy()
     except Exception as e:
         return jsonify({"message": f"Server error: {str(e)}"}), 500
@@ -0,0 +1,128 @@
+from flask import Blueprint, request, jsonify, make_response, g
+from app import db
+from app.models import Ticket, Event
+from app.services.auth import login_required
+from app.services.checkin import checkin_service, CredentialError
+from app.utils.pagination import PaginationError, parse_int
+import hashlib
+import json
+
+checkin = Blueprint('checkin', __name__)
+
+def hosted_event(event_id):
+    """
+    The event if the current user hosts it, else an error response
+    """
+    event = db.session.get(Event, event_id)
+    if not event:
+        return None, (jsonify({"message": "Event not found"}), 404)
+    if event.host_id != g.current_user.id:
+        return None, (jsonify({"message": "Only the event host can check tickets in"}), 403)
+    return event, None
+
+@checkin.route('/public-key', methods=['GET'])
+def get_public_key():
+    try:
+        # Scanners pin this key to verify credentials offline
+        return jsonify({"public_key": checkin_service.public_key, "algorithm": "ed25519"}), 200
+    except CredentialError as e:
+        return jsonify({"message": str(e)}), 503
+
+@checkin.route('/tickets/<int:ticket_id>/credential', methods=['GET'])
+@login_required
+def get_ticket_credential(ticket_id):
+    try:
+        ticket = db.session.get(Ticket, ticket_id)
+        if not ticket or ticket.user_id != g.current_user.id:
+            return jsonify({"message": "Ticket not found"}), 404
+
+        holder = checkin_service.holders(ticket.event_id, [ticket.id]).get(ticket.id)
+        if holder is None:
+            return jsonify({"message": f"Ticket is {ticket.status} and can't be used for entry"}), 409
+        if holder[1] != g.current_user.wallet_address:
+            return jsonify({"message": "This ticket's NFT has been transferred to another wallet"}), 409
+
+        return jsonify({
+            "ticket_id": ticket.id,
+            "event_id": ticket.event_id,
+            "credential": checkin_service.issue_credential(ticket, holder[1])
+        }), 200
+    except CredentialError as e:
+        return jsonify({"message": str(e)}), 409
+    except Exception as e:
+        print(f"Error issuing ticket credential: {str(e)}")
+        return jsonify({"message": "Internal server error"}), 500
+
+@checkin.route('/events/<int:event_id>/manifest', methods=['GET'])
+@login_required
+def get_manifest(event_id):
+    try:
+        event, error = hosted_event(event_id)
+        if error:
+            return error
+
+        # ?since=<cursor> returns only check-ins after an earlier manifest
+        manifest = checkin_service.manifest(event_id, since=parse_int(request.args, 'since'))
+        body = json.dumps({key: value for key, value in manifest.items() if key != 'generated_at'}).encode('utf-8')
+        response = make_response(json.dumps(manifest))
+        response.mimetype = 'application/json'
+        # Scanners revalidate with If-None-Match and get a 304 when nothing changed
+        response.set_etag(hashlib.sha1(body).hexdigest())
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
+    except CredentialError as e:
+        return jsonify({"message": str(e)}), 503
+    except Exception as e:
+        print(f"Error building check-in manifest: {str(e)}")
+        return jsonify({"message": "Internal server error"}), 500
+
+@checkin.route('/events/<int:event_id>/scan', methods=['POST'])
+@login_required
+def scan_ticket(event_id):
+    try:
+        event, error = hosted_event(event_id)
+        if error:
+            return error
+
+        data = request.get_json() or {}
+        credential = data.get('credential')
+        if not credential:
+            return jsonify({"message": "credential is required"}), 400
+
+        result = checkin_service.scan(event_id, credential, data.get('scanner_id'))
+        status_code = {'accepted': 200, 'duplicate': 409}.get(result['result'], 422)
+        return jsonify(result), status_code
+    except CredentialError as e:
+        return jsonify({"ticket_id": None, "result": "invalid", "reason": str(e)}), 422
+    except Exception as e:
+        print(f"Error checking ticket in: {str(e)}")
+        return jsonify({"message": "Internal server error"}), 500
+
+@checkin.route('/events/<int:event_id>/sync', methods=['POST'])
+@login_required
+def sync_scans(event_id):
+    try:
+        event, error = hosted_event(event_id)
+        if error:
+            return error
+
+        data = request.get_json() or {}
+        scans = data.get('scans')
+        if not isinstance(scans, list):
+            return jsonify({"message": "scans must be a list of {ticket_id, scanned_at}"}), 400
+
+        # Scans verified offline by a door scanner, uploaded in one batch
+        results = checkin_service.redeem(event_id, scans, data.get('scanner_id'))
+        summary = {outcome: 0 for outcome in ('accepted', 'duplicate', 'invalid')}
+        for result in results:
+            summary[result['result']] += 1
+
+        manifest = checkin_service.manifest(event_id, since=parse_int(data, 'since')) if data.get('since') is not None else None
+        return jsonify({"results": results, "summary": summary, "manifest": manifest}), 200
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        print(f"Error syncing scans: {str(e)}")
+        return jsonify({"message": "Internal server error"}), 500
@@ -1,9 +1,16 @@
-from flask import Blueprint, request, jsonify, make_response
+from flask import Blueprint, request, jsonify, make_response, g
 from app import db
-from app.models import Event, User
+from app.models import Event
+from app.services.auth import login_required
+from app.services.inventory import get_inventory
+from app.services.catalogue import event_catalogue
+from app.services import nft_metadata
+from app.services.stats import get_event_stats, EVENT_TOTALS
+from app.services.search import search_events
+from app.models import EventStats
+from app.serializers import event_load_options
+from app.utils.pagination import PaginationError, parse_limit, parse_date, parse_int, set_next_cursor
 from datetime import datetime
-from jwt import decode
-import os
 
 event = Blueprint('event', __name__)
 
@@ -18,12 +25,56 @@ def get_events():
         response.headers.add('Access-Control-Allow-Credentials', 'true')
         return response, 200
     try:
-        events = Event.query.all()
-        return jsonify([event.to_json() for event in events])
+        # Keyset pagination on (created_at, id) plus optional filters
+        params = {
+            'limit': parse_limit(request.args),
+            'cursor': request.args.get('cursor'),
+            'date_from': parse_date(request.args, 'date_from'),
+            'date_to': parse_date(request.args, 'date_to'),
+            'min_price': parse_int(request.args, 'min_price'),
+            'max_price': parse_int(request.args, 'max_price'),
+            'host_id': parse_int(request.args, 'host_id')
+        }
+        
+        # Served from the catalogue cache; clients revalidate with If-None-Match / If-Modified-Since
+        catalogue = event_catalogue.get_events(params)
+        response = make_response(catalogue['body'])
+        response.mimetype = 'application/json'
+        response.set_etag(catalogue['etag'])
+        response.last_modified = catalogue['last_modified']
+        response.cache_control.no_cache = True
+        set_next_cursor(response, catalogue['next_cursor'])
+        return response.make_conditional(request)
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+@event.route('/search', methods=['GET'])
+def search_catalogue():
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"message": "Missing search query q"}), 400
+        
+        # Ranked, best match first; offset pages through the ranking
+        results = search_events(
+            query,
+            date_from=parse_date(request.args, 'date_from'),
+            date_to=parse_date(request.args, 'date_to'),
+            min_price=parse_int(request.args, 'min_price'),
+            max_price=parse_int(request.args, 'max_price'),
+            limit=parse_limit(request.args),
+            offset=max(parse_int(request.args, 'offset') or 0, 0)
+        )
+        return jsonify({'query': query, 'results': results}), 200
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
 @event.route('/', methods=['POST'])
+@login_required
 def create_event(): 
     if request.method == 'OPTIONS':
         response = make_response()
@@ -35,20 +86,6 @@ def create_event():
         return response, 200
     
     try:
-        # Get the token from cookies to identify the current user
-        token = request.cookies.get('token')
-        if not token:
-            return jsonify({"message": "Authentication required"}), 401
-        
-        # Decode the token to get user info
-        try:
-            data = decode(token, os.getenv("JWT_SECRET"), algorithms=["HS256"])
-            user = User.query.filter_by(id=data["user_id"]).first()
-            if not user:
-                return jsonify({"message": "User not found"}), 401
-        except Exception as e:
-            return jsonify({"message": "Invalid token"}), 401
-        
         event_data = request.get_json()
         
         # Convert date and time strings to datetime objects
@@ -59,14 +96,64 @@ def create_event():
         event_data['time'] = datetime.strptime(time_str, '%Y-%m-%dT%H:%M:%S')
         
         # Set the host_id to the current user
-        event_data['host_id'] = user.id
+        event_data['host_id'] = g.current_user.id
         
         new_event = Event(**event_data)
         db.session.add(new_event)
+        event_catalogue.mark_dirty(db.session)
         db.session.commit()
+        # Minting its tickets then only appends ticket ids to the cached URI prefix
+        nft_metadata.prepare(new_event)
         return jsonify(new_event.to_json()), 201
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
+@event.route('/<int:event_id>', methods=['GET'])
+def get_event(event_id):
+    try:
+        selected = Event.query.options(*event_load_options()).filter_by(id=event_id).first()
+        if not selected:
+            return jsonify({"message": "Event not found"}), 404
+        return jsonify(selected.to_json()), 200
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+@event.route('/<int:event_id>/inventory', methods=['GET'])
+def get_event_inventory(event_id):
+    try:
+        inventory = get_inventory(event_id)
+        if inventory is None:
+            return jsonify({"message": "Event not found"}), 404
+        return jsonify(inventory), 200
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
 
+@event.route('/<int:event_id>/stats', methods=['GET'])
+def get_event_sales_stats(event_id):
+    try:
+        # One primary key read, however many tickets the event has sold
+        return jsonify(get_event_stats(event_id)), 200
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
 
+@event.route('/mine/stats', methods=['GET'])
+@login_required
+def get_my_event_stats():
+    try:
+        # Organizer dashboard: one row per hosted event, joined to its running totals
+        rows = db.session.query(Event, EventStats).outerjoin(
+            EventStats, EventStats.event_id == Event.id
+        ).filter(Event.host_id == g.current_user.id).order_by(Event.created_at.desc(), Event.id.desc()).all()
+        
+        events = []
+        for hosted_event, event_stats in rows:
+            event_stats = event_stats or EventStats(event_id=hosted_event.id, **dict.fromkeys(EVENT_TOTALS, 0))
+            events.append({
+                'event_id': hosted_event.id,
+                'title': hosted_event.title,
+                'tickets_remaining': hosted_event.tickets,
+                **event_stats.to_json()
+            })
+        return jsonify({'events': events}), 200
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
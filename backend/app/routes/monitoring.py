@@ -0,0 +1,62 @@
+from flask import Blueprint, request, jsonify, make_response, current_app
+from app.services.metrics import metrics
+from app.services.profiler import profiler
+import hmac
+
+monitoring = Blueprint('monitoring', __name__)
+
+def authorized(required=False):
+    token = current_app.config['METRICS_TOKEN']
+    if not token:
+        return not required
+    supplied = request.headers.get('Authorization', '')
+    return hmac.compare_digest(supplied, f"Bearer {token}")
+
+@monitoring.route('/metrics', methods=['GET'])
+def export_metrics():
+    # Queue depths, wallet load and route timings describe the deployment, so like the profiler it needs the token
+    if not authorized(required=True):
+        return jsonify({"message": "Unauthorized"}), 401
+    response = make_response(metrics.render())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    return response
+
+@monitoring.route('/metrics/profiler', methods=['GET', 'POST'])
+def profiler_control():
+    """
+    GET: profiler status. POST {"enabled": true, "interval": 0.01, "duration": 60}
+    starts a sampling run; {"enabled": false} stops it.
+    """
+    # Stack samples expose code paths, so the profiler always needs the token
+    if not authorized(required=True):
+        return jsonify({"message": "Unauthorized"}), 401
+    try:
+        if request.method == 'POST':
+            data = request.get_json() or {}
+            if data.get('enabled'):
+                interval = data.get('interval')
+                duration = data.get('duration')
+                if (interval is not None and float(interval) <= 0) or (duration is not None and float(duration) <= 0):
+                    return jsonify({"message": "interval and duration must be positive"}), 400
+                if not profiler.start(float(interval) if interval else None, float(duration) if duration else None):
+                    return jsonify({"message": "Profiler is already running", **profiler.status()}), 409
+            else:
+                profiler.stop()
+        return jsonify(profiler.status()), 200
+    except (TypeError, ValueError):
+        return jsonify({"message": "interval and duration must be numbers"}), 400
+    except Exception as e:
+        print(f"Error controlling profiler: {str(e)}")
+        return jsonify({"message": "Internal server error"}), 500
+
+@monitoring.route('/metrics/profile', methods=['GET'])
+def profile():
+    """
+    Sampled stacks in collapsed format (flamegraph.pl, speedscope), most frequent first
+    """
+    if not authorized(required=True):
+        return jsonify({"message": "Unauthorized"}), 401
+    limit = request.args.get('limit', type=int)
+    response = make_response(profiler.collapsed(limit))
+    response.headers['Content-Type'] = 'text/plain; charset=utf-8'
+    return response
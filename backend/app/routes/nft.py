@@ -0,0 +1,36 @@
+from flask import Blueprint, request, jsonify
+from app.services import nft_metadata
+
+nft = Blueprint('nft', __name__)
+
+@nft.route('/metadata/<ref>/<int:ticket_id>', methods=['GET'])
+def get_nft_metadata(ref, ticket_id):
+    """
+    Resolve a compact NFT URI (<base><ref>/<ticket id>) to the ticket's full metadata
+    """
+    try:
+        metadata = nft_metadata.resolve(ref, ticket_id)
+        if metadata is None:
+            return jsonify({"message": "Metadata not found"}), 404
+        response = jsonify(metadata)
+        # A ref is a content hash, so what it resolves to never changes
+        response.headers['Cache-Control'] = 'public, max-age=86400, immutable'
+        return response, 200
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+@nft.route('/metadata', methods=['GET'])
+def resolve_nft_uri():
+    """
+    Resolve a minted NFT's hex URI, as found on the ledger (?uri=...)
+    """
+    try:
+        parsed = nft_metadata.parse_uri(request.args.get('uri', ''))
+        if parsed is None or parsed[0] is None:
+            return jsonify({"message": "Not a RippleGate ticket URI"}), 400
+        metadata = nft_metadata.resolve(*parsed)
+        if metadata is None:
+            return jsonify({"message": "Metadata not found"}), 404
+        return jsonify(metadata), 200
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
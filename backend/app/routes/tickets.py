@@ -1,13 +1,47 @@
-from flask import Blueprint, request, jsonify, make_response
+from flask import Blueprint, request, jsonify, make_response, url_for, g, current_app, Response
 from app import db
 from app.models import Ticket, Event, User
-from app.services.xrp import XRPLService
-from datetime import datetime
-from jwt import decode
-import os
+from app.services.auth import login_required
+from app.services.mint_queue import mint_queue
+from app.services.activity import activity_feed
+from app.services.stats import get_user_stats
+from app.services.inventory import reserve_seats
+from app.services.nft_index import verify_ownership
+from app.services.idempotency import IdempotencyError, request_key, ticket_keys, find_purchase
+from app.serializers import ticket_load_options, serialize_tickets
+from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import IntegrityError
+from app.utils.pagination import PaginationError, bind_timestamp, keyset_page, parse_limit, parse_date, parse_int, set_next_cursor
+from datetime import timedelta
+import time
 
 tickets = Blueprint('tickets', __name__)
-xrpl_service = XRPLService()
+
+# Upper bound for long-polling the ticket status endpoints
+MAX_STATUS_WAIT = 30
+
+def json_int(data, name, default=None):
+    """
+    An integer field of a JSON body (numeric strings allowed), or default if
+    it's missing. Raises ValueError for anything else.
+    """
+    value = data.get(name, default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).strip().isdigit():
+        raise ValueError(f"{name} must be an integer")
+    return int(value)
+
+def ticket_status(ticket):
+    job = ticket.mint_job
+    return {
+        'ticket_id': ticket.id,
+        'status': ticket.status,
+        'nft_id': ticket.nft_id,
+        'transaction_hash': ticket.transaction_hash,
+        'error': job.last_error if job and ticket.status == 'failed' else None,
+        'ticket': ticket.to_json()
+    }
 
 @tickets.route('/', methods=['OPTIONS'])
 def handle_options():
@@ -15,24 +49,54 @@ def handle_options():
     origin = request.headers.get('Origin')
     if origin in ['http://localhost:5173', 'https://ripplegate-1.onrender.com']:
         response.headers.add('Access-Control-Allow-Origin', origin)
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,Idempotency-Key')
     response.headers.add('Access-Control-Allow-Methods', 'GET,POST,OPTIONS')
     response.headers.add('Access-Control-Allow-Credentials', 'true')
     return response, 200
 
+def purchase_response(new_tickets, bulk, replayed=False):
+    """
+    202 for an accepted purchase. A retry with the same Idempotency-Key gets
+    the same body, with the tickets as they are now, and no new tickets.
+    """
+    if bulk:
+        body = {
+            'message': 'Ticket purchase accepted',
+            'tickets': [ticket.to_json() for ticket in new_tickets],
+            'status_url': url_for('tickets.get_tickets_status', ids=','.join(str(ticket.id) for ticket in new_tickets))
+        }
+    else:
+        body = {
+            'message': 'Ticket purchase accepted',
+            'ticket': new_tickets[0].to_json(),
+            'status_url': url_for('tickets.get_ticket_status', ticket_id=new_tickets[0].id)
+        }
+    response = make_response(jsonify(body), 202)
+    if replayed:
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
 @tickets.route('/buy', methods=['POST'])
+@login_required
 def buy_ticket():
     if request.method == 'OPTIONS':
         return handle_options()
     
     try:
-        data = request.get_json()
-        event_id = data.get('event_id')
-        user_id = data.get('user_id')
+        data = request.get_json(silent=True) or {}
+        try:
+            event_id = json_int(data, 'event_id')
+            user_id = json_int(data, 'user_id', g.current_user.id)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         if not event_id or not user_id:
             return jsonify({'error': 'Missing event_id or user_id'}), 400
         
+        # Tickets can only be bought for the logged in account
+        if user_id != g.current_user.id:
+            return jsonify({'error': 'Cannot buy tickets for another user'}), 403
+        
         # Get event and user details
         event = Event.query.get(event_id)
         user = User.query.get(user_id)
@@ -43,58 +107,213 @@ def buy_ticket():
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Check if tickets are available
-        if event.tickets <= 0:
-            return jsonify({'error': 'No tickets available'}), 400
+        # A retry of a purchase we already took gets its ticket back instead of a second mint
+        key = request_key()
+        if key:
+            existing = find_purchase(user.id, key, event.id)
+            if existing:
+                return purchase_response(existing, bulk=False, replayed=True)
         
-        # Create ticket record first (pending status)
+        # Create ticket record (pending status), hold its seat and queue its mint in one transaction
         new_ticket = Ticket(
             event_id=event_id,
             user_id=user_id,
             price=event.price,
-            status='pending'
+            status='pending',
+            idempotency_key=key
         )
         
+        # Conditional decrement: concurrent buyers can never take more seats than exist
+        if not reserve_seats(event.id, [new_ticket]):
+            db.session.rollback()
+            return jsonify({'error': 'No tickets available'}), 400
+        
         db.session.add(new_ticket)
-        db.session.commit()  # Get ticket ID
-        
-        # Mint NFT using XRPL service
-        nft_result = xrpl_service.mint_ticket_nft(
-            event_title=event.title,
-            event_date=event.date.strftime('%Y-%m-%d'),
-            event_location=event.location,
-            ticket_id=new_ticket.id,
-            user_wallet_address=user.wallet_address
-        )
+        mint_queue.enqueue(new_ticket)
+        activity_feed.record(db.session, [new_ticket])
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent retry with the same key committed first; its seat hold is kept, ours rolled back
+            db.session.rollback()
+            existing = find_purchase(user.id, key, event.id) if key else None
+            if not existing:
+                raise
+            return purchase_response(existing, bulk=False, replayed=True)
+        mint_queue.notify()
         
-        if nft_result['success']:
-            # Update ticket with NFT details
-            new_ticket.nft_id = nft_result['nft_id']
-            new_ticket.transaction_hash = nft_result['transaction_hash']
-            new_ticket.status = 'confirmed'
-            
-            # Decrease available tickets
-            event.tickets -= 1
-            
+        # Minting happens in the background; clients poll the status endpoint
+        return purchase_response([new_ticket], bulk=False)
+    
+    except IdempotencyError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 422
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@tickets.route('/buy/bulk', methods=['POST'])
+@login_required
+def buy_tickets_bulk():
+    if request.method == 'OPTIONS':
+        return handle_options()
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            event_id = json_int(data, 'event_id')
+            quantity = json_int(data, 'quantity')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if not event_id or not quantity:
+            return jsonify({'error': 'Missing event_id or quantity'}), 400
+        
+        max_quantity = current_app.config['BULK_PURCHASE_MAX']
+        if not 1 <= quantity <= max_quantity:
+            return jsonify({'error': f"quantity must be between 1 and {max_quantity}"}), 400
+        
+        event = Event.query.get(event_id)
+        if not event:
+            return jsonify({'error': 'Event not found'}), 404
+        
+        user = g.current_user
+        key = request_key()
+        keys = ticket_keys(key, quantity) if key else [None] * quantity
+        if key:
+            existing = find_purchase(user.id, key, event.id, quantity)
+            if existing:
+                return purchase_response(existing, bulk=True, replayed=True)
+        
+        new_tickets = [
+            Ticket(event_id=event.id, user_id=user.id, price=event.price, status='pending', idempotency_key=ticket_key)
+            for ticket_key in keys
+        ]
+        
+        # All seats or none: one conditional decrement for the whole order
+        if not reserve_seats(event.id, new_tickets):
+            db.session.rollback()
+            return jsonify({'error': 'Not enough tickets available'}), 400
+        
+        # One commit for every ticket, hold and mint job; a single worker claims
+        # the jobs together and mints them in the same ledger closes
+        db.session.add_all(new_tickets)
+        mint_queue.enqueue_many(new_tickets)
+        activity_feed.record(db.session, new_tickets)
+        try:
             db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            existing = find_purchase(user.id, key, event.id, quantity) if key else None
+            if not existing:
+                raise
+            return purchase_response(existing, bulk=True, replayed=True)
+        mint_queue.notify()
+        
+        return purchase_response(new_tickets, bulk=True)
+    
+    except IdempotencyError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 422
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@tickets.route('/status', methods=['GET'])
+def get_tickets_status():
+    if request.method == 'OPTIONS':
+        return handle_options()
+    
+    try:
+        ticket_ids = [int(ticket_id) for ticket_id in request.args.get('ids', '').split(',') if ticket_id.strip()]
+        if not ticket_ids or len(ticket_ids) > current_app.config['BULK_PURCHASE_MAX']:
+            return jsonify({'error': f"ids must list 1 to {current_app.config['BULK_PURCHASE_MAX']} ticket ids"}), 400
+        
+        # Same long-poll as the single ticket status, until none of the tickets is pending
+        wait = min(max(request.args.get('wait', 0, type=float), 0), MAX_STATUS_WAIT)
+        deadline = time.monotonic() + wait
+        
+        while True:
+            found = Ticket.query.filter(Ticket.id.in_(ticket_ids)).options(
+                selectinload(Ticket.mint_job), *ticket_load_options()
+            ).all()
             
-            return jsonify({
-                'message': 'Ticket purchased successfully',
-                'ticket': new_ticket.to_json(),
-                'nft_details': nft_result
-            }), 201
-        else:
-            # Update ticket status to failed
-            new_ticket.status = 'failed'
-            db.session.commit()
+            remaining = deadline - time.monotonic()
+            if all(ticket.status != 'pending' for ticket in found) or remaining <= 0:
+                break
+            
+            db.session.rollback()
+            mint_queue.wait_for_update(min(remaining, 1.0))
+        
+        # Each ticket succeeds or fails on its own; failed seats are already back on sale
+        results = [ticket_status(ticket) for ticket in sorted(found, key=lambda ticket: ticket.id)]
+        summary = {status: 0 for status in ('pending', 'confirmed', 'failed')}
+        for result in results:
+            summary[result['status']] = summary.get(result['status'], 0) + 1
+        
+        return jsonify({
+            'tickets': results,
+            'summary': summary,
+            'missing': sorted(set(ticket_ids) - {ticket.id for ticket in found})
+        }), 200
+    except ValueError:
+        return jsonify({'error': 'ids must be comma separated ticket ids'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@tickets.route('/<int:ticket_id>/status', methods=['GET'])
+def get_ticket_status(ticket_id):
+    if request.method == 'OPTIONS':
+        return handle_options()
+    
+    try:
+        # Optional long-poll: ?wait=<seconds> holds the request until the ticket leaves pending
+        wait = min(max(request.args.get('wait', 0, type=float), 0), MAX_STATUS_WAIT)
+        deadline = time.monotonic() + wait
+        
+        while True:
+            ticket = Ticket.query.get(ticket_id)
+            if not ticket:
+                return jsonify({'error': 'Ticket not found'}), 404
             
-            return jsonify({
-                'error': 'Failed to mint NFT ticket',
-                'details': nft_result.get('error', 'Unknown error')
-            }), 500
+            remaining = deadline - time.monotonic()
+            if ticket.status != 'pending' or remaining <= 0:
+                break
             
+            # Re-check at least once a second so workers in other processes are noticed
+            db.session.rollback()
+            mint_queue.wait_for_update(min(remaining, 1.0))
+        
+        return jsonify(ticket_status(ticket)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@tickets.route('/<int:ticket_id>/verify', methods=['GET'])
+def verify_ticket(ticket_id):
+    if request.method == 'OPTIONS':
+        return handle_options()
+    
+    try:
+        ticket = Ticket.query.get(ticket_id)
+        if not ticket:
+            return jsonify({'error': 'Ticket not found'}), 404
+        
+        if ticket.status != 'confirmed' or not ticket.nft_id:
+            return jsonify({'ticket_id': ticket.id, 'valid': False, 'reason': f"Ticket is {ticket.status}"}), 200
+        
+        # Answered from the local ownership index unless ?ledger=1 asks for an on-ledger check
+        verify_on_ledger = request.args.get('ledger') in ('1', 'true')
+        wallet_address = ticket.user.wallet_address
+        valid = verify_ownership(mint_queue.xrpl_service, ticket.nft_id, wallet_address, verify_on_ledger=verify_on_ledger)
+        
+        return jsonify({
+            'ticket_id': ticket.id,
+            'nft_id': ticket.nft_id,
+            'wallet_address': wallet_address,
+            'valid': valid,
+            'source': 'ledger' if verify_on_ledger else 'index'
+        }), 200
     except Exception as e:
-        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @tickets.route('/user/<int:user_id>', methods=['GET'])
@@ -103,50 +322,61 @@ def get_user_tickets(user_id):
         return handle_options()
     
     try:
-        tickets = Ticket.query.filter_by(user_id=user_id).order_by(Ticket.created_at.desc()).all()
-        return jsonify([ticket.to_json() for ticket in tickets]), 200
+        # ?view=slim returns tickets without the nested event and wallet
+        slim = request.args.get('view') == 'slim'
+        query = Ticket.query.filter_by(user_id=user_id).options(*ticket_load_options(slim))
+        
+        status = request.args.get('status')
+        if status:
+            query = query.filter(Ticket.status == status)
+        date_from = parse_date(request.args, 'date_from')
+        if date_from:
+            query = query.filter(Ticket.created_at >= bind_timestamp(query, date_from))
+        date_to = parse_date(request.args, 'date_to')
+        if date_to:
+            query = query.filter(Ticket.created_at < bind_timestamp(query, date_to + timedelta(days=1)))
+        min_price = parse_int(request.args, 'min_price')
+        if min_price is not None:
+            query = query.filter(Ticket.price >= min_price)
+        max_price = parse_int(request.args, 'max_price')
+        if max_price is not None:
+            query = query.filter(Ticket.price <= max_price)
+        
+        # Newest first, one keyset page at a time
+        tickets, next_cursor = keyset_page(
+            query, Ticket, cursor=request.args.get('cursor'), limit=parse_limit(request.args)
+        )
+        response = make_response(jsonify(serialize_tickets(tickets, slim=slim)), 200)
+        set_next_cursor(response, next_cursor)
+        return response
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 
 
+@tickets.route('/user/<int:user_id>/stats', methods=['GET'])
+def get_user_ticket_stats(user_id):
+    if request.method == 'OPTIONS':
+        return handle_options()
+    
+    try:
+        return jsonify(get_user_stats(user_id)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @tickets.route('/activity', methods=['GET'])
 def get_recent_activity():
     if request.method == 'OPTIONS':
         return handle_options()
     
     try:
-        # Get recent tickets with user and event info, limit to 20 most recent
-        recent_tickets = db.session.query(Ticket, User, Event)\
-            .join(User, Ticket.user_id == User.id)\
-            .join(Event, Ticket.event_id == Event.id)\
-            .order_by(Ticket.created_at.desc())\
-            .limit(20)\
-            .all()
-        
-        activity_data = []
-        for ticket, user, event in recent_tickets:
-            # Get user's name from email (part before @)
-            user_name = user.email.split('@')[0] if user.email else 'Anonymous'
-            
-            activity_data.append({
-                'id': ticket.id,
-                'user_name': user_name,
-                'user_email': user.email,
-                'event_name': event.title,
-                'event_id': event.id,
-                'ticket_price': ticket.price,
-                'status': ticket.status,
-                'created_at': ticket.created_at.isoformat() + 'Z',
-                'nft_id': ticket.nft_id,
-                'event_date': event.date.strftime('%Y-%m-%d') if event.date else None,
-                'event_location': event.location
-            })
-        
+        # Served from the in-memory feed; purchases and mint results publish into it
         return jsonify({
             'success': True,
-            'activity': activity_data
+            'activity': activity_feed.recent()
         }), 200
         
     except Exception as e:
@@ -154,3 +384,17 @@ def get_recent_activity():
             'success': False,
             'error': str(e)
         }), 500
+
+@tickets.route('/activity/stream', methods=['GET'])
+def stream_recent_activity():
+    try:
+        # Load the feed here, while the request (and its app context) is still active
+        activity_feed.recent()
+        last_event_id = request.headers.get('Last-Event-ID', type=int)
+        response = Response(activity_feed.stream(last_event_id), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        # Stop nginx-style proxies from buffering the stream
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
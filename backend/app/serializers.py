@@ -0,0 +1,84 @@
+from sqlalchemy.orm import selectinload
+
+
+def event_load_options():
+    """
+    Loader options for queries whose events will be serialized
+    """
+    from app.models import Event
+    return [selectinload(Event.host)]
+
+
+def ticket_load_options(slim=False):
+    """
+    Loader options for queries whose tickets will be serialized. Events,
+    hosts and users are fetched with one SELECT ... IN per relationship
+    instead of one lazy load per ticket.
+    """
+    from app.models import Ticket, Event
+    if slim:
+        return []
+    return [
+        selectinload(Ticket.event).selectinload(Event.host),
+        selectinload(Ticket.user)
+    ]
+
+
+def serialize_event(event):
+    host_name = None
+    if event.host:
+        # Use full email as host name
+        host_name = event.host.email if event.host.email else 'Anonymous'
+
+    return {
+        'id': event.id,
+        'title': event.title,
+        'location': event.location,
+        'description': event.description,
+        'tickets': event.tickets,
+        'price': event.price,
+        'image': event.image,
+        'date': event.date.strftime('%Y-%m-%d'),
+        'time': event.time.strftime('%H:%M:%S'),
+        'host_id': event.host_id,
+        'host_name': host_name,
+        'created_at': event.created_at.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def serialize_events(events):
+    return [serialize_event(event) for event in events]
+
+
+def serialize_ticket(ticket, slim=False, event_fragments=None):
+    """
+    Serialize a ticket. Slim mode omits the nested event and wallet;
+    event_fragments lets a caller share one serialized event between tickets.
+    """
+    data = {
+        'id': ticket.id,
+        'event_id': ticket.event_id,
+        'user_id': ticket.user_id,
+        'price': ticket.price,
+        'nft_id': ticket.nft_id,
+        'transaction_hash': ticket.transaction_hash,
+        'status': ticket.status,
+        'created_at': ticket.created_at.isoformat() + 'Z'
+    }
+    if slim:
+        return data
+
+    if event_fragments is None:
+        event_fragments = {}
+    if ticket.event_id not in event_fragments:
+        event_fragments[ticket.event_id] = serialize_event(ticket.event) if ticket.event else None
+
+    data['event'] = event_fragments[ticket.event_id]
+    data['user_wallet'] = ticket.user.wallet_address if ticket.user else None
+    return data
+
+
+def serialize_tickets(tickets, slim=False):
+    # Every ticket for the same event reuses one serialized event fragment
+    event_fragments = {}
+    return [serialize_ticket(ticket, slim=slim, event_fragments=event_fragments) for ticket in tickets]
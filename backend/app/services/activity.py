@@ -0,0 +1,224 @@
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from sqlalchemy import event as sqlalchemy_event
+from sqlalchemy.orm import Session
+import json
+import threading
+import time
+
+# Changes committed this long before a catch-up query can still be missing from
+# it (slow commits, second-resolution timestamps), so each query looks back this far
+CATCH_UP_OVERLAP = 10  # seconds
+
+
+def activity_entry(ticket):
+    """
+    One row of the recent activity feed
+    """
+    user = ticket.user
+    event = ticket.event
+    return {
+        'id': ticket.id,
+        # Get user's name from email (part before @)
+        'user_name': user.email.split('@')[0] if user.email else 'Anonymous',
+        'user_email': user.email,
+        'event_name': event.title,
+        'event_id': event.id,
+        'ticket_price': ticket.price,
+        'status': ticket.status,
+        'created_at': ticket.created_at.isoformat() + 'Z' if ticket.created_at else None,
+        'nft_id': ticket.nft_id,
+        'event_date': event.date.strftime('%Y-%m-%d') if event.date else None,
+        'event_location': event.location
+    }
+
+
+class ActivityFeed:
+    """
+    Bounded in-process buffer of the most recent ticket activity.
+
+    Purchases and mint results record their tickets on the session; once
+    that transaction commits the entries are published here, replacing the
+    entry for the same ticket if it is still in the buffer. The activity
+    endpoint and its Server-Sent Events stream read only from the buffer,
+    so dashboards never query the database themselves.
+
+    The buffer is only a cache: each process has its own, so a background
+    thread also asks the database every ACTIVITY_CATCH_UP_INTERVAL seconds
+    for tickets changed since it last looked (one indexed query over the
+    buffered window) and publishes what other processes committed.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.size = 20
+        self.heartbeat_interval = 15
+        self.catch_up_interval = 2
+        self._entries = OrderedDict()
+        self._changes = deque()
+        self._sequence = 0
+        self._loaded = False
+        self._last_seen = None
+        self._changed = threading.Condition()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.size = app.config['ACTIVITY_FEED_SIZE']
+        self.heartbeat_interval = app.config['ACTIVITY_HEARTBEAT_INTERVAL']
+        self.catch_up_interval = app.config['ACTIVITY_CATCH_UP_INTERVAL']
+        self._changes = deque(maxlen=self.size)
+        if not sqlalchemy_event.contains(Session, 'after_commit', self._after_commit):
+            sqlalchemy_event.listen(Session, 'before_commit', self._before_commit)
+            sqlalchemy_event.listen(Session, 'after_commit', self._after_commit)
+            sqlalchemy_event.listen(Session, 'after_rollback', self._after_rollback)
+
+    def record(self, session, tickets):
+        """
+        Publish the tickets' current state when the given session next commits
+        """
+        session.info.setdefault('activity_tickets', []).extend(tickets)
+
+    def publish(self, entries):
+        with self._changed:
+            for entry in entries:
+                newest = next(reversed(self._entries)) if self._entries else None
+                self._entries[entry['id']] = entry
+                if newest is not None and entry['id'] < newest:
+                    # Commits can land out of order; keep the buffer in ticket order
+                    self._entries = OrderedDict(sorted(self._entries.items()))
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+                if entry['id'] not in self._entries:
+                    # Older than everything buffered
+                    continue
+                self._sequence += 1
+                self._changes.append((self._sequence, entry))
+            self._changed.notify_all()
+
+    def recent(self, limit=None):
+        """
+        Newest first, like the old ORDER BY created_at DESC query
+        """
+        self._ensure_loaded()
+        with self._changed:
+            entries = list(reversed(self._entries.values()))
+        return entries[:limit] if limit else entries
+
+    def changes_since(self, sequence, timeout):
+        """
+        Wait up to timeout for entries published after sequence.
+        Returns (latest sequence, [(sequence, entry), ...]).
+        """
+        with self._changed:
+            if self._sequence <= sequence:
+                self._changed.wait(timeout)
+            return self._sequence, [(seq, entry) for seq, entry in self._changes if seq > sequence]
+
+    def stream(self, last_event_id=None):
+        """
+        Server-Sent Events: a snapshot for new clients, then one 'activity'
+        event per change. Reconnecting clients send Last-Event-ID and only
+        get what they missed (or a new snapshot if it fell out of the buffer).
+        """
+        entries = self.recent()
+        with self._changed:
+            sequence = self._sequence
+            oldest = self._changes[0][0] if self._changes else sequence + 1
+
+        yield "retry: 3000\n\n"
+        if last_event_id is not None and oldest <= last_event_id + 1 <= sequence + 1:
+            sequence = last_event_id
+        else:
+            yield f"id: {sequence}\nevent: snapshot\ndata: {json.dumps(entries)}\n\n"
+
+        while True:
+            sequence, changes = self.changes_since(sequence, self.heartbeat_interval)
+            if not changes:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            for change_sequence, entry in changes:
+                yield f"id: {change_sequence}\nevent: activity\ndata: {json.dumps(entry)}\n\n"
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        from app.models import Ticket
+        from sqlalchemy.orm import joinedload
+
+        with self._changed:
+            if self._loaded:
+                return
+            self._last_seen = datetime.utcnow()
+            tickets = Ticket.query.order_by(Ticket.created_at.desc(), Ticket.id.desc()).limit(self.size).options(
+                joinedload(Ticket.user), joinedload(Ticket.event)
+            ).all()
+            for ticket in tickets:
+                # Entries published before the first read are newer
+                self._entries.setdefault(ticket.id, activity_entry(ticket))
+            self._entries = OrderedDict(sorted(self._entries.items()))
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+            self._loaded = True
+
+        if self.app is not None and self.catch_up_interval > 0:
+            threading.Thread(target=self._run_catch_up, name="activity-catch-up", daemon=True).start()
+
+    def catch_up(self):
+        """
+        Publish tickets changed since the last look that this process didn't
+        commit itself. Only tickets that would be in the buffer are fetched.
+        """
+        from app.models import Ticket
+        from sqlalchemy.orm import joinedload
+
+        polled_at = datetime.utcnow()
+        with self._changed:
+            since = self._last_seen - timedelta(seconds=CATCH_UP_OVERLAP)
+            oldest = next(iter(self._entries)) if len(self._entries) >= self.size else None
+
+        query = Ticket.query.filter(Ticket.updated_at > since)
+        if oldest is not None:
+            query = query.filter(Ticket.id >= oldest)
+        tickets = query.order_by(Ticket.id.desc()).limit(self.size).options(
+            joinedload(Ticket.user), joinedload(Ticket.event)
+        ).all()
+
+        entries = [activity_entry(ticket) for ticket in reversed(tickets)]
+        with self._changed:
+            changed = [entry for entry in entries if self._entries.get(entry['id']) != entry]
+            self._last_seen = polled_at
+        if changed:
+            self.publish(changed)
+        return len(changed)
+
+    def _run_catch_up(self):
+        while True:
+            time.sleep(self.catch_up_interval)
+            try:
+                with self.app.app_context():
+                    self.catch_up()
+            except Exception as e:
+                print(f"Activity catch-up error: {str(e)}")
+
+    def _before_commit(self, session):
+        tickets = session.info.pop('activity_tickets', None)
+        if not tickets:
+            return
+        # Flush first so new tickets have their ids and timestamps
+        session.flush()
+        session.info['activity_entries'] = [activity_entry(ticket) for ticket in tickets]
+
+    def _after_commit(self, session):
+        entries = session.info.pop('activity_entries', None)
+        if entries:
+            self.publish(entries)
+
+    def _after_rollback(self, session):
+        session.info.pop('activity_tickets', None)
+        session.info.pop('activity_entries', None)
+
+
+activity_feed = ActivityFeed()
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import current_app, g, jsonify, request
+from jwt import encode, decode, ExpiredSignatureError, InvalidTokenError
+from sqlalchemy import event as sqlalchemy_event
+import os
+
+from app.services.cache import MemoryCache
+
+
+class Principal:
+    """
+    Lightweight, session-independent snapshot of an authenticated user
+    """
+
+    __slots__ = ('id', 'email', 'profile_picture', 'wallet_address')
+
+    def __init__(self, id, email, profile_picture, wallet_address):
+        self.id = id
+        self.email = email
+        self.profile_picture = profile_picture
+        self.wallet_address = wallet_address
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.email, user.profile_picture, user.wallet_address)
+
+
+class AuthManager:
+    """
+    Decodes the JWT cookie once per request and exposes g.current_user.
+
+    Decoded tokens and user principals are kept in bounded TTL caches, so
+    an authenticated request normally costs neither a signature check nor
+    a User query. Principals are dropped whenever the User row changes.
+    """
+
+    def __init__(self, app=None):
+        self.tokens = None
+        self.principals = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.tokens = MemoryCache(max_entries=app.config['AUTH_CACHE_SIZE'], default_ttl=app.config['AUTH_CACHE_TTL'])
+        self.principals = MemoryCache(max_entries=app.config['AUTH_CACHE_SIZE'], default_ttl=app.config['AUTH_CACHE_TTL'])
+        app.before_request(self.load_current_user)
+
+        from app.models import User
+        for event_name in ('after_insert', 'after_update', 'after_delete'):
+            if not sqlalchemy_event.contains(User, event_name, self._user_changed):
+                sqlalchemy_event.listen(User, event_name, self._user_changed)
+
+    def issue_token(self, user):
+        now = datetime.now(timezone.utc)
+        return encode(
+            {
+                "user_id": user.id,
+                "email": user.email,
+                "iat": now,
+                "exp": now + timedelta(seconds=current_app.config['JWT_EXPIRES_IN'])
+            },
+            os.getenv("JWT_SECRET"),
+            algorithm="HS256"
+        )
+
+    def load_current_user(self):
+        g.current_user = None
+        g.auth_error = None
+
+        if request.method == 'OPTIONS':
+            return
+
+        token = request.cookies.get('token')
+        if not token:
+            return
+
+        claims = self._decode(token)
+        if claims is None:
+            return
+
+        principal = self.principals.get(claims['user_id'])
+        if principal is None:
+            from app.models import User
+            user = User.query.filter_by(id=claims['user_id']).first()
+            if not user:
+                g.auth_error = "User not found"
+                return
+            principal = Principal.from_user(user)
+            self.principals.set(user.id, principal)
+
+        g.current_user = principal
+
+    def invalidate_user(self, user_id):
+        if self.principals is not None:
+            self.principals.delete(user_id)
+
+    def _decode(self, token):
+        claims = self.tokens.get(token)
+        if claims is None:
+            try:
+                claims = decode(token, os.getenv("JWT_SECRET"), algorithms=["HS256"], options={"require": ["exp"]})
+            except ExpiredSignatureError:
+                g.auth_error = "Token expired"
+                return None
+            except InvalidTokenError:
+                g.auth_error = "Invalid token"
+                return None
+            self.tokens.set(token, claims)
+
+        # Cached claims still have to respect the token's own expiry
+        if claims['exp'] <= datetime.now(timezone.utc).timestamp():
+            self.tokens.delete(token)
+            g.auth_error = "Token expired"
+            return None
+        return claims
+
+    def _user_changed(self, mapper, connection, user):
+        self.invalidate_user(user.id)
+
+
+def login_required(view):
+    """
+    Reject the request with 401 unless the auth layer found a user
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'OPTIONS' and g.get('current_user') is None:
+            return jsonify({"message": g.get('auth_error') or "Authentication required"}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
+auth_manager = AuthManager()
@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from importlib import import_module
+import threading
+import time
+
+
+class MemoryCache:
+    """
+    In-process LRU cache with per-entry TTL.
+
+    This is the default cache backend. A shared backend (Redis, memcached...)
+    can be plugged in through CACHE_BACKEND as long as it provides the same
+    get/set/delete/incr methods.
+    """
+
+    def __init__(self, max_entries=256, default_ttl=60):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def incr(self, key):
+        """
+        Atomically increment an integer counter that never expires
+        """
+        with self._lock:
+            value, _ = self._entries.get(key, (0, None))
+            self._entries[key] = (value + 1, None)
+            self._entries.move_to_end(key)
+            return value + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def load_cache_backend(path, **options):
+    """
+    Build a cache backend from a dotted 'module.ClassName' path
+    """
+    module_name, class_name = path.rsplit('.', 1)
+    backend_class = getattr(import_module(module_name), class_name)
+    return backend_class(**options)
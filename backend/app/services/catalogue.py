@@ -0,0 +1,144 @@
+from datetime import datetime, timezone
+from sqlalchemy import event as sqlalchemy_event
+from sqlalchemy.orm import Session
+import hashlib
+import json
+import time
+
+from app.services.cache import load_cache_backend
+from app.utils.pagination import keyset_page
+from app.serializers import event_load_options, serialize_events
+
+
+class EventCatalogue:
+    """
+    Serialized, cached copy of the public event catalogue.
+
+    Reads are served from the cache backend as ready-to-send JSON with an
+    ETag and Last-Modified, so in steady state GET /api/event/ never touches
+    SQLAlchemy. Writes mark the session dirty and the cache is invalidated
+    once that transaction commits: a change to one event's seats only
+    rebuilds the pages that list that event, while a new event bumps the
+    generation of the whole catalogue.
+
+    Every invalidation stores its time, so Last-Modified is when a page's
+    data last changed rather than when the page was built.
+    """
+
+    GENERATION_KEY = 'catalogue:generation'
+    CHANGED_AT_KEY = 'catalogue:changed_at'
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.ttl = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config['CATALOGUE_CACHE_TTL']
+        self.backend = load_cache_backend(
+            app.config['CACHE_BACKEND'],
+            **app.config['CACHE_BACKEND_OPTIONS']
+        )
+        if not sqlalchemy_event.contains(Session, 'after_commit', self._after_commit):
+            sqlalchemy_event.listen(Session, 'after_commit', self._after_commit)
+            sqlalchemy_event.listen(Session, 'after_rollback', self._after_rollback)
+
+    def get_events(self, params):
+        """
+        Return {'body', 'etag', 'last_modified', 'next_cursor'} for one page
+        of the event list. params holds the parsed limit, cursor and filters.
+        """
+        generation = self.backend.get(self.GENERATION_KEY) or 0
+        key = f"catalogue:events:{generation}:{json.dumps(params, sort_keys=True, default=str)}"
+
+        entry = self.backend.get(key)
+        if entry is None or self._event_versions(entry['event_ids']) != entry['versions']:
+            entry = self._build_events_entry(params)
+            self.backend.set(key, entry, self.ttl)
+        return entry
+
+    def mark_dirty(self, session, event_id=None):
+        """
+        Invalidate one event (or, without event_id, the whole catalogue)
+        when the given session next commits
+        """
+        if event_id is None:
+            session.info['catalogue_dirty'] = True
+        else:
+            session.info.setdefault('catalogue_dirty_events', set()).add(event_id)
+
+    def invalidate(self, event_ids=None):
+        changed_at = time.time()
+        if event_ids is None:
+            self.backend.incr(self.GENERATION_KEY)
+            self.backend.set(self.CHANGED_AT_KEY, changed_at, 0)
+            return
+        for event_id in event_ids:
+            self.backend.set(self._event_key(event_id), changed_at, 0)
+
+    def _after_commit(self, session):
+        dirty = session.info.pop('catalogue_dirty', False)
+        dirty_events = session.info.pop('catalogue_dirty_events', None)
+        if self.backend is None:
+            return
+        if dirty:
+            self.invalidate()
+        if dirty_events:
+            self.invalidate(dirty_events)
+
+    def _after_rollback(self, session):
+        session.info.pop('catalogue_dirty', None)
+        session.info.pop('catalogue_dirty_events', None)
+
+    @staticmethod
+    def _event_key(event_id):
+        return f"catalogue:event:{event_id}"
+
+    def _event_versions(self, event_ids):
+        """
+        When each event last changed, as far as the cache knows
+        """
+        return [self.backend.get(self._event_key(event_id)) for event_id in event_ids]
+
+    def _build_events_entry(self, params):
+        from app.models import Event
+
+        started = time.time()
+        query = Event.query.options(*event_load_options())
+        if params.get('date_from'):
+            query = query.filter(Event.date >= params['date_from'])
+        if params.get('date_to'):
+            query = query.filter(Event.date <= params['date_to'])
+        if params.get('min_price') is not None:
+            query = query.filter(Event.price >= params['min_price'])
+        if params.get('max_price') is not None:
+            query = query.filter(Event.price <= params['max_price'])
+        if params.get('host_id') is not None:
+            query = query.filter(Event.host_id == params['host_id'])
+
+        events, next_cursor = keyset_page(
+            query, Event, cursor=params.get('cursor'), limit=params['limit'], descending=False
+        )
+        event_ids = [event.id for event in events]
+        versions = self._event_versions(event_ids)
+        body = json.dumps(serialize_events(events)).encode('utf-8')
+
+        changes = [version for version in versions if version is not None]
+        changes += [event.created_at.replace(tzinfo=timezone.utc).timestamp() for event in events]
+        catalogue_changed_at = self.backend.get(self.CHANGED_AT_KEY)
+        if catalogue_changed_at is not None:
+            changes.append(catalogue_changed_at)
+        last_modified = datetime.fromtimestamp(max(changes), timezone.utc) if changes else datetime.now(timezone.utc)
+        return {
+            'body': body,
+            'etag': hashlib.sha1(body).hexdigest(),
+            'last_modified': last_modified.replace(microsecond=0),
+            'event_ids': event_ids,
+            # An event that changed while this page was built may not show it yet: never matches, so the next read rebuilds
+            'versions': [-1 if version is not None and version >= started else version for version in versions],
+            'next_cursor': next_cursor
+        }
+
+
+event_catalogue = EventCatalogue()
@@ -0,0 +1,279 @@
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+import base64
+import hashlib
+import threading
+
+from app.services.cache import MemoryCache
+
+CREDENTIAL_VERSION = 'RG1'
+
+
+class CredentialError(Exception):
+    """
+    A ticket credential that is malformed, forged or no longer valid
+    """
+    pass
+
+
+class CheckInService:
+    """
+    Signed ticket credentials and offline-friendly door check-in.
+
+    A credential is the QR payload
+
+        RG1.<ticket id>.<event id>.<nft id>.<holder wallet>.<signature>
+
+    where the signature is an Ed25519 signature (base64url) over everything
+    before the last dot. Scanners pin the public key from the manifest, so
+    checking a credential is local: verify the signature, look the ticket
+    up in the event manifest (it must be listed, with the same holder) and
+    make sure it isn't in the device's used set. Accepted scans are queued
+    on the device and synced back in batches; the server keeps the first
+    redemption of every ticket and reports the rest as duplicates, so two
+    doors scanning the same ticket while offline is caught on the next sync.
+
+    The manifest is built from the ticket table and the local NFT ownership
+    index, never from the ledger, and its ticket list is cached for
+    CHECKIN_MANIFEST_TTL seconds. Check-ins are served incrementally after
+    a cursor so scanners on a poor connection only pull what changed.
+    """
+
+    def __init__(self, app=None):
+        self.signing_seed = None
+        self.sync_max = 1000
+        self.manifests = None
+        self._keypair = None
+        self._key_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.signing_seed = app.config['CHECKIN_SIGNING_SEED']
+        if not self.signing_seed and app.config['SECRET_KEY']:
+            # Stable across processes and restarts, like the seed itself would be
+            self.signing_seed = 'secret-key:' + hashlib.sha256(
+                f"ripplegate-checkin:{app.config['SECRET_KEY']}".encode()
+            ).hexdigest()[:32]
+        self.sync_max = app.config['CHECKIN_SYNC_MAX']
+        self.manifests = MemoryCache(max_entries=1024, default_ttl=app.config['CHECKIN_MANIFEST_TTL'])
+        self._keypair = None
+
+    @property
+    def public_key(self):
+        return self._keys()[0]
+
+    def issue_credential(self, ticket, holder):
+        """
+        Sign the QR payload for a confirmed ticket held by the given wallet
+        """
+        from xrpl.core import keypairs
+
+        if ticket.status != 'confirmed' or not ticket.nft_id:
+            raise CredentialError("Only confirmed tickets can be checked in")
+        message = f"{CREDENTIAL_VERSION}.{ticket.id}.{ticket.event_id}.{ticket.nft_id}.{holder}"
+        signature = bytes.fromhex(keypairs.sign(message.encode(), self._keys()[1]))
+        return f"{message}.{base64.urlsafe_b64encode(signature).rstrip(b'=').decode()}"
+
+    def parse_credential(self, credential):
+        """
+        Check a credential's signature and return its fields
+        """
+        from xrpl.core import keypairs
+
+        try:
+            message, _, encoded_signature = credential.strip().rpartition('.')
+            version, ticket_id, event_id, nft_id, holder = message.split('.')
+            signature = base64.urlsafe_b64decode(encoded_signature + '=' * (-len(encoded_signature) % 4))
+            fields = {'ticket_id': int(ticket_id), 'event_id': int(event_id), 'nft_id': nft_id, 'holder': holder}
+        except (AttributeError, ValueError):
+            raise CredentialError("Malformed credential")
+
+        if version != CREDENTIAL_VERSION:
+            raise CredentialError("Unsupported credential version")
+        try:
+            valid = keypairs.is_valid_message(message.encode(), signature, self.public_key)
+        except Exception:
+            valid = False
+        if not valid:
+            raise CredentialError("Invalid credential signature")
+        return fields
+
+    def holders(self, event_id, ticket_ids=None):
+        """
+        {ticket id: (nft id, holder wallet)} for the event's redeemable tickets.
+        The holder is the buyer until the NFT moves to another wallet.
+        """
+        from app import db
+        from app.models import Ticket, User, NFTOwnership
+
+        query = db.session.query(
+            Ticket.id, Ticket.nft_id, User.wallet_address, NFTOwnership.owner, NFTOwnership.issuer, NFTOwnership.burned
+        ).join(User, User.id == Ticket.user_id).outerjoin(
+            NFTOwnership, NFTOwnership.nft_id == Ticket.nft_id
+        ).filter(Ticket.event_id == event_id, Ticket.status == 'confirmed', Ticket.nft_id.isnot(None))
+        if ticket_ids is not None:
+            query = query.filter(Ticket.id.in_(ticket_ids))
+
+        holders = {}
+        for ticket_id, nft_id, buyer, owner, issuer, burned in query:
+            if burned:
+                continue
+            # Still with the issuer means the buyer hasn't accepted the transfer offer yet
+            holders[ticket_id] = (nft_id, owner if owner and owner != issuer else buyer)
+        return holders
+
+    def manifest(self, event_id, since=None):
+        """
+        What a scanner needs to verify tickets offline: the public key, the
+        redeemable tickets with their holders, and the check-ins so far.
+        With since (a cursor from an earlier manifest) only newer check-ins
+        are returned and the ticket list is left out.
+        """
+        from app.models import CheckIn
+
+        query = CheckIn.query.filter(CheckIn.event_id == event_id).with_entities(
+            CheckIn.id, CheckIn.ticket_id, CheckIn.scanned_at
+        ).order_by(CheckIn.id)
+        if since:
+            query = query.filter(CheckIn.id > since)
+        check_ins = query.all()
+
+        manifest = {
+            'version': CREDENTIAL_VERSION,
+            'event_id': event_id,
+            'public_key': self.public_key,
+            'generated_at': datetime.utcnow().isoformat() + 'Z',
+            'checked_in': [[ticket_id, scanned_at.isoformat() + 'Z'] for _, ticket_id, scanned_at in check_ins],
+            'cursor': check_ins[-1][0] if check_ins else (since or 0)
+        }
+        if since is None:
+            tickets = self.manifests.get(event_id)
+            if tickets is None:
+                # Compact rows: [ticket id, nft id, holder wallet]
+                tickets = [[ticket_id, nft_id, holder] for ticket_id, (nft_id, holder) in sorted(self.holders(event_id).items())]
+                self.manifests.set(event_id, tickets)
+            manifest['tickets'] = tickets
+        return manifest
+
+    def scan(self, event_id, credential, scanner_id=None):
+        """
+        Online check-in of one credential: signature, holder and redemption
+        checked on the server. Returns the redeem() result for it.
+        """
+        fields = self.parse_credential(credential)
+        if fields['event_id'] != event_id:
+            return {'ticket_id': fields['ticket_id'], 'result': 'invalid', 'reason': 'Ticket is for another event'}
+
+        holder = self.holders(event_id, [fields['ticket_id']]).get(fields['ticket_id'])
+        if holder is None:
+            return {'ticket_id': fields['ticket_id'], 'result': 'invalid', 'reason': 'Ticket is not valid for entry'}
+        if holder != (fields['nft_id'], fields['holder']):
+            return {'ticket_id': fields['ticket_id'], 'result': 'invalid', 'reason': 'Ticket has changed hands since this credential was issued'}
+
+        return self.redeem(event_id, [{'ticket_id': fields['ticket_id']}], scanner_id)[0]
+
+    def redeem(self, event_id, scans, scanner_id=None):
+        """
+        Record a batch of scans, each {'ticket_id', 'scanned_at' (ISO 8601,
+        optional), 'scanner_id' (optional)}. The earliest scan of a ticket
+        wins; every scan gets a result of 'accepted', 'duplicate' (with the
+        winning check-in) or 'invalid' (with a reason), in input order.
+        """
+        from app import db
+        from app.models import CheckIn, Ticket
+
+        if len(scans) > self.sync_max:
+            raise ValueError(f"At most {self.sync_max} scans per sync")
+
+        now = datetime.utcnow()
+        parsed = []
+        for index, scan in enumerate(scans):
+            try:
+                ticket_id = int(scan['ticket_id'])
+                scanned_at = _parse_timestamp(scan.get('scanned_at')) or now
+            except (KeyError, TypeError, ValueError):
+                parsed.append((index, None, None, None))
+                continue
+            parsed.append((index, ticket_id, min(scanned_at, now), str(scan.get('scanner_id') or scanner_id or '')[:64] or None))
+
+        ticket_ids = {ticket_id for _, ticket_id, _, _ in parsed if ticket_id is not None}
+        tickets = {
+            ticket.id: ticket for ticket in
+            Ticket.query.filter(Ticket.id.in_(ticket_ids)).with_entities(Ticket.id, Ticket.event_id, Ticket.status)
+        } if ticket_ids else {}
+
+        # A concurrent sync from another door can win the insert race; retry against its rows
+        for attempt in range(3):
+            existing = {
+                check_in.ticket_id: check_in.to_json()
+                for check_in in CheckIn.query.filter(CheckIn.ticket_id.in_(ticket_ids))
+            } if ticket_ids else {}
+
+            results = [None] * len(parsed)
+            winners = {}
+            for index, ticket_id, scanned_at, scan_scanner in sorted(parsed, key=lambda scan: (scan[2] or now, scan[0])):
+                ticket = tickets.get(ticket_id)
+                if ticket_id is None:
+                    results[index] = {'ticket_id': None, 'result': 'invalid', 'reason': 'Scan needs a ticket_id'}
+                elif ticket is None or ticket.event_id != event_id:
+                    results[index] = {'ticket_id': ticket_id, 'result': 'invalid', 'reason': 'Ticket is not for this event'}
+                elif ticket.status != 'confirmed':
+                    results[index] = {'ticket_id': ticket_id, 'result': 'invalid', 'reason': f"Ticket is {ticket.status}"}
+                elif ticket_id in existing or ticket_id in winners:
+                    results[index] = {'ticket_id': ticket_id, 'result': 'duplicate'}
+                else:
+                    winners[ticket_id] = CheckIn(ticket_id=ticket_id, event_id=event_id, scanner_id=scan_scanner, scanned_at=scanned_at)
+                    results[index] = {'ticket_id': ticket_id, 'result': 'accepted'}
+
+            if not winners:
+                break
+            try:
+                db.session.add_all(winners.values())
+                # Flushed first so the new rows are serialized before commit expires them
+                db.session.flush()
+                existing.update({ticket_id: check_in.to_json() for ticket_id, check_in in winners.items()})
+                db.session.commit()
+                break
+            except IntegrityError:
+                db.session.rollback()
+                if attempt == 2:
+                    raise
+
+        for result in results:
+            if result['result'] != 'invalid':
+                result['check_in'] = existing[result['ticket_id']]
+        return results
+
+    def _keys(self):
+        if self._keypair is None:
+            from xrpl.core import keypairs
+            from xrpl.constants import CryptoAlgorithm
+
+            with self._key_lock:
+                if self._keypair is None:
+                    if not self.signing_seed:
+                        raise CredentialError("Check-in signing key is not configured (set CHECKIN_SIGNING_SEED or SECRET_KEY)")
+                    seed = self.signing_seed
+                    if seed.startswith('secret-key:'):
+                        seed = keypairs.generate_seed(seed.split(':', 1)[1], CryptoAlgorithm.ED25519)
+                    keypair = keypairs.derive_keypair(seed)
+                    if not keypair[0].startswith('ED'):
+                        raise CredentialError("CHECKIN_SIGNING_SEED must be an Ed25519 (sEd...) seed")
+                    self._keypair = keypair
+        return self._keypair
+
+
+def _parse_timestamp(value):
+    if not value:
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.utcfromtimestamp(value)
+    # Naive UTC, like every other DateTime column
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = (parsed - parsed.utcoffset()).replace(tzinfo=None)
+    return parsed
+
+
+checkin_service = CheckInService()
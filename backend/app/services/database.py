@@ -0,0 +1,86 @@
+from sqlalchemy import event, inspect, text
+from app import db
+
+
+def init_app(app):
+    """
+    Apply the SQLite pragmas from the config to every new connection
+    """
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return
+
+    journal_mode = app.config['SQLITE_JOURNAL_MODE']
+    synchronous = app.config['SQLITE_SYNCHRONOUS']
+    busy_timeout = int(app.config['SQLITE_BUSY_TIMEOUT'])
+
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            # In-memory databases can't use WAL; SQLite quietly keeps its own mode
+            cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+            cursor.execute(f"PRAGMA synchronous={synchronous}")
+            cursor.execute(f"PRAGMA busy_timeout={busy_timeout}")
+        finally:
+            cursor.close()
+
+    with app.app_context():
+        event.listen(db.engine, 'connect', set_sqlite_pragmas)
+
+
+def reset():
+    """
+    Drop and recreate every table, and rebuild the event search index
+    (which lives outside the models) so it doesn't outlive the old events
+    """
+    from app.services import search
+
+    search.drop_index()
+    db.drop_all()
+    db.create_all()
+    search.ensure_index(rebuild=True)
+    return [table.name for table in db.metadata.sorted_tables]
+
+
+def migrate():
+    """
+    Bring an existing database up to the models without dropping data:
+    create missing tables, add missing nullable (or constant-defaulted) columns and
+    create missing indexes. Safe to run repeatedly.
+
+    Returns a list of the changes made.
+    """
+    changes = []
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                table.create(connection)
+                changes.append(f"created table {table.name}")
+                continue
+
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                default = column.server_default.arg if column.server_default is not None else None
+                if not column.nullable and not isinstance(default, str):
+                    # SQLite can only add a NOT NULL column with a constant default
+                    changes.append(f"skipped {table.name}.{column.name}: NOT NULL without a constant server default")
+                    continue
+                column_sql = f"{column.name} {column.type.compile(dialect=connection.dialect)}"
+                if isinstance(default, str):
+                    column_sql += f" DEFAULT '{default}'"
+                if not column.nullable:
+                    column_sql += " NOT NULL"
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_sql}"))
+                changes.append(f"added column {table.name}.{column.name}")
+
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(connection)
+                    changes.append(f"created index {index.name}")
+
+    return changes
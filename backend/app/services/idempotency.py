@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+from flask import current_app, request
+from app import db
+from app.models import Ticket
+from app.utils.pagination import bind_timestamp
+
+# Room for the ":<index>" suffix of a bulk order's tickets in Ticket.idempotency_key
+MAX_KEY_LENGTH = 64
+
+
+class IdempotencyError(Exception):
+    """
+    An Idempotency-Key that is malformed or was used for a different purchase
+    """
+    pass
+
+
+def request_key():
+    """
+    The request's Idempotency-Key header, or None if it didn't send one
+    """
+    key = request.headers.get('Idempotency-Key')
+    if key is None:
+        return None
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+        raise IdempotencyError(f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} printable characters")
+    # ':' separates a bulk order's ticket index, so "k:0" would collide with bulk key "k"
+    if ':' in key:
+        raise IdempotencyError("Idempotency-Key must not contain ':'")
+    return key
+
+
+def ticket_keys(key, quantity=None):
+    """
+    The keys stored on a purchase's tickets: the key itself for a single
+    ticket, key:0, key:1, ... for a bulk order
+    """
+    if quantity is None:
+        return [key]
+    return [f"{key}:{index}" for index in range(quantity)]
+
+
+def find_purchase(user_id, key, event_id, quantity=None):
+    """
+    Tickets an earlier request with this key created, in order, or None if
+    there was none (or its key has expired). Raises IdempotencyError if the
+    key was used for another event, quantity or endpoint.
+    """
+    keys = ticket_keys(key, quantity)
+    # Every key this one could have been stored as, so reuse for a different order is caught
+    candidates = ticket_keys(key) + ticket_keys(key, current_app.config['BULK_PURCHASE_MAX'])
+    tickets = Ticket.query.filter(Ticket.user_id == user_id, Ticket.idempotency_key.in_(candidates)).all()
+    if not tickets:
+        return None
+
+    by_key = {ticket.idempotency_key: ticket for ticket in tickets}
+    if set(by_key) != set(keys) or any(ticket.event_id != event_id for ticket in tickets):
+        raise IdempotencyError("Idempotency-Key was already used for a different purchase")
+    return [by_key[key] for key in keys]
+
+
+def clear_expired_keys(limit=1000):
+    """
+    Forget keys older than IDEMPOTENCY_KEY_TTL, so a retry after that buys
+    again and the unique index stays small. A bulk order's keys are cleared
+    together, never some of them, so a late retry can't see part of the
+    order. Returns how many tickets were cleared.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['IDEMPOTENCY_KEY_TTL'])
+    query = Ticket.query.filter(Ticket.idempotency_key.isnot(None))
+    expired = query.filter(Ticket.created_at < bind_timestamp(query, cutoff)).with_entities(
+        Ticket.user_id, Ticket.idempotency_key
+    ).limit(limit).all()
+
+    # The purchase's key is the part before a bulk order's ":<index>"
+    purchases = {(user_id, ticket_key.split(':')[0]) for user_id, ticket_key in expired}
+    cleared = 0
+    for user_id, key in purchases:
+        candidates = ticket_keys(key) + ticket_keys(key, current_app.config['BULK_PURCHASE_MAX'])
+        cleared += Ticket.query.filter(Ticket.user_id == user_id, Ticket.idempotency_key.in_(candidates)).update(
+            {'idempotency_key': None}, synchronize_session=False
+        )
+    db.session.commit()
+    return cleared
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from app import db
+from app.models import Event, MintJob, Reservation
+from app.services.catalogue import event_catalogue
+from app.services.activity import activity_feed
+
+
+def reserve_seats(event_id, tickets):
+    """
+    Take one seat per ticket from Event.tickets with a single conditional
+    decrement and add an expiring hold for each ticket to the session.
+
+    Returns the holds, or None if the event doesn't have enough seats left.
+    The caller commits the holds together with the tickets.
+    """
+    quantity = len(tickets)
+    reserved = Event.query.filter(Event.id == event_id, Event.tickets >= quantity).update(
+        {'tickets': Event.tickets - quantity}, synchronize_session=False
+    )
+    if not reserved:
+        return None
+    event_catalogue.mark_dirty(db.session, event_id)
+
+    expires_at = datetime.utcnow() + timedelta(seconds=current_app.config['RESERVATION_TTL'])
+    holds = [Reservation(event_id=event_id, ticket=ticket, status='held', expires_at=expires_at) for ticket in tickets]
+    db.session.add_all(holds)
+    return holds
+
+
+def commit_hold(ticket_id):
+    """
+    Turn a ticket's hold into a sale once its NFT is minted
+    """
+    return Reservation.query.filter_by(ticket_id=ticket_id, status='held').update(
+        {'status': 'committed'}, synchronize_session=False
+    )
+
+
+def release_hold(ticket_id):
+    """
+    Give a ticket's seat back to the event. Safe to call more than once:
+    only the call that moves the hold out of 'held' returns the seat.
+    """
+    hold = Reservation.query.filter_by(ticket_id=ticket_id).first()
+    if not hold:
+        return False
+
+    released = Reservation.query.filter_by(id=hold.id, status='held').update(
+        {'status': 'released'}, synchronize_session=False
+    )
+    if released:
+        Event.query.filter_by(id=hold.event_id).update(
+            {'tickets': Event.tickets + 1}, synchronize_session=False
+        )
+        event_catalogue.mark_dirty(db.session, hold.event_id)
+    return bool(released)
+
+
+def release_expired_holds(limit=500):
+    """
+    Release holds past their TTL whose mint never started. Holds being
+    minted are left alone; the mint worker commits or releases them.
+    """
+    expired = Reservation.query.filter(
+        Reservation.status == 'held',
+        Reservation.expires_at < datetime.utcnow()
+    ).order_by(Reservation.expires_at).limit(limit).all()
+
+    released = 0
+    for hold in expired:
+        # Cancel the queued job first so a worker can't claim it mid-release
+        cancelled = MintJob.query.filter_by(ticket_id=hold.ticket_id, status='queued').update(
+            {'status': 'failed', 'last_error': 'Reservation expired'}, synchronize_session=False
+        )
+        has_job = MintJob.query.filter_by(ticket_id=hold.ticket_id).count()
+        if not cancelled and has_job:
+            continue
+
+        if release_hold(hold.ticket_id):
+            # Its mint job was cancelled above, so no worker can be updating the ticket
+            if hold.ticket.status == 'pending':
+                hold.ticket.status = 'failed'
+                activity_feed.record(db.session, [hold.ticket])
+            released += 1
+
+    db.session.commit()
+    return released
+
+
+def get_inventory(event_id):
+    """
+    Remaining and held seats for an event, read without loading the Event row
+    """
+    remaining = db.session.query(Event.tickets).filter(Event.id == event_id).scalar()
+    if remaining is None:
+        return None
+
+    held = db.session.query(func.count(Reservation.id)).filter(
+        Reservation.event_id == event_id,
+        Reservation.status == 'held'
+    ).scalar()
+
+    return {
+        'event_id': event_id,
+        'available': remaining,
+        'held': held
+    }
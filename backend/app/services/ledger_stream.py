@@ -0,0 +1,159 @@
+from concurrent.futures import Future
+from xrpl.clients import WebsocketClient
+from xrpl.models.requests import Subscribe, StreamParameter, Tx
+import threading
+
+
+class TransactionExpired(Exception):
+    """
+    The transaction's LastLedgerSequence passed without it being validated
+    """
+    pass
+
+
+class LedgerStream:
+    """
+    One long-lived WebSocket subscription to the ledger and platform accounts.
+
+    Callers register a transaction hash with watch() before submitting it
+    and get a Future that resolves with the validated transaction (meta and
+    ledger index included) as soon as the stream reports it, or fails with
+    TransactionExpired once a validated ledger passes its LastLedgerSequence.
+    A single connection confirms every in-flight mint and offer, replacing a
+    polling loop of tx requests per transaction.
+    """
+
+    # Stream silence after which the connection is considered dead (ledgers close every ~4s)
+    IDLE_TIMEOUT = 15
+    MAX_BACKOFF = 30
+
+    def __init__(self, urls, accounts, rpc_client=None):
+        self.urls = urls
+        self.accounts = list(accounts)
+        self.rpc_client = rpc_client
+        self.connected = False
+        self.validated_ledger_index = None
+        self.listeners = []
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="xrpl-ledger-stream", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def add_listener(self, listener):
+        """
+        listener(message) is called for every message from the stream
+        """
+        self.listeners.append(listener)
+
+    def watch(self, tx_hash, last_ledger_sequence=None):
+        future = Future()
+        with self._lock:
+            self._pending[tx_hash] = (future, last_ledger_sequence)
+        return future
+
+    def forget(self, tx_hash):
+        with self._lock:
+            self._pending.pop(tx_hash, None)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self):
+        backoff = 1
+        attempt = 0
+        while not self._stopped.is_set():
+            url = self.urls[attempt % len(self.urls)]
+            attempt += 1
+            try:
+                with WebsocketClient(url, timeout=self.IDLE_TIMEOUT) as client:
+                    response = client.request(Subscribe(streams=[StreamParameter.LEDGER], accounts=self.accounts))
+                    if not response.is_successful():
+                        raise RuntimeError(f"subscribe failed: {response.result}")
+
+                    self.connected = True
+                    backoff = 1
+                    # Anything validated while we were disconnected never reaches the stream;
+                    # look it up before the new ledger index expires it
+                    self._catch_up()
+                    self._on_ledger(response.result.get('ledger_index'))
+
+                    for message in client:
+                        self._dispatch(message)
+                        if self._stopped.is_set():
+                            break
+            except Exception as e:
+                print(f"Ledger stream error ({url}): {str(e)}")
+            finally:
+                self.connected = False
+
+            self._stopped.wait(backoff)
+            backoff = min(backoff * 2, self.MAX_BACKOFF)
+
+    def _dispatch(self, message):
+        message_type = message.get('type')
+        if message_type == 'transaction' and message.get('validated'):
+            transaction = message.get('transaction') or message.get('tx_json') or {}
+            tx_hash = transaction.get('hash') or message.get('hash')
+            self._resolve(tx_hash, dict(
+                transaction,
+                hash=tx_hash,
+                meta=message.get('meta', {}),
+                ledger_index=message.get('ledger_index'),
+                validated=True
+            ))
+        elif message_type == 'ledgerClosed':
+            self._on_ledger(message.get('ledger_index'))
+
+        for listener in self.listeners:
+            try:
+                listener(message)
+            except Exception as e:
+                print(f"Ledger stream listener error: {str(e)}")
+
+    def _resolve(self, tx_hash, result):
+        with self._lock:
+            entry = self._pending.pop(tx_hash, None)
+        if entry and not entry[0].done():
+            entry[0].set_result(result)
+
+    def _on_ledger(self, ledger_index):
+        if ledger_index is None:
+            return
+        self.validated_ledger_index = ledger_index
+
+        # Fail transactions that can no longer make it into a validated ledger
+        with self._lock:
+            expired = [
+                (tx_hash, future) for tx_hash, (future, last_ledger) in self._pending.items()
+                if last_ledger is not None and last_ledger < ledger_index
+            ]
+            for tx_hash, _ in expired:
+                del self._pending[tx_hash]
+        for tx_hash, future in expired:
+            if not future.done():
+                future.set_exception(TransactionExpired(
+                    f"The latest validated ledger sequence {ledger_index} is greater than "
+                    f"LastLedgerSequence for {tx_hash}"
+                ))
+
+    def _catch_up(self):
+        if self.rpc_client is None:
+            return
+        with self._lock:
+            hashes = list(self._pending)
+        for tx_hash in hashes:
+            try:
+                response = self.rpc_client.request(Tx(transaction=tx_hash))
+                if response.is_successful() and response.result.get('validated'):
+                    self._resolve(tx_hash, response.result)
+            except Exception as e:
+                print(f"Ledger stream catch-up error: {str(e)}")
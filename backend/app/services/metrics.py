@@ -0,0 +1,262 @@
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from sqlalchemy import event as sqlalchemy_event
+import math
+import threading
+import time
+
+# Seconds; covers a cached catalogue read up to a slow ledger confirmation
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    A named family of samples, one per combination of label values.
+
+    A metric with a callback reads its values when scraped instead of being
+    updated in place; the callback returns a number, or a dict of label
+    value tuples to numbers.
+    """
+
+    type = 'untyped'
+
+    def __init__(self, name, help, labels=(), callback=None):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def samples(self):
+        if self.callback is None:
+            with self._lock:
+                return list(self._values.items())
+        values = self.callback()
+        if isinstance(values, dict):
+            return [(tuple(str(part) for part in key), value) for key, value in values.items()]
+        return [((), values)]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for key, value in sorted(self.samples()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['counts'][index] += 1
+                    break
+            entry['sum'] += value
+            entry['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            entries = sorted((key, dict(entry, counts=list(entry['counts']))) for key, entry in self._values.items())
+        for key, entry in entries:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry['counts']):
+                cumulative += count
+                labels = _format_labels(self.labels, key, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(entry['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {entry['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process metrics, exported in the Prometheus text format on /metrics.
+
+    Services create their metrics through counter(), gauge() and histogram()
+    when they are set up; asking for an existing name returns the same
+    metric (a new callback replaces the old one), so creating an app or a
+    service twice doesn't duplicate anything. init_app adds the per-request
+    instrumentation: request duration by endpoint and status, and the
+    number and duration of SQL queries each request made.
+
+    Values live in this process only; with several worker processes each
+    one is scraped separately.
+    """
+
+    def __init__(self, app=None):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.request_duration = self.histogram(
+            'http_request_duration_seconds', "Time spent handling HTTP requests", ['method', 'endpoint', 'status']
+        )
+        self.request_queries = self.histogram(
+            'http_request_db_queries', "SQL statements executed per HTTP request", ['endpoint'], buckets=QUERY_COUNT_BUCKETS
+        )
+        self.request_query_seconds = self.histogram(
+            'http_request_db_seconds', "Time per HTTP request spent executing SQL", ['endpoint']
+        )
+        self.query_duration = self.histogram(
+            'db_query_duration_seconds', "SQL statement execution time", ['operation']
+        )
+        self.requests_in_progress = self.gauge('http_requests_in_progress', "HTTP requests being handled")
+        self._in_progress = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from app import db
+
+        @app.before_request
+        def start_request_metrics():
+            g.metrics_started = time.perf_counter()
+            g.db_queries = 0
+            g.db_seconds = 0.0
+            self._track_in_progress(1)
+
+        @app.after_request
+        def record_request_metrics(response):
+            started = g.pop('metrics_started', None)
+            if started is None:
+                return response
+            self._track_in_progress(-1)
+            endpoint = request.endpoint or 'unmatched'
+            self.request_duration.observe(
+                time.perf_counter() - started, method=request.method, endpoint=endpoint, status=response.status_code
+            )
+            self.request_queries.observe(g.get('db_queries', 0), endpoint=endpoint)
+            self.request_query_seconds.observe(g.get('db_seconds', 0.0), endpoint=endpoint)
+            return response
+
+        @app.teardown_request
+        def finish_failed_request(error=None):
+            # after_request is skipped when a handler raises
+            if g.pop('metrics_started', None) is not None:
+                self._track_in_progress(-1)
+
+        with app.app_context():
+            if not sqlalchemy_event.contains(db.engine, 'before_cursor_execute', _before_cursor_execute):
+                sqlalchemy_event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+                sqlalchemy_event.listen(db.engine, 'after_cursor_execute', self._after_cursor_execute)
+                sqlalchemy_event.listen(db.engine, 'handle_error', _handle_error)
+
+    def counter(self, name, help, labels=(), callback=None):
+        return self._register(Counter, name, help, labels, callback=callback)
+
+    def gauge(self, name, help, labels=(), callback=None):
+        return self._register(Gauge, name, help, labels, callback=callback)
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help, labels, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """
+        Every metric in the Prometheus text exposition format
+        """
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # One failing callback shouldn't take the whole scrape down
+                print(f"Error collecting metric {metric.name}: {str(e)}")
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric_class, name, help, labels, callback=None, **options):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, help, labels, **options)
+            elif not isinstance(metric, metric_class) or metric.labels != tuple(labels):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            if callback is not None:
+                metric.callback = callback
+            return metric
+
+    def _track_in_progress(self, delta):
+        with self._lock:
+            self._in_progress += delta
+            self.requests_in_progress.set(self._in_progress)
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop('query_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        self.query_duration.observe(elapsed, operation=statement.lstrip().split(None, 1)[0].upper() if statement.strip() else '')
+        if has_request_context() and 'db_queries' in g:
+            g.db_queries += 1
+            g.db_seconds += elapsed
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # A connection runs one statement at a time, so one start time per connection
+    conn.info['query_started'] = time.perf_counter()
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute doesn't run for a statement that raised
+    if exception_context.connection is not None:
+        exception_context.connection.info.pop('query_started', None)
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,355 @@
+from datetime import datetime, timedelta
+from app.services.metrics import metrics
+import threading
+import time
+
+
+class MintQueue:
+    """
+    Durable NFT mint job queue backed by the MintJob table.
+
+    Purchases enqueue a job in the same transaction as their pending Ticket;
+    a pool of background worker threads claims jobs, mints and transfers the
+    NFT, and moves the ticket to confirmed or failed.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        # Set while this process holds at least one pool wallet lease
+        self._can_mint = threading.Event()
+        self._finished = threading.Condition()
+        self._workers = []
+        self._maintenance_tasks = []
+        self.batch_duration = metrics.histogram(
+            'mint_batch_duration_seconds', "Time to mint, transfer and record one claimed batch of jobs"
+        )
+        self.jobs_finished = metrics.counter('mint_jobs_finished_total', "Mint jobs finished", ['outcome'])
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        metrics.gauge('mint_jobs', "Mint jobs by status; status=queued is the queue depth", ['status'], callback=self._job_counts)
+        metrics.gauge('mint_workers', "Mint worker threads running in this process", callback=lambda: len(self._workers))
+
+        # Start the workers with the first request so CLI commands never spawn threads
+        @app.before_request
+        def ensure_mint_workers():
+            self.start()
+
+    def start(self):
+        """
+        Start the worker pool (idempotent)
+        """
+        if self._started:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            from app.services.inventory import release_expired_holds
+            from app.services.idempotency import clear_expired_keys
+            for index in range(self.app.config['MINT_WORKERS']):
+                worker = threading.Thread(target=self._run_worker, name=f"mint-worker-{index}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+            # Seats held by purchases whose mint never started go back on sale
+            self.add_maintenance_task(release_expired_holds, self.app.config['RESERVATION_SWEEP_INTERVAL'])
+            # Purchase Idempotency-Keys are only kept for IDEMPOTENCY_KEY_TTL
+            self.add_maintenance_task(clear_expired_keys, self.app.config['IDEMPOTENCY_SWEEP_INTERVAL'])
+            threading.Thread(target=self._run_maintenance, name="mint-maintenance", daemon=True).start()
+            self._started = True
+
+    @property
+    def xrpl_service(self):
+        """
+        This process's XRPLService, built the first time anything needs it
+        """
+        from app.services.xrp import get_xrpl_service
+        return get_xrpl_service()
+
+    def add_maintenance_task(self, task, interval):
+        """
+        Run task every interval seconds (inside an app context) while the workers are up
+        """
+        self._maintenance_tasks.append({'task': task, 'interval': interval, 'next_run': 0})
+
+    def enqueue(self, ticket):
+        """
+        Add a mint job for a pending ticket to the current session.
+        The caller commits, then calls notify() to wake a worker.
+        """
+        return self.enqueue_many([ticket])[0]
+
+    def enqueue_many(self, tickets):
+        """
+        Add mint jobs for several pending tickets; a worker claims them
+        together and mints them as one pipelined batch
+        """
+        from app import db
+        from app.models import MintJob
+
+        jobs = [MintJob(ticket=ticket, status='queued') for ticket in tickets]
+        db.session.add_all(jobs)
+        return jobs
+
+    def notify(self):
+        self._wakeup.set()
+
+    def wait_for_update(self, timeout):
+        """
+        Block until any job finishes in this process or the timeout elapses
+        """
+        with self._finished:
+            self._finished.wait(timeout)
+
+    def _run_worker(self):
+        poll_interval = self.app.config['MINT_POLL_INTERVAL']
+        while True:
+            # Another process holds every pool wallet: leave the jobs to it
+            if not self._can_mint.wait(poll_interval):
+                continue
+            try:
+                with self.app.app_context():
+                    job_ids = self._claim_jobs(self.app.config['MINT_BATCH_SIZE'])
+                    if job_ids:
+                        self._process_jobs(job_ids)
+                        continue
+            except Exception as e:
+                print(f"Mint worker error: {str(e)}")
+
+            # Nothing to do: sleep until an enqueue in this process or the next poll,
+            # which also picks up jobs enqueued by other processes
+            self._wakeup.wait(poll_interval)
+            self._wakeup.clear()
+
+    def _run_maintenance(self):
+        from app.services import nft_index, reconcile
+
+        # The XRPL service is built here rather than in start() so the request
+        # that starts the workers doesn't wait for xrpl-py to load
+        service = self.xrpl_service
+        service.start()
+        # Only the process holding a pool wallet's lease mints with it; added
+        # first so the lease is taken before anything below submits
+        self.add_maintenance_task(lambda: self._renew_leases(service), self.app.config['WALLET_LEASE_RENEW_INTERVAL'])
+        # Wallet reserves decide which pool wallets can take new mints
+        self.add_maintenance_task(service.refresh_reserves, self.app.config['XRPL_RESERVE_REFRESH_INTERVAL'])
+        # Cached fee and ledger index used to prepare transactions without autofill
+        self.add_maintenance_task(service.tx_preparer.refresh, service.tx_preparer.refresh_interval)
+        # Pick up ownership changes (offers accepted, burns) from the ledger
+        self.add_maintenance_task(lambda: nft_index.sync(service), self.app.config['NFT_INDEX_SYNC_INTERVAL'])
+        # Settle timed-out and orphaned mints from what actually landed on the ledger
+        self.add_maintenance_task(
+            lambda: reconcile.run(service) if service.has_leased_minter() else None, self.app.config['RECONCILE_INTERVAL']
+        )
+
+        while True:
+            now = time.monotonic()
+            for entry in self._maintenance_tasks:
+                if now < entry['next_run']:
+                    continue
+                entry['next_run'] = now + entry['interval']
+                try:
+                    with self.app.app_context():
+                        entry['task']()
+                except Exception as e:
+                    print(f"Mint maintenance error: {str(e)}")
+            time.sleep(1)
+
+    def _renew_leases(self, service):
+        from app.services import wallet_leases
+
+        if wallet_leases.renew(service):
+            self._can_mint.set()
+        else:
+            self._can_mint.clear()
+
+    def _claim_jobs(self, limit):
+        """
+        Atomically move up to limit of the oldest queued jobs to running and
+        return their ids. A bulk order's jobs are adjacent, so they are
+        usually claimed by the same worker.
+        """
+        from app import db
+        from app.models import MintJob
+
+        self._release_stale_jobs()
+
+        while True:
+            candidate_ids = [
+                job_id for (job_id,) in
+                MintJob.query.filter_by(status='queued').order_by(MintJob.id).with_entities(MintJob.id).limit(limit)
+            ]
+            if not candidate_ids:
+                return []
+
+            # Conditional updates so two workers can never claim the same job
+            locked_at = datetime.utcnow()
+            claimed_ids = [
+                job_id for job_id in candidate_ids
+                if MintJob.query.filter_by(id=job_id, status='queued').update({
+                    'status': 'running',
+                    'locked_at': locked_at,
+                    'attempts': MintJob.attempts + 1
+                }, synchronize_session=False)
+            ]
+            db.session.commit()
+
+            if claimed_ids:
+                return claimed_ids
+
+    def _release_stale_jobs(self):
+        """
+        Hand jobs whose worker died mid-mint to reconciliation. The mint may
+        have landed on ledger, so retrying blindly could mint the ticket twice.
+        """
+        from app import db
+        from app.models import MintJob
+
+        cutoff = datetime.utcnow() - timedelta(seconds=self.app.config['MINT_JOB_TIMEOUT'])
+        released = MintJob.query.filter(MintJob.status == 'running', MintJob.locked_at < cutoff).update({
+            'status': 'stale',
+            'last_error': 'Mint job timed out'
+        }, synchronize_session=False)
+        if released:
+            db.session.commit()
+
+    def _process_jobs(self, job_ids):
+        """
+        Mint every claimed job's ticket in one pipelined batch and record
+        each result separately, so one failed mint doesn't fail the others
+        """
+        from app import db
+        from app.models import MintJob, Ticket
+        from app.services import nft_metadata
+        from sqlalchemy.orm import joinedload
+
+        jobs = MintJob.query.filter(MintJob.id.in_(job_ids)).options(
+            joinedload(MintJob.ticket).joinedload(Ticket.event),
+            joinedload(MintJob.ticket).joinedload(Ticket.user)
+        ).order_by(MintJob.id).all()
+
+        started = time.perf_counter()
+        engine = db.engine
+        nft_results = self.xrpl_service.mint_ticket_nfts([
+            {
+                'ticket_id': job.ticket.id,
+                'user_wallet_address': job.ticket.user.wallet_address,
+                'uri': nft_metadata.ticket_uri(nft_metadata.prepare(job.ticket.event), job.ticket.id),
+                'event_id': job.ticket.event.id,
+                'on_prepared': lambda tx_hash, last_ledger_sequence, job_id=job.id: self._record_submission(
+                    engine, job_id, tx_hash, last_ledger_sequence
+                )
+            }
+            for job in jobs
+        ])
+
+        for job, nft_result in zip(jobs, nft_results):
+            self._record_result(job, nft_result)
+        db.session.commit()
+        self.batch_duration.observe(time.perf_counter() - started)
+
+        with self._finished:
+            self._finished.notify_all()
+
+    @staticmethod
+    def _record_submission(engine, job_id, tx_hash, last_ledger_sequence):
+        """
+        Note a mint transaction on its job before it is submitted, so
+        reconciliation knows how long it may still land. Runs on a batch
+        thread, hence its own connection. A job that is no longer running
+        (reconciliation took it over) must not mint, so that aborts the
+        submission.
+        """
+        from app.models import MintJob
+
+        table = MintJob.__table__
+        with engine.begin() as connection:
+            recorded = connection.execute(
+                table.update().where(table.c.id == job_id, table.c.status == 'running').values(
+                    transaction_hash=tx_hash, last_ledger_sequence=last_ledger_sequence
+                )
+            ).rowcount
+        if not recorded:
+            raise RuntimeError(f"Mint job {job_id} is no longer running")
+
+    def _record_result(self, job, nft_result):
+        from app import db
+        from app.models import MintJob
+        from app.services.activity import activity_feed
+        from app.services.inventory import commit_hold, release_hold
+        from app.services.nft_index import record_mint, record_offer
+
+        if nft_result['success']:
+            status, error = 'done', None
+        elif nft_result.get('not_submitted'):
+            # The wallet lease moved to another process before this job was sent
+            MintJob.query.filter_by(id=job.id, status='running').update(
+                {'status': 'queued', 'locked_at': None, 'attempts': MintJob.attempts - 1}, synchronize_session=False
+            )
+            self.jobs_finished.inc(outcome='requeued')
+            return
+        elif nft_result.get('nft_id') or nft_result.get('outcome_unknown'):
+            # Minted without an offer, or may still mint: the seat stays held for reconciliation
+            status, error = 'stale', str(nft_result.get('error'))[:255]
+        else:
+            status, error = 'failed', str(nft_result.get('error', 'Unknown error'))[:255]
+
+        # Only while the job is still ours: once it went stale, reconciliation owns
+        # the ticket and seat, and a late result here would overwrite its decision
+        claimed = MintJob.query.filter_by(id=job.id, status='running').update(
+            {'status': status, 'last_error': error, 'locked_at': None}, synchronize_session=False
+        )
+        if not claimed:
+            self.jobs_finished.inc(outcome='discarded')
+            return
+
+        ticket = job.ticket
+        activity_feed.record(db.session, [ticket])
+        user = ticket.user
+
+        if nft_result['success']:
+            # Update ticket with NFT details
+            ticket.nft_id = nft_result['nft_id']
+            ticket.transaction_hash = nft_result['transaction_hash']
+            ticket.status = 'confirmed'
+
+            # The seat was taken at purchase time; the hold becomes a sale
+            commit_hold(ticket.id)
+
+            # Keep the local ownership index current without waiting for a ledger sync
+            if nft_result.get('nft_id') and nft_result.get('issuer'):
+                record_mint(nft_result['nft_id'], nft_result['issuer'], ticket.id, nft_result.get('ledger_index'))
+                if nft_result.get('offer_id'):
+                    record_offer(nft_result['nft_id'], nft_result['offer_id'], user.wallet_address)
+        elif nft_result.get('nft_id'):
+            # Minted, but the transfer offer didn't go through: the ticket stays
+            # pending and reconciliation offers the existing NFT instead of minting again
+            ticket.nft_id = nft_result['nft_id']
+            ticket.transaction_hash = nft_result.get('transaction_hash')
+            if nft_result.get('issuer'):
+                record_mint(nft_result['nft_id'], nft_result['issuer'], ticket.id, nft_result.get('ledger_index'))
+        elif status == 'failed':
+            ticket.status = 'failed'
+            release_hold(ticket.id)
+
+        self.jobs_finished.inc(outcome=status)
+
+    def _job_counts(self):
+        from app import db
+        from app.models import MintJob
+        from sqlalchemy import func
+
+        counts = {(status,): 0 for status in ('queued', 'running', 'stale', 'done', 'failed')}
+        counts.update({
+            (status,): count
+            for status, count in db.session.query(MintJob.status, func.count(MintJob.id)).group_by(MintJob.status)
+        })
+        return counts
+
+
+mint_queue = MintQueue()
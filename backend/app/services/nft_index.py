@@ -0,0 +1,209 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, or_
+from app import db
+from app.models import NFTOwnership, LedgerSyncState
+
+# tfSellNFToken on an NFTokenOffer
+SELL_OFFER_FLAG = 1
+
+
+def record_mint(nft_id, issuer, ticket_id=None, ledger_index=None):
+    """
+    Index a freshly minted NFT; the minting wallet owns it until an offer is accepted
+    """
+    entry = db.session.get(NFTOwnership, nft_id)
+    if entry is None:
+        entry = NFTOwnership(nft_id=nft_id, issuer=issuer, owner=issuer)
+        db.session.add(entry)
+    if ticket_id is not None:
+        entry.ticket_id = ticket_id
+    if ledger_index is not None and (entry.ledger_index or 0) <= ledger_index:
+        entry.ledger_index = ledger_index
+    return entry
+
+
+def record_offer(nft_id, offer_id, destination, ledger_index=None):
+    entry = db.session.get(NFTOwnership, nft_id)
+    if entry is None:
+        return None
+    entry.offer_id = offer_id
+    entry.offer_destination = destination
+    if ledger_index is not None and (entry.ledger_index or 0) <= ledger_index:
+        entry.ledger_index = ledger_index
+    return entry
+
+
+def record_transfer(nft_id, new_owner, ledger_index=None):
+    entry = db.session.get(NFTOwnership, nft_id)
+    if entry is None:
+        return None
+    # Ignore changes older than what the index already reflects
+    if ledger_index is not None and (entry.ledger_index or 0) > ledger_index:
+        return entry
+    entry.owner = new_owner
+    entry.offer_id = None
+    entry.offer_destination = None
+    entry.ledger_index = ledger_index
+    return entry
+
+
+def record_burn(nft_id, ledger_index=None):
+    entry = db.session.get(NFTOwnership, nft_id)
+    if entry is not None:
+        entry.burned = True
+        entry.offer_id = None
+        entry.ledger_index = ledger_index
+    return entry
+
+
+def lookup_owner(nft_id):
+    """
+    Current owner from the index, or None if the NFT isn't indexed (or was burned)
+    """
+    row = db.session.query(NFTOwnership.owner, NFTOwnership.burned).filter(NFTOwnership.nft_id == nft_id).first()
+    if row is None or row.burned:
+        return None
+    return row.owner
+
+
+def sync_account(xrpl_service, account, start_ledger=None):
+    """
+    Replay validated transactions touching one account since the last
+    ledger we processed (from start_ledger, or its whole history, the first
+    time). Returns the number of transactions applied.
+    """
+    from xrpl.models.requests import AccountTx
+
+    state = db.session.get(LedgerSyncState, account)
+    if state is None:
+        state = LedgerSyncState(account=account, last_ledger_index=start_ledger - 1 if start_ledger else 0)
+        db.session.add(state)
+
+    ledger_min = state.last_ledger_index + 1 if state.last_ledger_index else -1
+    last_seen = state.last_ledger_index
+    applied = 0
+    marker = None
+
+    while True:
+        response = xrpl_service.client.request(AccountTx(
+            account=account,
+            ledger_index_min=ledger_min,
+            ledger_index_max=-1,
+            forward=True,
+            marker=marker
+        ))
+        if not response.is_successful():
+            raise RuntimeError(f"account_tx failed for {account}: {response.result.get('error')}")
+
+        for entry in response.result.get('transactions', []):
+            if not entry.get('validated', True):
+                continue
+            tx = entry.get('tx', {})
+            if apply_transaction(xrpl_service, tx, entry.get('meta', {})):
+                applied += 1
+            last_seen = max(last_seen, tx.get('ledger_index') or 0)
+
+        # Everything up to the validated ledger the server answered from is covered
+        last_seen = max(last_seen, response.result.get('ledger_index_max') or 0)
+        marker = response.result.get('marker')
+        if not marker:
+            break
+
+    state.last_ledger_index = last_seen
+    db.session.commit()
+    return applied
+
+
+def sync(xrpl_service):
+    """
+    Incrementally sync the index for every platform wallet, then for the
+    outside wallets holding our NFTs that were synced longest ago: once an
+    NFT leaves the platform, only its holder's history shows it move on
+    """
+    results = {minter.address: sync_account(xrpl_service, minter.address) for minter in xrpl_service.minters}
+    for holder, start_ledger in stale_holders(xrpl_service, current_app.config['NFT_INDEX_HOLDER_SYNC_LIMIT']):
+        try:
+            results[holder] = sync_account(xrpl_service, holder, start_ledger)
+        except Exception as e:
+            db.session.rollback()
+            print(f"NFT index sync error for holder {holder}: {str(e)}")
+    return results
+
+
+def stale_holders(xrpl_service, limit):
+    """
+    (wallet, first ledger to read) for outside wallets holding indexed NFTs
+    that were never synced or not within NFT_INDEX_HOLDER_TTL, oldest first
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['NFT_INDEX_HOLDER_TTL'])
+    last_synced = func.min(LedgerSyncState.updated_at)
+    return db.session.query(NFTOwnership.owner, func.min(NFTOwnership.ledger_index)).outerjoin(
+        LedgerSyncState, LedgerSyncState.account == NFTOwnership.owner
+    ).filter(
+        NFTOwnership.burned.is_(False),
+        NFTOwnership.owner.notin_(list(xrpl_service.minters_by_address)),
+        or_(LedgerSyncState.account.is_(None), LedgerSyncState.updated_at < cutoff)
+    ).group_by(NFTOwnership.owner).order_by(last_synced.nulls_first()).limit(limit).all()
+
+
+def apply_transaction(xrpl_service, tx, meta):
+    """
+    Update the index from one validated transaction. Returns True if it changed anything.
+    """
+    if meta.get('TransactionResult') != 'tesSUCCESS':
+        return False
+
+    ledger_index = tx.get('ledger_index')
+    transaction_type = tx.get('TransactionType')
+
+    if transaction_type == 'NFTokenMint':
+        nft_id = meta.get('nftoken_id') or xrpl_service.extract_nft_id(meta)
+        if nft_id and xrpl_service.is_platform_nft(nft_id):
+            record_mint(nft_id, tx.get('Issuer', tx['Account']), ledger_index=ledger_index)
+            return True
+
+    elif transaction_type == 'NFTokenCreateOffer':
+        for node in meta.get('AffectedNodes', []):
+            created = node.get('CreatedNode', {})
+            if created.get('LedgerEntryType') == 'NFTokenOffer':
+                fields = created.get('NewFields', {})
+                if fields.get('Flags', 0) & SELL_OFFER_FLAG:
+                    return record_offer(fields.get('NFTokenID'), created.get('LedgerIndex'), fields.get('Destination'), ledger_index) is not None
+
+    elif transaction_type == 'NFTokenAcceptOffer':
+        changed = False
+        for node in meta.get('AffectedNodes', []):
+            deleted = node.get('DeletedNode', {})
+            if deleted.get('LedgerEntryType') != 'NFTokenOffer':
+                continue
+            fields = deleted.get('FinalFields', {})
+            # Accepting a sell offer moves the NFT to the acceptor, a buy offer to its owner
+            new_owner = tx['Account'] if fields.get('Flags', 0) & SELL_OFFER_FLAG else fields.get('Owner')
+            if record_transfer(fields.get('NFTokenID'), new_owner, ledger_index) is not None:
+                changed = True
+        return changed
+
+    elif transaction_type == 'NFTokenBurn':
+        return record_burn(tx.get('NFTokenID'), ledger_index) is not None
+
+    return False
+
+
+def verify_ownership(xrpl_service, nft_id, wallet_address, verify_on_ledger=False):
+    """
+    Answer from the local index; ask the ledger when explicitly requested,
+    when the NFT isn't indexed, or when it is held outside the platform by
+    a wallet that hasn't been synced within NFT_INDEX_HOLDER_TTL
+    """
+    if not verify_on_ledger:
+        row = db.session.query(NFTOwnership.owner, NFTOwnership.burned, LedgerSyncState.updated_at).outerjoin(
+            LedgerSyncState, LedgerSyncState.account == NFTOwnership.owner
+        ).filter(NFTOwnership.nft_id == nft_id).first()
+        cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['NFT_INDEX_HOLDER_TTL'])
+        if row is not None and not row.burned and (
+            row.owner in xrpl_service.minters_by_address or (row.updated_at is not None and row.updated_at >= cutoff)
+        ):
+            return row.owner == wallet_address and xrpl_service.is_platform_nft(nft_id)
+
+    return xrpl_service.verify_nft_ownership_on_ledger(nft_id, wallet_address)
@@ -0,0 +1,127 @@
+from app import db
+from app.models import NFTMetadata, Ticket
+from app.services.cache import MemoryCache
+import base64
+import hashlib
+import json
+import re
+
+# XRPL caps NFTokenMint URI at 256 bytes
+MAX_URI_BYTES = 256
+
+# <ref>/<ticket id> at the end of a compact URI, whatever base it was minted with
+COMPACT_URI = re.compile(r'([a-z2-7]{16})/(\d+)$')
+
+uri_base = 'rg:'
+_prefixes = MemoryCache(max_entries=4096, default_ttl=0)
+_templates = MemoryCache(max_entries=4096, default_ttl=0)
+
+
+def init_app(app):
+    global uri_base
+    uri_base = app.config['NFT_METADATA_URI_BASE']
+    _prefixes.clear()
+    _templates.clear()
+
+
+def event_template(event):
+    """
+    The metadata every ticket NFT of an event shares
+    """
+    return {
+        "event": event.title,
+        "date": event.date.strftime('%Y-%m-%d'),
+        "location": event.location,
+        "event_id": event.id,
+        "type": "Event Ticket",
+        "platform": "RippleGate"
+    }
+
+
+def template_ref(template):
+    """
+    Short content address of a template: 80 bits of SHA-256, base32
+    """
+    canonical = json.dumps(template, sort_keys=True, separators=(',', ':'))
+    return base64.b32encode(hashlib.sha256(canonical.encode()).digest()[:10]).decode().lower()
+
+
+def prepare(event):
+    """
+    Store the event's metadata template (once per content) and return the
+    hex URI prefix its tickets are minted with. Cached per event, so a mint
+    only appends the ticket id to it.
+    """
+    prefix = _prefixes.get(event.id)
+    if prefix is not None:
+        return prefix
+
+    template = event_template(event)
+    ref = template_ref(template)
+    row = {'ref': ref, 'event_id': event.id, 'template': json.dumps(template, sort_keys=True, separators=(',', ':'))}
+    # Own transaction: the template has to outlive whatever the caller rolls back
+    with db.engine.begin() as connection:
+        if connection.dialect.name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+            connection.execute(insert(NFTMetadata.__table__).values(row).on_conflict_do_nothing())
+        elif connection.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+            connection.execute(insert(NFTMetadata.__table__).values(row).on_conflict_do_nothing())
+        elif connection.execute(NFTMetadata.__table__.select().where(NFTMetadata.ref == ref)).first() is None:
+            connection.execute(NFTMetadata.__table__.insert().values(row))
+
+    prefix = f"{uri_base}{ref}/".encode().hex().upper()
+    _prefixes.set(event.id, prefix)
+    _templates.set(ref, template)
+    return prefix
+
+
+def ticket_uri(prefix, ticket_id):
+    """
+    Hex NFTokenMint URI for a ticket: <base><ref>/<ticket id>
+    """
+    uri = prefix + str(ticket_id).encode().hex().upper()
+    if len(uri) > MAX_URI_BYTES * 2:
+        raise ValueError(f"NFT URI is over {MAX_URI_BYTES} bytes; shorten NFT_METADATA_URI_BASE")
+    return uri
+
+
+def parse_uri(uri):
+    """
+    (ref, ticket id) from a minted NFT's hex URI. NFTs minted before compact
+    URIs carry the full metadata as JSON and give (None, ticket id).
+    Returns None for URIs we didn't mint.
+    """
+    if not uri:
+        return None
+    try:
+        text = bytes.fromhex(uri).decode('utf-8')
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+    match = COMPACT_URI.search(text)
+    if match:
+        return match.group(1), int(match.group(2))
+    try:
+        return None, int(json.loads(text)['ticket_id'])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def resolve(ref, ticket_id):
+    """
+    Full metadata for a ticket NFT, or None if the ref or ticket is unknown
+    or the ticket isn't for the template's event
+    """
+    template = _templates.get(ref)
+    if template is None:
+        row = db.session.get(NFTMetadata, ref)
+        if row is None:
+            return None
+        template = json.loads(row.template)
+        _templates.set(ref, template)
+
+    event_id = Ticket.query.filter_by(id=ticket_id).with_entities(Ticket.event_id).scalar()
+    if event_id != template['event_id']:
+        return None
+    return {**template, "ticket_id": str(ticket_id)}
@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from app.services.metrics import metrics
+import threading
+
+
+class PoolSaturated(Exception):
+    """
+    Raised when the hashing pool's queue is full; routes answer 503
+    """
+    pass
+
+
+class PasswordHashTimeout(PoolSaturated):
+    """
+    Raised when a hash didn't finish within PASSWORD_HASH_TIMEOUT; it keeps
+    its pool slot until bcrypt returns, and routes answer 503 as well
+    """
+    pass
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated, size-limited thread pool.
+
+    bcrypt releases the GIL while hashing, so a few workers keep login
+    bursts from pinning every request thread. Work beyond the pool size plus
+    PASSWORD_HASH_QUEUE_DEPTH is rejected immediately instead of queueing
+    without bound.
+    """
+
+    def __init__(self, app=None):
+        self.bcrypt = None
+        self.rounds = None
+        self.timeout = None
+        self._executor = None
+        self._slots = None
+        self._stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.duration = metrics.histogram('password_hash_duration_seconds', "bcrypt time per operation", ['operation'])
+        self.rejected = metrics.counter('password_hash_rejected_total', "Hashes refused because the pool was saturated")
+        metrics.gauge('password_hash_in_flight', "Hashes running or waiting in the pool", callback=lambda: self.in_flight)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from app import bcrypt
+
+        self.bcrypt = bcrypt
+        self.rounds = app.config['BCRYPT_LOG_ROUNDS']
+        self.timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        workers = app.config['PASSWORD_HASH_WORKERS']
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + app.config['PASSWORD_HASH_QUEUE_DEPTH'])
+
+    def hash(self, password):
+        return self._run('hash', lambda: self.bcrypt.generate_password_hash(password, self.rounds).decode('utf-8'))
+
+    def check(self, stored_hash, password):
+        return self._run('check', lambda: self.bcrypt.check_password_hash(stored_hash, password))
+
+    def needs_rehash(self, stored_hash):
+        """
+        True when a hash was made with a different work factor than configured
+        """
+        try:
+            # $2b$<cost>$<salt+hash>
+            return int(stored_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def _run(self, operation, work):
+        if not self._slots.acquire(blocking=False):
+            self.rejected.inc()
+            raise PoolSaturated("Password hashing pool is saturated")
+
+        with self._stats_lock:
+            self.in_flight += 1
+        try:
+            future = self._executor.submit(self._timed, operation, work)
+        except Exception:
+            self._release()
+            raise
+        # The slot is held until bcrypt actually finishes, even if this caller gave up
+        future.add_done_callback(lambda _: self._release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise PasswordHashTimeout(f"Password {operation} took longer than {self.timeout}s")
+
+    def _release(self):
+        with self._stats_lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def _timed(self, operation, work):
+        with self.duration.time(operation=operation):
+            return work()
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,234 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models import MintJob, Ticket
+from app.services.activity import activity_feed
+from app.services.inventory import commit_hold, release_hold
+from app.services.metrics import metrics
+from app.services import nft_index, nft_metadata
+import time
+
+OUTCOMES = ('confirmed', 'offered', 'requeued', 'failed', 'retry', 'waiting')
+
+RECONCILED = metrics.counter('reconcile_jobs_total', "Stale mint jobs resolved by reconciliation", ['outcome'])
+RUN_DURATION = metrics.histogram('reconcile_run_duration_seconds', "Time per reconciliation run")
+LAST_RUN = metrics.gauge('reconcile_last_run_timestamp_seconds', "When reconciliation last finished")
+
+
+def init_app(app):
+    metrics.gauge('reconcile_backlog', "Mint jobs waiting for reconciliation", callback=lambda: MintJob.query.filter_by(status='stale').count())
+
+
+class LedgerView:
+    """
+    What the ledger knows about a set of tickets, fetched with a handful of
+    paged account requests instead of one lookup per ticket: the NFTs and
+    sell offers held by every pool wallet, and the NFTs already in the
+    buyers' wallets (offers accepted before we recorded them).
+    """
+
+    def __init__(self, xrpl_service, concurrency=8):
+        self.xrpl_service = xrpl_service
+        self.concurrency = concurrency
+        self.issuers = set(xrpl_service.minters_by_address)
+        self.nfts_by_ticket = {}
+        self.nfts_by_id = {}
+        self.offers_by_nft = {}
+
+    def load(self, buyer_wallets):
+        minters = list(self.issuers)
+        wallets = [wallet for wallet in set(buyer_wallets) if wallet not in self.issuers]
+
+        # Every account is fetched in parallel; one slow node doesn't serialize the run
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="reconcile") as executor:
+            offer_pages = executor.map(self.xrpl_service.get_sell_offers, minters)
+            nft_pages = executor.map(self._owned_nfts, minters + wallets)
+            for owner, nfts in nft_pages:
+                for nft in nfts:
+                    self._add_nft(owner, nft)
+            for offers in offer_pages:
+                for offer in offers:
+                    self.offers_by_nft.setdefault(offer.get('NFTokenID'), []).append(offer)
+        return self
+
+    def find(self, ticket):
+        """
+        (owner, nft_id, issuer) of the ticket's NFT, or None if it was never minted
+        """
+        nft = self.nfts_by_id.get(ticket.nft_id) if ticket.nft_id else None
+        return nft or self.nfts_by_ticket.get(ticket.id)
+
+    def offer_for(self, nft_id, destination):
+        for offer in self.offers_by_nft.get(nft_id, []):
+            if offer.get('Destination') == destination and offer.get('Flags', 0) & nft_index.SELL_OFFER_FLAG:
+                return offer.get('index') or offer.get('LedgerIndex')
+        return None
+
+    def _owned_nfts(self, account):
+        result = self.xrpl_service.get_user_nfts(account)
+        if not result['success']:
+            raise RuntimeError(f"Failed to fetch NFTs for {account}: {result.get('error')}")
+        return account, result['nfts']
+
+    def _add_nft(self, owner, nft):
+        if nft.get('Issuer') not in self.issuers:
+            return
+        entry = (owner, nft['NFTokenID'], nft['Issuer'])
+        self.nfts_by_id[nft['NFTokenID']] = entry
+        parsed = nft_metadata.parse_uri(nft.get('URI'))
+        if parsed is not None:
+            self.nfts_by_ticket[parsed[1]] = entry
+
+
+def adopt_orphans(older_than):
+    """
+    Give a stale job to pending tickets that lost theirs (or never got one),
+    so reconciliation picks them up. Returns how many were adopted.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than)
+    orphans = Ticket.query.outerjoin(MintJob, MintJob.ticket_id == Ticket.id).filter(
+        Ticket.status == 'pending', Ticket.created_at < cutoff, MintJob.id.is_(None)
+    ).all()
+    db.session.add_all([MintJob(ticket=ticket, status='stale', last_error='Ticket had no mint job') for ticket in orphans])
+    db.session.commit()
+    return len(orphans)
+
+
+def reconcile(xrpl_service, limit=None, dry_run=False):
+    """
+    Resolve stale mint jobs against the ledger:
+
+    - NFT in the buyer's wallet, or offered to them: confirm the ticket
+    - NFT still with the pool wallet and no offer: create the offer, then confirm
+    - no NFT and the last mint transaction validated: it moved on from the
+      buyer, so confirm the ticket
+    - no NFT and the validated ledger is past the last mint's
+      LastLedgerSequence: mint again while attempts remain, otherwise fail
+      the ticket and return its seat
+    - no NFT and the last mint can still land: wait for a later run
+
+    Safe to run repeatedly and from several processes: each job is claimed
+    with a conditional update and left untouched if anything else moved it.
+    A job whose offer couldn't be created stays stale for the next run.
+    Returns a count per outcome.
+    """
+    started = time.perf_counter()
+    config = current_app.config
+    summary = dict.fromkeys(OUTCOMES, 0)
+    summary['adopted'] = 0 if dry_run else adopt_orphans(config['RECONCILE_AFTER'])
+
+    jobs = MintJob.query.filter_by(status='stale').order_by(MintJob.id).limit(limit or config['RECONCILE_LIMIT']).all()
+    if not jobs:
+        return summary
+
+    tickets = {ticket.id: ticket for ticket in Ticket.query.filter(Ticket.id.in_([job.ticket_id for job in jobs])).options(
+        db.joinedload(Ticket.user), db.joinedload(Ticket.event)
+    )}
+    # Read before the account data, so anything validated by this ledger shows up in it
+    validated_ledger = xrpl_service.validated_ledger_index()
+    ledger = LedgerView(xrpl_service, config['RECONCILE_CONCURRENCY']).load(
+        ticket.user.wallet_address for ticket in tickets.values()
+    )
+
+    # Decide everything from the one ledger view, then create missing offers side by side
+    decisions = []
+    needs_offer = []
+    for job in jobs:
+        ticket = tickets[job.ticket_id]
+        found = ledger.find(ticket)
+        if ticket.status != 'pending':
+            decisions.append((job, ticket, 'settled', None))
+        elif found is None:
+            decisions.append(_unminted(xrpl_service, job, ticket, validated_ledger, config['MINT_JOB_MAX_ATTEMPTS']))
+        else:
+            owner, nft_id, issuer = found
+            wallet = ticket.user.wallet_address
+            offer_id = ledger.offer_for(nft_id, wallet)
+            if owner == wallet or offer_id or wallet in ledger.issuers:
+                decisions.append((job, ticket, 'confirmed', (nft_id, issuer, owner, offer_id)))
+            else:
+                needs_offer.append((job, ticket, nft_id, issuer, owner, wallet))
+
+    if dry_run:
+        for _, _, outcome, _ in decisions:
+            if outcome in summary:
+                summary[outcome] += 1
+        summary['offered'] = len(needs_offer)
+        return summary
+
+    if needs_offer:
+        with ThreadPoolExecutor(max_workers=config['RECONCILE_CONCURRENCY'], thread_name_prefix="reconcile-offer") as executor:
+            offer_ids = list(executor.map(lambda entry: xrpl_service.transfer_nft_to_user(entry[2], entry[5]), needs_offer))
+        for (job, ticket, nft_id, issuer, owner, wallet), offer_id in zip(needs_offer, offer_ids):
+            decisions.append((job, ticket, 'offered' if offer_id else 'retry', (nft_id, issuer, owner, offer_id)))
+
+    batch_size = config['RECONCILE_BATCH_SIZE']
+    for offset in range(0, len(decisions), batch_size):
+        for job, ticket, outcome, nft in decisions[offset:offset + batch_size]:
+            if _apply(job, ticket, outcome, nft):
+                summary[outcome] += 1
+                RECONCILED.inc(outcome=outcome)
+        db.session.commit()
+
+    RUN_DURATION.observe(time.perf_counter() - started)
+    LAST_RUN.set(time.time())
+    return summary
+
+
+def run(xrpl_service):
+    """
+    Maintenance task: reconcile, and log when anything was found
+    """
+    summary = reconcile(xrpl_service)
+    if any(summary.values()):
+        print(f"Mint reconciliation: {summary}")
+
+
+def _unminted(xrpl_service, job, ticket, validated_ledger, max_attempts):
+    """
+    Decision for a job whose NFT isn't in any wallet we looked at
+    """
+    if job.last_ledger_sequence is not None:
+        if validated_ledger is None or validated_ledger <= job.last_ledger_sequence:
+            return (job, ticket, 'waiting', None)
+        minted = xrpl_service.get_transaction(job.transaction_hash) if job.transaction_hash else None
+        if minted and minted.get('meta', {}).get('TransactionResult') == 'tesSUCCESS':
+            nft_id = xrpl_service.extract_nft_id(minted['meta'])
+            if nft_id:
+                return (job, ticket, 'confirmed', (nft_id, minted.get('Account'), None, None))
+    # Never submitted (the job is recorded before every submission), or expired unvalidated
+    return (job, ticket, 'requeued' if job.attempts < max_attempts else 'failed', None)
+
+
+def _apply(job, ticket, outcome, nft):
+    if outcome in ('retry', 'waiting'):
+        return True
+
+    # Claim the job; another reconciler (or a finished mint) may have got there first
+    new_status = {'confirmed': 'done', 'offered': 'done', 'requeued': 'queued', 'failed': 'failed', 'settled': 'done'}[outcome]
+    claimed = MintJob.query.filter_by(id=job.id, status='stale').update({
+        'status': new_status,
+        'locked_at': None,
+        'last_error': None if new_status == 'done' else job.last_error
+    }, synchronize_session=False)
+    if not claimed or outcome == 'settled':
+        return False
+    if outcome == 'requeued':
+        return True
+
+    if outcome == 'failed':
+        ticket.status = 'failed'
+        release_hold(ticket.id)
+    else:
+        nft_id, issuer, owner, offer_id = nft
+        ticket.nft_id = nft_id
+        ticket.status = 'confirmed'
+        commit_hold(ticket.id)
+        nft_index.record_mint(nft_id, issuer, ticket.id)
+        if owner and owner != issuer:
+            nft_index.record_transfer(nft_id, owner)
+        elif offer_id:
+            nft_index.record_offer(nft_id, offer_id, ticket.user.wallet_address)
+    activity_feed.record(db.session, [ticket])
+    return True
@@ -0,0 +1,173 @@
+from sqlalchemy import event as sqlalchemy_event, bindparam, text
+from app import db
+from app.models import Event
+from app.serializers import event_load_options, serialize_events
+import re
+
+# SQLite: an external-content FTS5 table over the event columns, kept in
+# sync by triggers so every insert, update and delete on event is indexed.
+# prefix='2 3' adds prefix indexes so "roc*" doesn't scan the whole vocabulary.
+SQLITE_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS event_search USING fts5(
+        title, description, location,
+        content='event', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS event_search_ai AFTER INSERT ON event BEGIN
+        INSERT INTO event_search(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS event_search_ad AFTER DELETE ON event BEGIN
+        INSERT INTO event_search(event_search, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS event_search_au AFTER UPDATE ON event BEGIN
+        INSERT INTO event_search(event_search, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+        INSERT INTO event_search(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END""",
+]
+
+# PostgreSQL: a GIN expression index the search query below matches exactly
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(event.title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(event.location, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(event.description, '')), 'C')"
+)
+POSTGRES_SEARCH_DDL = [
+    f"CREATE INDEX IF NOT EXISTS ix_event_search ON event USING GIN (({POSTGRES_DOCUMENT}))",
+]
+
+# bm25 column weights: title, description, location
+SQLITE_RANK = "bm25(event_search, 10.0, 1.0, 5.0)"
+
+MAX_TERMS = 8
+
+
+def init_app(app):
+    """
+    Create the search index whenever db.create_all() creates the event table
+    """
+    if not sqlalchemy_event.contains(Event.__table__, 'after_create', _after_create):
+        sqlalchemy_event.listen(Event.__table__, 'after_create', _after_create)
+
+
+def _after_create(target, connection, **kw):
+    _create_index(connection)
+
+
+def _create_index(connection):
+    statements = {'sqlite': SQLITE_SEARCH_DDL, 'postgresql': POSTGRES_SEARCH_DDL}.get(connection.dialect.name, [])
+    for statement in statements:
+        connection.execute(text(statement))
+    return bool(statements)
+
+
+def drop_index():
+    """
+    Drop the search index and its triggers; db.drop_all() doesn't know about them
+    """
+    with db.engine.begin() as connection:
+        if connection.dialect.name == 'sqlite':
+            for trigger in ('event_search_ai', 'event_search_ad', 'event_search_au'):
+                connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+            connection.execute(text("DROP TABLE IF EXISTS event_search"))
+        elif connection.dialect.name == 'postgresql':
+            connection.execute(text("DROP INDEX IF EXISTS ix_event_search"))
+
+
+def ensure_index(rebuild=False):
+    """
+    Create the search index on an existing database and, when it is new or
+    rebuild is set, index the events already there. Returns True if the
+    database supports full-text search.
+    """
+    with db.engine.begin() as connection:
+        existed = connection.dialect.name != 'sqlite' or connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'event_search'")
+        ).first() is not None
+        supported = _create_index(connection)
+        if connection.dialect.name == 'sqlite' and (rebuild or not existed):
+            connection.execute(text("INSERT INTO event_search(event_search) VALUES ('rebuild')"))
+    return supported
+
+
+def parse_terms(query):
+    """
+    Words from the user's query, lower-cased and capped at MAX_TERMS
+    """
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+
+def search_events(query, date_from=None, date_to=None, min_price=None, max_price=None, limit=50, offset=0):
+    """
+    Ranked event search over title, description and location. Every word
+    must match; every word also matches as a prefix. Returns serialized
+    events, best match first, each with its 'rank'.
+    """
+    terms = parse_terms(query)
+    if not terms:
+        return []
+
+    filters = []
+    params = {'limit': limit, 'offset': offset}
+    if date_from:
+        filters.append("event.date >= :date_from")
+        params['date_from'] = date_from
+    if date_to:
+        filters.append("event.date <= :date_to")
+        params['date_to'] = date_to
+    if min_price is not None:
+        filters.append("event.price >= :min_price")
+        params['min_price'] = min_price
+    if max_price is not None:
+        filters.append("event.price <= :max_price")
+        params['max_price'] = max_price
+    where = ''.join(f" AND {condition}" for condition in filters)
+
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        # Quoted so FTS5 operators typed by users are searched as words
+        params['match'] = ' '.join(f'"{term}"*' for term in terms)
+        sql = (
+            f"SELECT event.id, {SQLITE_RANK} AS rank FROM event_search "
+            f"JOIN event ON event.id = event_search.rowid "
+            f"WHERE event_search MATCH :match{where} "
+            f"ORDER BY rank LIMIT :limit OFFSET :offset"
+        )
+    elif dialect == 'postgresql':
+        params['match'] = ' & '.join(f"{term}:*" for term in terms)
+        sql = (
+            f"SELECT event.id, -ts_rank({POSTGRES_DOCUMENT}, to_tsquery('simple', :match)) AS rank FROM event "
+            f"WHERE ({POSTGRES_DOCUMENT}) @@ to_tsquery('simple', :match){where} "
+            f"ORDER BY rank LIMIT :limit OFFSET :offset"
+        )
+    else:
+        # No full-text index on this database: unranked substring match
+        for index, term in enumerate(terms):
+            params[f"term{index}"] = f"%{term}%"
+            where += (
+                f" AND (lower(event.title) LIKE :term{index} OR lower(event.description) LIKE :term{index}"
+                f" OR lower(event.location) LIKE :term{index})"
+            )
+        sql = f"SELECT event.id, 0 AS rank FROM event WHERE 1 = 1{where} ORDER BY event.id DESC LIMIT :limit OFFSET :offset"
+
+    # Typed so dates are compared in the format the DateTime column stores
+    statement = text(sql).bindparams(*[
+        bindparam(name, type_=db.DateTime()) for name in ('date_from', 'date_to') if name in params
+    ])
+    ranked = db.session.execute(statement, params).all()
+    if not ranked:
+        return []
+
+    events = {
+        event.id: event
+        for event in Event.query.filter(Event.id.in_([row.id for row in ranked])).options(*event_load_options())
+    }
+    ranked = [row for row in ranked if row.id in events]
+    results = serialize_events([events[row.id] for row in ranked])
+    for result, row in zip(results, ranked):
+        # Lower is better for both bm25 and the negated ts_rank
+        result['rank'] = row.rank
+    return results
@@ -0,0 +1,158 @@
+from collections import Counter
+from sqlalchemy import event as sqlalchemy_event, func, case, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Ticket, EventStats, UserStats
+
+# Counter columns for each ticket status; confirmed tickets also add their price
+EVENT_COLUMNS = {'pending': 'tickets_pending', 'confirmed': 'tickets_sold', 'failed': 'tickets_failed'}
+USER_COLUMNS = {'pending': 'tickets_pending', 'confirmed': 'tickets_confirmed', 'failed': 'tickets_failed'}
+EVENT_TOTALS = list(EVENT_COLUMNS.values()) + ['revenue']
+USER_TOTALS = list(USER_COLUMNS.values()) + ['total_spent']
+
+
+def init_app(app):
+    """
+    Keep EventStats and UserStats in step with every Ticket.status change,
+    in the same transaction as the change
+    """
+    if sqlalchemy_event.contains(Session, 'before_flush', _before_flush):
+        return
+    # active_history loads the previous status before it is overwritten, so
+    # before_flush always sees both sides of a transition
+    sqlalchemy_event.listen(Ticket.status, 'set', _status_set, active_history=True)
+    sqlalchemy_event.listen(Session, 'before_flush', _before_flush)
+    sqlalchemy_event.listen(Session, 'after_flush', _after_flush)
+    sqlalchemy_event.listen(Session, 'after_rollback', _after_rollback)
+
+
+def _status_set(target, value, oldvalue, initiator):
+    pass
+
+
+def _contribution(ticket, status, sign):
+    """
+    What a ticket in the given status adds to its event's and user's totals
+    """
+    event_changes, user_changes = Counter(), Counter()
+    if status in EVENT_COLUMNS:
+        event_changes[EVENT_COLUMNS[status]] += sign
+        user_changes[USER_COLUMNS[status]] += sign
+    if status == 'confirmed':
+        event_changes['revenue'] += sign * ticket.price
+        user_changes['total_spent'] += sign * ticket.price
+    return event_changes, user_changes
+
+
+def _before_flush(session, flush_context, instances):
+    deltas = session.info.setdefault('stats_deltas', {'event': {}, 'user': {}})
+
+    def add(ticket, status, sign):
+        event_changes, user_changes = _contribution(ticket, status, sign)
+        deltas['event'].setdefault(ticket.event_id, Counter()).update(event_changes)
+        deltas['user'].setdefault(ticket.user_id, Counter()).update(user_changes)
+
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            add(obj, obj.status or 'pending', 1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Ticket):
+            history = inspect(obj).attrs.status.history
+            if history.added and history.deleted:
+                add(obj, history.deleted[0], -1)
+                add(obj, history.added[0], 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Ticket):
+            history = inspect(obj).attrs.status.history
+            add(obj, (history.deleted or history.unchanged or [obj.status])[0], -1)
+
+
+def _after_flush(session, flush_context):
+    deltas = session.info.pop('stats_deltas', None)
+    if not deltas:
+        return
+    connection = session.connection()
+    for event_id, changes in deltas['event'].items():
+        _apply(connection, EventStats.__table__, 'event_id', event_id, changes)
+    for user_id, changes in deltas['user'].items():
+        _apply(connection, UserStats.__table__, 'user_id', user_id, changes)
+
+
+def _after_rollback(session):
+    session.info.pop('stats_deltas', None)
+
+
+def _apply(connection, table, key_column, key, changes):
+    changes = {column: delta for column, delta in changes.items() if delta}
+    if key is None or not changes:
+        return
+    values = {column: table.c[column] + delta for column, delta in changes.items()}
+    values['updated_at'] = func.now()
+    update = table.update().where(table.c[key_column] == key).values(**values)
+    if connection.execute(update).rowcount:
+        return
+
+    # First ticket for this event/user: create the row (a concurrent writer may beat us to it)
+    zeros = {column.name: 0 for column in table.columns if column.name not in (key_column, 'updated_at')}
+    if connection.dialect.name in ('sqlite', 'postgresql'):
+        if connection.dialect.name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        connection.execute(insert(table).values({key_column: key, **zeros}).on_conflict_do_nothing())
+    else:
+        connection.execute(table.insert().values({key_column: key, **zeros}))
+    connection.execute(update)
+
+
+def get_event_stats(event_id):
+    stats = db.session.get(EventStats, event_id) or EventStats(event_id=event_id, **dict.fromkeys(EVENT_TOTALS, 0))
+    return stats.to_json()
+
+
+def get_user_stats(user_id):
+    stats = db.session.get(UserStats, user_id) or UserStats(user_id=user_id, **dict.fromkeys(USER_TOTALS, 0))
+    return stats.to_json()
+
+
+def rebuild(check_only=False):
+    """
+    Recompute both aggregate tables from the Ticket rows. Returns the rows
+    whose stored totals didn't match; unless check_only, the tables are
+    then replaced with the recomputed totals.
+    """
+    mismatches = []
+    for model, key_column, group_column, columns, totals in (
+        (EventStats, 'event_id', Ticket.event_id, EVENT_COLUMNS, EVENT_TOTALS),
+        (UserStats, 'user_id', Ticket.user_id, USER_COLUMNS, USER_TOTALS),
+    ):
+        rows = db.session.query(
+            group_column,
+            *[func.sum(case((Ticket.status == status, 1), else_=0)) for status in columns],
+            func.sum(case((Ticket.status == 'confirmed', Ticket.price), else_=0))
+        ).group_by(group_column).all()
+        expected = {row[0]: dict(zip(totals, [int(value or 0) for value in row[1:]])) for row in rows}
+        stored = {
+            getattr(row, key_column): {column: getattr(row, column) for column in totals}
+            for row in model.query.all()
+        }
+
+        zeros = dict.fromkeys(totals, 0)
+        for key in sorted(set(expected) | set(stored)):
+            if expected.get(key, zeros) != stored.get(key, zeros):
+                mismatches.append({
+                    'table': model.__tablename__,
+                    key_column: key,
+                    'stored': stored.get(key, zeros),
+                    'expected': expected.get(key, zeros)
+                })
+
+        if not check_only:
+            model.query.delete()
+            db.session.add_all([model(**{key_column: key}, **values) for key, values in expected.items()])
+
+    if not check_only:
+        db.session.commit()
+    return mismatches
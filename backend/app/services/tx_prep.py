@@ -0,0 +1,180 @@
+from xrpl.clients import XRPLRequestFailureException
+from xrpl.models.requests import AccountInfo, Fee, ServerInfo
+from xrpl.models.transactions import Transaction
+from xrpl.models.transactions.types import TransactionType
+from app.services.metrics import metrics
+import xrpl
+import threading
+import time
+
+
+class TransactionPreparer:
+    """
+    Fills in Fee, Sequence and LastLedgerSequence from local state and signs
+    locally, so submitting a transaction costs exactly one submit RPC.
+
+    autofill asks rippled for the fee, the account Sequence and the latest
+    validated ledger on every transaction (and submit_and_wait checks the
+    fee a second time). Here the fee and open ledger index come from a
+    periodic fee request, kept current between refreshes by ledgerClosed
+    messages from the ledger stream, and each account's next Sequence is
+    tracked locally after one account_info. A sequence that may have gone
+    out of step (tefPAST_SEQ, terPRE_SEQ or any unconfirmed submission) is
+    dropped and fetched again on the next transaction.
+    """
+
+    # Same margin autofill uses for LastLedgerSequence
+    LEDGER_OFFSET = 20
+    # Never pay more than 2 XRP, the autofill default cap
+    MAX_FEE_DROPS = 2000000
+    # Rough ledger close time, used to age the ledger index between refreshes
+    LEDGER_CLOSE_SECONDS = 4
+    # Transaction types whose cost isn't the plain network fee still go through autofill
+    SPECIAL_FEE_TYPES = {TransactionType.ACCOUNT_DELETE, TransactionType.AMM_CREATE, TransactionType.ESCROW_FINISH}
+
+    def __init__(self, client, refresh_interval=10):
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self.network_id = None
+        self.needs_network_id = False
+        self.base_fee_drops = None
+        self.open_ledger_fee_drops = None
+        self._ledger_index = None
+        self._ledger_index_at = 0
+        self._fee_refreshed_at = 0
+        self._sequences = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.prepared = 0
+        self.state_requests = 0
+        metrics.counter('xrpl_prepared_transactions_total', "Transactions filled in and signed locally", callback=lambda: self.prepared)
+        metrics.counter('xrpl_state_requests_total', "fee, server_info and account_info requests made to prepare transactions", callback=lambda: self.state_requests)
+        metrics.gauge('xrpl_fee_drops', "Fee paid per transaction, in drops", callback=lambda: self.open_ledger_fee_drops or 0)
+
+    def refresh(self):
+        """
+        Fetch the current fee and open ledger index (one fee request)
+        """
+        if self.network_id is None:
+            self._load_network_id()
+
+        response = self.client.request(Fee())
+        self._count_state_request()
+        if not response.is_successful():
+            raise XRPLRequestFailureException(response.result)
+
+        drops = response.result.get('drops', {})
+        with self._lock:
+            self.base_fee_drops = int(drops.get('base_fee', 10))
+            self.open_ledger_fee_drops = int(drops.get('open_ledger_fee', self.base_fee_drops))
+            self._fee_refreshed_at = time.monotonic()
+            if response.result.get('ledger_current_index') is not None:
+                self._ledger_index = response.result['ledger_current_index']
+                self._ledger_index_at = self._fee_refreshed_at
+
+    def on_stream_message(self, message):
+        """
+        Ledger stream listener: keep the ledger index and base fee current between refreshes
+        """
+        if message.get('type') != 'ledgerClosed' or message.get('ledger_index') is None:
+            return
+        with self._lock:
+            # The next open ledger follows the one that just closed
+            self._ledger_index = message['ledger_index'] + 1
+            self._ledger_index_at = time.monotonic()
+            if message.get('fee_base') is not None:
+                self.base_fee_drops = int(message['fee_base'])
+
+    def prepare(self, transaction, wallet):
+        """
+        Return the transaction filled in and signed, without a network round trip
+        when the cached state is fresh
+        """
+        if transaction.transaction_type in self.SPECIAL_FEE_TYPES:
+            return xrpl.transaction.autofill_and_sign(transaction, self.client, wallet)
+
+        if time.monotonic() - self._fee_refreshed_at > self.refresh_interval * 3:
+            self.refresh()
+
+        transaction_json = transaction.to_dict()
+        if self.needs_network_id and 'network_id' not in transaction_json:
+            transaction_json['network_id'] = self.network_id
+        if 'sequence' not in transaction_json:
+            transaction_json['sequence'] = self._next_sequence(transaction_json['account'], transaction)
+        if 'fee' not in transaction_json:
+            transaction_json['fee'] = str(self._fee_drops())
+        if 'last_ledger_sequence' not in transaction_json:
+            transaction_json['last_ledger_sequence'] = self._estimated_ledger_index() + self.LEDGER_OFFSET
+
+        signed = xrpl.transaction.sign(Transaction.from_dict(transaction_json), wallet)
+        with self._stats_lock:
+            self.prepared += 1
+        return signed
+
+    def submission_failed(self, transaction, sequence_consumed):
+        """
+        Called when a prepared transaction didn't confirm. Anything that may
+        have left the local sequence ahead of the ledger forces a resync.
+        """
+        if transaction.sequence and not sequence_consumed:
+            self.resync(transaction.account)
+
+    def resync(self, account):
+        with self._lock:
+            self._sequences.pop(account, None)
+
+    def fee_rejected(self):
+        # telINSUF_FEE_P/terINSUF_FEE_B: fetch the escalated fee before the next transaction
+        with self._lock:
+            self._fee_refreshed_at = 0
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'prepared': self.prepared,
+                'state_requests': self.state_requests,
+                # autofill costs a fee, account_info/ledger and a second fee check per transaction
+                'round_trips_saved': self.prepared * 3 - self.state_requests,
+                'fee_drops': self.open_ledger_fee_drops,
+                'ledger_index': self._ledger_index
+            }
+
+    def _load_network_id(self):
+        response = self.client.request(ServerInfo())
+        self._count_state_request()
+        if not response.is_successful():
+            raise XRPLRequestFailureException(response.result)
+        info = response.result.get('info', {})
+        self.network_id = info.get('network_id', 0)
+        # Mainnet, testnet and devnet (ids up to 1024) reject a NetworkID field
+        self.needs_network_id = self.network_id > 1024
+
+    def _next_sequence(self, account, transaction):
+        with self._lock:
+            sequence = self._sequences.get(account)
+        if sequence is None:
+            response = self.client.request(AccountInfo(account=account, ledger_index='current'))
+            self._count_state_request()
+            if not response.is_successful():
+                raise XRPLRequestFailureException(response.result)
+            sequence = response.result['account_data']['Sequence']
+
+        with self._lock:
+            sequence = max(sequence, self._sequences.get(account, 0))
+            # TicketCreate also uses up one sequence number per ticket it creates
+            self._sequences[account] = sequence + 1 + (getattr(transaction, 'ticket_count', None) or 0)
+        return sequence
+
+    def _fee_drops(self):
+        with self._lock:
+            fee = max(self.open_ledger_fee_drops or 0, self.base_fee_drops or 10)
+        return min(fee, self.MAX_FEE_DROPS)
+
+    def _estimated_ledger_index(self):
+        with self._lock:
+            elapsed = time.monotonic() - self._ledger_index_at
+            return self._ledger_index + int(elapsed / self.LEDGER_CLOSE_SECONDS)
+
+    def _count_state_request(self):
+        with self._stats_lock:
+            self.state_requests += 1
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import or_
+from app import db
+from app.models import WalletLease
+import time
+
+
+def renew(xrpl_service):
+    """
+    Take or extend this process's lease on every pool wallet that is free,
+    expired or already ours. A wallet's Tickets are only handed out while
+    its lease is held, so two processes never submit with the same Ticket.
+    Returns the addresses held.
+    """
+    ttl = current_app.config['WALLET_LEASE_TTL']
+    now = datetime.utcnow()
+    holder = xrpl_service.lease_holder
+    table = WalletLease.__table__
+
+    held = []
+    with db.engine.begin() as connection:
+        for minter in xrpl_service.minters:
+            # Make sure the row exists (expired) before the conditional take
+            row = {'address': minter.address, 'holder': '', 'expires_at': datetime(1970, 1, 1)}
+            if connection.dialect.name == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+                connection.execute(insert(table).values(row).on_conflict_do_nothing())
+            elif connection.dialect.name == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+                connection.execute(insert(table).values(row).on_conflict_do_nothing())
+            elif connection.execute(table.select().where(table.c.address == minter.address)).first() is None:
+                connection.execute(table.insert().values(row))
+
+            taken = connection.execute(
+                table.update().where(
+                    table.c.address == minter.address,
+                    or_(table.c.holder == holder, table.c.expires_at < now)
+                ).values(holder=holder, expires_at=now + timedelta(seconds=ttl))
+            ).rowcount
+            if taken:
+                held.append(minter.address)
+
+    # Counted from before the update, and a renewal interval short, so this
+    # process stops submitting before anyone else can take the lease over
+    lease_until = time.monotonic() + ttl - current_app.config['WALLET_LEASE_RENEW_INTERVAL']
+    for minter in xrpl_service.minters:
+        xrpl_service.set_lease(minter, lease_until if minter.address in held else 0)
+    return held
+
+
+def release(xrpl_service):
+    """
+    Give up this process's leases so another minting process can take them at once
+    """
+    for minter in xrpl_service.minters:
+        xrpl_service.set_lease(minter, 0)
+    WalletLease.query.filter(WalletLease.holder == xrpl_service.lease_holder).update(
+        {'expires_at': datetime(1970, 1, 1)}, synchronize_session=False
+    )
+    db.session.commit()
@@ -1,77 +1,691 @@
 import xrpl
-from xrpl.models.transactions import NFTokenMint, NFTokenCreateOffer, NFTokenAcceptOffer
-from xrpl.models.requests import AccountNFTs
-from xrpl.utils import str_to_hex
-import json
+from xrpl.models.transactions import NFTokenMint, NFTokenCreateOffer, TicketCreate
+from xrpl.models.requests import AccountNFTs, AccountObjects, AccountObjectType, AccountInfo, ServerInfo, Tx
+from xrpl.utils import drops_to_xrp, get_nftoken_id, parse_nftoken_id
+from xrpl.models.response import Response, ResponseStatus
+from xrpl.transaction import XRPLReliableSubmissionException
+from xrpl.clients import XRPLRequestFailureException
+from app.services.ledger_stream import LedgerStream, TransactionExpired
+from app.services.metrics import metrics
+from app.services.tx_prep import TransactionPreparer
+from app.services.xrpl_pool import PooledJsonRpcClient
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from collections import deque
+from flask import has_app_context
+from functools import wraps
+import hashlib
+import socket
+import threading
+import uuid
+import time
 import os
+import re
+
+SUBMISSION_DURATION = metrics.histogram(
+    'xrpl_submission_duration_seconds', "Prepare, submit and validate one transaction", ['transaction_type', 'result']
+)
+SUBMISSION_PHASE = metrics.histogram('xrpl_submission_phase_seconds', "Time per submission phase", ['phase'])
+OPERATION_DURATION = metrics.histogram('xrpl_operation_duration_seconds', "XRPLService calls", ['operation', 'outcome'])
+
+RESULT_CODE = re.compile(r"\b(?:tes|tec|tef|tel|tem|ter)[A-Z_]+")
+
+
+class TransactionOutcomeUnknown(XRPLReliableSubmissionException):
+    """
+    A submitted transaction that may still validate: no result yet and its
+    LastLedgerSequence not passed. Its Ticket and anything it pays for (a
+    seat, an NFT) must be kept until reconciliation finds out what happened.
+    """
+    pass
+
+
+class WalletNotLeased(RuntimeError):
+    """
+    This process doesn't hold the pool wallet lease it needs; nothing was submitted
+    """
+    pass
+
+
+def timed_operation(name):
+    """
+    Time an XRPLService method; a False or {'success': False} result counts as an error
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = method(*args, **kwargs)
+                failed = result is False or (isinstance(result, dict) and result.get('success') is False)
+                outcome = 'error' if failed else 'ok'
+                return result
+            finally:
+                OPERATION_DURATION.observe(time.perf_counter() - started, operation=name, outcome=outcome)
+        return wrapper
+    return decorator
+
+
+class TicketSequencePool:
+    """
+    Hands out XRPL Ticket sequences for one signing wallet.
+
+    Transactions that use a Ticket instead of the account Sequence can be
+    submitted concurrently and land in the same ledger, so the pool lets
+    several mint workers share the platform wallet without colliding on
+    tefPAST_SEQ/terPRE_SEQ. Tickets are created in batches with TicketCreate
+    and the pool refills in the background before it runs dry.
+
+    Only one process may allocate tickets for a given wallet: XRPLService
+    only draws from a pool while it holds the wallet's lease (see
+    wallet_leases), and reset() drops what it knew when the lease is taken.
+    """
+
+    # An account can own at most 250 Tickets
+    MAX_TICKETS = 250
+
+    def __init__(self, client, wallet, batch_size=20, low_water=5, submit=None):
+        self.client = client
+        self.wallet = wallet
+        self.submit = submit or (lambda transaction, wallet: xrpl.transaction.submit_and_wait(transaction, client, wallet))
+        self.batch_size = min(batch_size, self.MAX_TICKETS)
+        self.low_water = low_water
+        self._available = deque()
+        self._in_use = set()
+        self._lock = threading.Lock()
+        self._refilled = threading.Condition(self._lock)
+        self._refilling = False
+        self._loaded = False
+
+    def acquire(self, timeout=60):
+        """
+        Take a ticket sequence, waiting for a refill if the pool is empty
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load_existing()
+
+            if len(self._available) <= self.low_water:
+                self._start_refill()
+
+            while not self._available:
+                if not self._refilling:
+                    self._start_refill()
+                if not self._refilled.wait(timeout):
+                    raise TimeoutError("Timed out waiting for XRPL tickets")
+
+            ticket_sequence = self._available.popleft()
+            self._in_use.add(ticket_sequence)
+            return ticket_sequence
+
+    def release(self, ticket_sequence):
+        """
+        Return a ticket whose transaction never made it into a validated ledger
+        """
+        with self._lock:
+            self._in_use.discard(ticket_sequence)
+            self._available.appendleft(ticket_sequence)
+            self._refilled.notify()
+
+    def consume(self, ticket_sequence):
+        """
+        Forget a ticket that was used up on ledger
+        """
+        with self._lock:
+            self._in_use.discard(ticket_sequence)
+
+    def available(self):
+        with self._lock:
+            return len(self._available)
+
+    def reset(self):
+        """
+        Forget the known tickets; another process may have used them while it
+        held the wallet. They are loaded from the ledger again on next acquire.
+        """
+        with self._lock:
+            self._available.clear()
+            self._loaded = False
+
+    def _load_existing(self):
+        """
+        Pick up Tickets left on the account by a previous run (called with the lock held)
+        """
+        self._loaded = True
+        try:
+            marker = None
+            while True:
+                response = self.client.request(AccountObjects(
+                    account=self.wallet.classic_address,
+                    type=AccountObjectType.TICKET,
+                    marker=marker
+                ))
+                if not response.is_successful():
+                    return
+                for ledger_object in response.result.get('account_objects', []):
+                    ticket_sequence = ledger_object.get('TicketSequence')
+                    if ticket_sequence not in self._in_use and ticket_sequence not in self._available:
+                        self._available.append(ticket_sequence)
+                marker = response.result.get('marker')
+                if not marker:
+                    return
+        except Exception as e:
+            print(f"Error loading XRPL tickets: {str(e)}")
+
+    def _start_refill(self):
+        # Called with the lock held
+        if self._refilling:
+            return
+        self._refilling = True
+        threading.Thread(target=self._refill, name="xrpl-ticket-refill", daemon=True).start()
+
+    def _refill(self):
+        created = []
+        try:
+            with self._lock:
+                owned = len(self._available) + len(self._in_use)
+            ticket_count = min(self.batch_size, self.MAX_TICKETS - owned)
+            if ticket_count > 0:
+                ticket_tx = TicketCreate(
+                    account=self.wallet.classic_address,
+                    ticket_count=ticket_count
+                )
+                response = self.submit(ticket_tx, self.wallet)
+                created = self._extract_ticket_sequences(response)
+        except Exception as e:
+            print(f"Ticket refill error: {str(e)}")
+        finally:
+            with self._lock:
+                self._available.extend(created)
+                self._refilling = False
+                self._refilled.notify_all()
+
+    @staticmethod
+    def _extract_ticket_sequences(response):
+        sequences = []
+        for node in response.result.get('meta', {}).get('AffectedNodes', []):
+            created_node = node.get('CreatedNode', {})
+            if created_node.get('LedgerEntryType') == 'Ticket':
+                sequences.append(created_node.get('NewFields', {}).get('TicketSequence'))
+        return sorted(sequences)
+
+
+class MinterWallet:
+    """
+    One issuing/minting wallet in the platform pool, with its own Ticket pool
+    and load counters
+    """
+
+    # Keep this much XRP above the account reserve before routing new mints here
+    MIN_SPENDABLE_XRP = 5
+
+    def __init__(self, client, wallet, ticket_batch_size=20, ticket_low_water=5, submit=None):
+        self.wallet = wallet
+        self.address = wallet.classic_address
+        self.ticket_pool = TicketSequencePool(
+            client,
+            wallet,
+            batch_size=ticket_batch_size,
+            low_water=ticket_low_water,
+            submit=submit
+        )
+        self.in_flight = 0
+        self.minted = 0
+        self.balance_xrp = None
+        self.reserve_xrp = None
+        self.lease_until = 0  # time.monotonic() until which this process may submit for the wallet
+
+    @property
+    def leased(self):
+        return self.lease_until > time.monotonic()
+
+    def has_reserve_headroom(self):
+        # Unknown reserve (not refreshed yet) counts as usable
+        if self.balance_xrp is None or self.reserve_xrp is None:
+            return True
+        return self.balance_xrp - self.reserve_xrp >= self.MIN_SPENDABLE_XRP
+
+    def to_json(self):
+        return {
+            'address': self.address,
+            'in_flight': self.in_flight,
+            'minted': self.minted,
+            'tickets_available': self.ticket_pool.available(),
+            'leased': self.leased,
+            'balance_xrp': self.balance_xrp,
+            'reserve_xrp': self.reserve_xrp
+        }
 
 
 class XRPLService:
     def __init__(self):
-        # Use testnet for development
-        self.client = xrpl.clients.JsonRpcClient("https://s.altnet.rippletest.net:51234/")
-        # For production, use mainnet:
-        # self.client = xrpl.clients.JsonRpcClient("https://xrplcluster.com/")
+        # Comma separated rippled JSON-RPC URLs; requests go to the fastest healthy node.
+        # Defaults to testnet for development. For production, use mainnet nodes such as
+        # https://xrplcluster.com/,https://s1.ripple.com:51234/
+        rpc_urls = os.getenv('XRPL_RPC_URLS', 'https://s.altnet.rippletest.net:51234/,https://testnet.xrpl-labs.com/')
+        self.client = PooledJsonRpcClient(
+            [url.strip() for url in rpc_urls.split(',') if url.strip()],
+            probe_interval=int(os.getenv('XRPL_HEALTH_CHECK_INTERVAL', 15))
+        )
+
+        # Fee, Sequence and LastLedgerSequence come from local state so a submission is one RPC
+        self.tx_preparer = TransactionPreparer(
+            self.client,
+            refresh_interval=int(os.getenv('XRPL_FEE_REFRESH_INTERVAL', 10))
+        )
         
-        # Platform wallet for minting NFTs
+        # Platform wallets for minting NFTs, comma separated in XRPL_PLATFORM_SEEDS.
         # In production, store these securely (environment variables, vault, etc.)
-        self.platform_seed = os.getenv('XRPL_PLATFORM_SEED', 'sEdTM1uX8pu2do5XvTnutH6HsouMaM2')
-        self.platform_wallet = xrpl.wallet.Wallet.from_seed(self.platform_seed)
+        seeds = os.getenv('XRPL_PLATFORM_SEEDS') or os.getenv('XRPL_PLATFORM_SEED', 'sEdTM1uX8pu2do5XvTnutH6HsouMaM2')
+        self.platform_seeds = [seed.strip() for seed in seeds.split(',') if seed.strip()]
+
+        # Each wallet gets its own XRPL Ticket pool so concurrent mint workers
+        # never collide on the account Sequence
+        self.minters = [
+            MinterWallet(
+                self.client,
+                xrpl.wallet.Wallet.from_seed(seed),
+                ticket_batch_size=int(os.getenv('XRPL_TICKET_BATCH_SIZE', 20)),
+                ticket_low_water=int(os.getenv('XRPL_TICKET_LOW_WATER', 5)),
+                submit=self._submit
+            )
+            for seed in self.platform_seeds
+        ]
+        self.minters_by_address = {minter.address: minter for minter in self.minters}
+
+        # The first wallet stays the default platform wallet
+        self.platform_seed = self.platform_seeds[0]
+        self.platform_wallet = self.minters[0].wallet
+
+        # One WebSocket subscription confirms every in-flight transaction; without it
+        # (XRPL_WS_URLS set to empty) submissions fall back to polling with submit_and_wait
+        ws_urls = [url.strip() for url in os.getenv('XRPL_WS_URLS', 'wss://s.altnet.rippletest.net:51233/').split(',') if url.strip()]
+        self.confirmation_timeout = int(os.getenv('XRPL_CONFIRMATION_TIMEOUT', 60))
+        self.ledger_stream = None
+        if ws_urls:
+            self.ledger_stream = LedgerStream(ws_urls, self.minters_by_address.keys(), rpc_client=self.client)
+            self.ledger_stream.add_listener(self.tx_preparer.on_stream_message)
+
+        # Identifies this service in the wallet leases table
+        self.lease_holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        # 'least_loaded' spreads every mint, 'event_hash' pins each event to one wallet
+        self.mint_routing = os.getenv('XRPL_MINT_ROUTING', 'least_loaded')
+        self._minter_lock = threading.Lock()
+        self._started = False
+
+        # Mints in a batch are submitted side by side on separate Tickets so they
+        # validate in the same ledger close instead of one after another
+        self._batch_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('XRPL_BATCH_CONCURRENCY', 10)),
+            thread_name_prefix="xrpl-batch"
+        )
+
+        # Read when /metrics is scraped; the newest service in the process reports
+        metrics.gauge('xrpl_batch_queue_depth', "Mints waiting for a batch submission thread",
+                      callback=lambda: self._batch_executor._work_queue.qsize())
+        # Pool wallets are labelled by their position in XRPL_PLATFORM_SEEDS, not their address
+        metrics.gauge('xrpl_minter_in_flight', "Mints in progress per pool wallet", ['wallet'],
+                      callback=lambda: {(str(index),): minter.in_flight for index, minter in enumerate(self.minters)})
+        metrics.gauge('xrpl_tickets_available', "Unused XRPL Tickets per pool wallet", ['wallet'],
+                      callback=lambda: {(str(index),): minter.ticket_pool.available() for index, minter in enumerate(self.minters)})
+        metrics.gauge('xrpl_pending_confirmations', "Submitted transactions waiting for validation on the ledger stream",
+                      callback=lambda: self.ledger_stream.pending_count() if self.ledger_stream else 0)
+
+    def start(self):
+        """
+        Start the node health checks and the ledger stream (idempotent).
+        Called before the first submission, so services that only read
+        from the ledger never open a WebSocket or spawn threads.
+        """
+        if self._started:
+            return
+        with self._minter_lock:
+            if self._started:
+                return
+            self.client.start_health_checks()
+            if self.ledger_stream is not None:
+                self.ledger_stream.start()
+            self._started = True
+
+    def set_lease(self, minter, lease_until):
+        """
+        Record whether this process holds a pool wallet's lease (see wallet_leases)
+        """
+        with self._minter_lock:
+            gained = not minter.leased and lease_until > time.monotonic()
+            minter.lease_until = lease_until
+        if gained:
+            minter.ticket_pool.reset()
+
+    def has_leased_minter(self):
+        return any(minter.leased for minter in self.minters)
+
+    def _select_minter(self, event_id=None):
+        """
+        Pick the wallet for a new mint and count it as in flight
+        """
+        with self._minter_lock:
+            leased = [minter for minter in self.minters if minter.leased]
+            if not leased:
+                raise WalletNotLeased("This process holds no pool wallet lease")
+            candidates = [minter for minter in leased if minter.has_reserve_headroom()] or leased
+
+            if self.mint_routing == 'event_hash' and event_id is not None:
+                # Rendezvous hashing keeps an event on the same wallet as the pool changes
+                minter = max(
+                    candidates,
+                    key=lambda m: hashlib.sha256(f"{event_id}:{m.address}".encode()).digest()
+                )
+            else:
+                minter = min(candidates, key=lambda m: (m.in_flight, m.minted))
+
+            minter.in_flight += 1
+            return minter
+
+    def _release_minter(self, minter, minted):
+        with self._minter_lock:
+            minter.in_flight -= 1
+            if minted:
+                minter.minted += 1
+
+    def get_minter_for_nft(self, nft_id):
+        """
+        Return the pool wallet that issued an NFT, or None if it isn't one of ours
+        """
+        try:
+            return self.minters_by_address.get(parse_nftoken_id(nft_id)['issuer'])
+        except Exception:
+            return None
+
+    def is_platform_nft(self, nft_id):
+        """
+        Check that an NFT was issued by one of the platform wallets
+        """
+        return self.get_minter_for_nft(nft_id) is not None
+
+    @timed_operation('refresh_reserves')
+    def refresh_reserves(self):
+        """
+        Update balance and reserve figures for every pool wallet
+        """
+        try:
+            info = self.client.request(ServerInfo())
+            validated_ledger = info.result.get('info', {}).get('validated_ledger', {})
+            reserve_base = validated_ledger.get('reserve_base_xrp', 10)
+            reserve_inc = validated_ledger.get('reserve_inc_xrp', 2)
+
+            for minter in self.minters:
+                response = self.client.request(AccountInfo(account=minter.address, ledger_index='validated'))
+                if not response.is_successful():
+                    continue
+                account_data = response.result.get('account_data', {})
+                minter.balance_xrp = float(drops_to_xrp(account_data.get('Balance', '0')))
+                minter.reserve_xrp = reserve_base + reserve_inc * account_data.get('OwnerCount', 0)
+        except Exception as e:
+            print(f"Error refreshing wallet reserves: {str(e)}")
+
+    def wallet_stats(self):
+        with self._minter_lock:
+            return [minter.to_json() for minter in self.minters]
+
+    def submission_stats(self):
+        return self.tx_preparer.stats()
+
+    def _submit_with_ticket(self, minter, transaction_class, on_prepared=None, **fields):
+        """
+        Sign and submit a pool wallet transaction using one of its Tickets
+        instead of the account Sequence
+        """
+        if not minter.leased:
+            raise WalletNotLeased(f"Pool wallet {minter.address} is leased by another process")
+        ticket_sequence = minter.ticket_pool.acquire()
+        transaction = transaction_class(
+            account=minter.address,
+            sequence=0,
+            ticket_sequence=ticket_sequence,
+            **fields
+        )
+        try:
+            response = self._submit(transaction, minter.wallet, on_prepared)
+        except TransactionOutcomeUnknown:
+            # It may still use the ticket; handing it out again would collide
+            minter.ticket_pool.consume(ticket_sequence)
+            raise
+        except Exception as e:
+            if self._ticket_consumed(str(e)):
+                minter.ticket_pool.consume(ticket_sequence)
+            else:
+                minter.ticket_pool.release(ticket_sequence)
+            raise
+
+        minter.ticket_pool.consume(ticket_sequence)
+        return response
+
+    def _submit(self, transaction, wallet, on_prepared=None):
+        """
+        Fill in and sign locally, submit once and wait for the validated result.
+        on_prepared(tx_hash, last_ledger_sequence) runs after signing and before
+        submitting; if it raises, nothing is submitted.
+        """
+        self.start()
+        submitted = time.perf_counter()
+        transaction_type = transaction.transaction_type.value
+        with SUBMISSION_PHASE.time(phase='prepare'):
+            signed = self.tx_preparer.prepare(transaction, wallet)
+
+        sent = False
+        try:
+            if on_prepared is not None:
+                on_prepared(signed.get_hash(), signed.last_ledger_sequence)
+            sent = True
+            if self.ledger_stream is not None and self.ledger_stream.connected:
+                response = self._submit_and_watch(signed)
+            else:
+                # Already signed, so submit_and_wait skips autofill and the fee check
+                with SUBMISSION_PHASE.time(phase='submit_and_wait'):
+                    response = xrpl.transaction.submit_and_wait(signed, self.client)
+        except Exception as e:
+            if 'INSUF_FEE' in str(e):
+                self.tx_preparer.fee_rejected()
+            self.tx_preparer.submission_failed(signed, sequence_consumed=self._ticket_consumed(str(e)))
+            SUBMISSION_DURATION.observe(
+                time.perf_counter() - submitted, transaction_type=transaction_type, result=self._result_code(str(e))
+            )
+            if sent and not isinstance(e, TransactionOutcomeUnknown) and not self._outcome_final(str(e)):
+                # A dropped connection or failed lookup says nothing about a signed
+                # transaction the node may have relayed; let reconciliation decide
+                raise TransactionOutcomeUnknown(f"Outcome unknown for {signed.get_hash()}: {str(e)}") from e
+            raise
+
+        SUBMISSION_DURATION.observe(
+            time.perf_counter() - submitted,
+            transaction_type=transaction_type,
+            result=response.result.get('meta', {}).get('TransactionResult', 'unknown')
+        )
+        return response
+
+    @staticmethod
+    def _result_code(error_message):
+        # The engine result inside an xrpl-py error message, or a coarse reason
+        match = RESULT_CODE.search(error_message)
+        if match:
+            return match.group(0)
+        if 'Timed out' in error_message or 'Outcome unknown' in error_message:
+            return 'unknown'
+        if 'LastLedgerSequence' in error_message or 'expired' in error_message.lower():
+            return 'expired'
+        return 'error'
+
+    @staticmethod
+    def _outcome_final(error_message):
+        # Validated with a failure, rejected by the engine, or past its LastLedgerSequence
+        return (
+            error_message.startswith('Transaction failed:')
+            or error_message[:3] in ('tem', 'tef', 'tel')
+            or 'LastLedgerSequence' in error_message
+        )
+
+    def _submit_and_watch(self, signed):
+        """
+        Submit a signed transaction once and wait for the ledger stream to
+        report the validated result, instead of polling tx. Raises the same
+        exceptions as submit_and_wait, plus TransactionOutcomeUnknown when
+        neither the stream nor a node can say yet whether it validated.
+        """
+        tx_hash = signed.get_hash()
+        prelim_result = ''
+
+        # Watch before submitting so a fast validation can't be missed
+        future = self.ledger_stream.watch(tx_hash, signed.last_ledger_sequence)
+        try:
+            try:
+                with SUBMISSION_PHASE.time(phase='submit'):
+                    submit_response = xrpl.transaction.submit(signed, self.client)
+                prelim_result = submit_response.result.get('engine_result', '')
+            except XRPLRequestFailureException:
+                # The node answered and rejected it
+                raise
+            except Exception as e:
+                # The node may have relayed it before the connection dropped; let the ledger decide
+                print(f"Submit error for {tx_hash}, waiting for the ledger: {str(e)}")
+                prelim_result = 'unknown'
+            if prelim_result[:3] in ('tem', 'tef', 'tel'):
+                raise XRPLReliableSubmissionException(
+                    f"{prelim_result}: {submit_response.result.get('engine_result_message', '')}"
+                )
+
+            with SUBMISSION_PHASE.time(phase='confirm'):
+                result = self._wait_for_validation(future, tx_hash, signed.last_ledger_sequence)
+        except TransactionExpired as e:
+            raise XRPLReliableSubmissionException(f"{str(e)}. Prelim result: {prelim_result}")
+        finally:
+            self.ledger_stream.forget(tx_hash)
+
+        return_code = result.get('meta', {}).get('TransactionResult')
+        if return_code != 'tesSUCCESS':
+            raise XRPLReliableSubmissionException(f"Transaction failed: {return_code}")
+        return Response(status=ResponseStatus.SUCCESS, result=result)
+
+    def _wait_for_validation(self, future, tx_hash, last_ledger_sequence):
+        """
+        The validated transaction, waiting for as long as it can still make it
+        into a ledger. The stream resolves the future or expires it once a
+        validated ledger passes LastLedgerSequence; confirmation_timeout is
+        only how long the stream may stay silent before a node is asked.
+        """
+        seen_ledger = self.ledger_stream.validated_ledger_index
+        while True:
+            try:
+                result = future.result(timeout=self.confirmation_timeout)
+            except TransactionExpired:
+                # Double-check with a node: a reconnect can drop the validation message
+                result = self._lookup_outcome(tx_hash, last_ledger_sequence)
+                if result is None:
+                    raise TransactionOutcomeUnknown(f"Outcome unknown for {tx_hash}: the ledger stream expired it but no node confirmed")
+                return result
+            except FutureTimeoutError:
+                result = self._lookup_outcome(tx_hash, last_ledger_sequence)
+                if result is not None:
+                    return result
+                current_ledger = self.ledger_stream.validated_ledger_index
+                if current_ledger is not None and current_ledger != seen_ledger:
+                    # Ledgers are still closing, so the stream will settle it
+                    seen_ledger = current_ledger
+                    continue
+                raise TransactionOutcomeUnknown(
+                    f"Outcome unknown for {tx_hash}: no validated ledger for {self.confirmation_timeout}s "
+                    f"and LastLedgerSequence {last_ledger_sequence} not passed"
+                )
+            return result
+
+    def _lookup_outcome(self, tx_hash, last_ledger_sequence):
+        """
+        Ask a node for a transaction's fate: the validated result, None while
+        it can still validate (or the node can't tell), TransactionExpired
+        once the validated ledger is past its LastLedgerSequence without it
+        """
+        try:
+            response = self.client.request(Tx(transaction=tx_hash))
+            if response.is_successful() and response.result.get('validated'):
+                return response.result
+            info = self.client.request(ServerInfo())
+            validated_ledger = info.result.get('info', {}).get('validated_ledger', {}).get('seq')
+        except Exception as e:
+            print(f"Transaction lookup error for {tx_hash}: {str(e)}")
+            return None
+        if validated_ledger is not None and last_ledger_sequence is not None and validated_ledger > last_ledger_sequence:
+            raise TransactionExpired(
+                f"The latest validated ledger sequence {validated_ledger} is greater than "
+                f"LastLedgerSequence for {tx_hash}"
+            )
+        return None
+
+    @staticmethod
+    def _ticket_consumed(error_message):
+        # A validated tec result uses up the ticket; tefNO_TICKET means it is already gone.
+        # Anything else (tem, expired LastLedgerSequence, network errors) never consumed it.
+        return error_message.startswith('Transaction failed:') or 'tefNO_TICKET' in error_message
     
-    def mint_ticket_nft(self, event_title, event_date, event_location, ticket_id, user_wallet_address):
+    @timed_operation('mint_ticket_nft')
+    def mint_ticket_nft(self, ticket_id, user_wallet_address, uri, event_id=None, on_prepared=None):
         """
-        Mint an NFT ticket for an event
+        Mint an NFT ticket for an event from one of the pool wallets. uri is
+        the hex NFT URI from nft_metadata.ticket_uri; the full metadata is
+        served by the resolver rather than stored on the ledger. on_prepared
+        is passed to _submit for the mint transaction.
         """
         try:
-            # Create metadata for the NFT
-            metadata = {
-                "event": event_title,
-                "date": event_date,
-                "location": event_location,
-                "ticket_id": str(ticket_id),
-                "type": "Event Ticket",
-                "platform": "RippleGate"
-            }
-            
-            # Convert metadata to hex
-            metadata_hex = str_to_hex(json.dumps(metadata))
-            
-            # Create NFT mint transaction
-            mint_tx = NFTokenMint(
-                account=self.platform_wallet.classic_address,
+            minter = self._select_minter(event_id)
+        except WalletNotLeased as e:
+            return {'success': False, 'error': str(e), 'not_submitted': True}
+        minted = False
+        try:
+            # Submit NFT mint transaction and wait for validation
+            response = self._submit_with_ticket(
+                minter,
+                NFTokenMint,
                 nftoken_taxon=0,
                 flags=1,  # tfTransferable - allows the NFT to be transferred
-                uri=metadata_hex,
+                uri=uri,
+                on_prepared=on_prepared
             )
             
-            # Submit and wait for transaction
-            response = xrpl.transaction.submit_and_wait(mint_tx, self.client, self.platform_wallet)
-            
             if response.result.get('validated') and response.result.get('meta', {}).get('TransactionResult') == 'tesSUCCESS':
                 # Extract the NFT ID from the transaction metadata
                 nft_id = self._extract_nft_id_from_response(response)
+                minted = True
                 
-                if nft_id and user_wallet_address != self.platform_wallet.classic_address:
+                if nft_id and user_wallet_address not in self.minters_by_address:
                     # Transfer NFT to user
-                    transfer_success = self.transfer_nft_to_user(nft_id, user_wallet_address)
-                    if transfer_success:
+                    offer_id = self.transfer_nft_to_user(nft_id, user_wallet_address)
+                    if offer_id:
                         return {
                             'success': True,
                             'nft_id': nft_id,
                             'transaction_hash': response.result['hash'],
-                            'metadata': metadata
+                            'ledger_index': response.result.get('ledger_index'),
+                            'issuer': minter.address,
+                            'offer_id': offer_id
                         }
                     else:
+                        # Reconciliation creates the missing offer later
                         return {
                             'success': False,
-                            'error': 'NFT minted but transfer failed'
+                            'error': 'NFT minted but transfer failed',
+                            'nft_id': nft_id,
+                            'transaction_hash': response.result['hash'],
+                            'ledger_index': response.result.get('ledger_index'),
+                            'issuer': minter.address
                         }
                 else:
                     return {
                         'success': True,
                         'nft_id': nft_id,
                         'transaction_hash': response.result['hash'],
-                        'metadata': metadata
+                        'ledger_index': response.result.get('ledger_index'),
+                        'issuer': minter.address,
+                        'offer_id': None
                     }
             else:
                 return {
@@ -82,28 +696,51 @@ class XRPLService:
         except Exception as e:
             return {
                 'success': False,
-                'error': str(e)
+                'error': str(e),
+                # Might still mint: the ticket keeps its seat until reconciliation knows
+                'outcome_unknown': minted or isinstance(e, TransactionOutcomeUnknown),
+                # Lost the wallet lease before submitting: another process can mint it
+                'not_submitted': isinstance(e, WalletNotLeased)
             }
+        finally:
+            self._release_minter(minter, minted)
     
+    @timed_operation('mint_ticket_nfts')
+    def mint_ticket_nfts(self, mints):
+        """
+        Mint and offer a batch of tickets concurrently. mints is a list of
+        mint_ticket_nft keyword arguments; the results come back in the same
+        order, each with its own success flag.
+        """
+        if len(mints) == 1:
+            return [self.mint_ticket_nft(**mints[0])]
+        return list(self._batch_executor.map(lambda mint: self.mint_ticket_nft(**mint), mints))
+
+    @timed_operation('transfer_nft_to_user')
     def transfer_nft_to_user(self, nft_id, user_wallet_address):
         """
-        Transfer NFT from platform wallet to user wallet
+        Transfer NFT from the pool wallet that minted it to user wallet.
+        Returns the sell offer index on success, False otherwise.
         """
         try:
-            # Create sell offer for 0 XRP (free transfer)
-            sell_offer_tx = NFTokenCreateOffer(
-                account=self.platform_wallet.classic_address,
+            minter = self.get_minter_for_nft(nft_id)
+            if not minter:
+                print(f"Transfer error: {nft_id} was not minted by a platform wallet")
+                return False
+
+            # Submit sell offer for 0 XRP (free transfer)
+            sell_response = self._submit_with_ticket(
+                minter,
+                NFTokenCreateOffer,
                 nftoken_id=nft_id,
                 amount="0",
                 destination=user_wallet_address,
                 flags=1  # tfSellNFToken
             )
             
-            # Submit sell offer
-            sell_response = xrpl.transaction.submit_and_wait(sell_offer_tx, self.client, self.platform_wallet)
-            
             if sell_response.result.get('validated') and sell_response.result.get('meta', {}).get('TransactionResult') == 'tesSUCCESS':
-                return True
+                # The buyer accepts this offer index to receive the NFT
+                return self.extract_offer_id(sell_response.result.get('meta', {}))
             else:
                 return False
                 
@@ -115,57 +752,144 @@ class XRPLService:
         """
         Extract NFT ID from mint transaction response
         """
+        return self.extract_nft_id(response.result.get('meta', {}))
+    
+    def extract_nft_id(self, meta):
+        """
+        Extract NFT ID from mint transaction metadata
+        """
         try:
-            meta = response.result.get('meta', {})
-            created_nodes = meta.get('CreatedNodes', [])
-            
-            for node in created_nodes:
-                if node.get('CreatedNode', {}).get('LedgerEntryType') == 'NFTokenPage':
-                    nftoken_page = node.get('CreatedNode', {}).get('NewFields', {})
-                    nftokens = nftoken_page.get('NFTokens', [])
-                    if nftokens:
-                        return nftokens[0].get('NFToken', {}).get('NFTokenID')
-            
-            return None
+            return get_nftoken_id(meta)
         except Exception as e:
             print(f"Error extracting NFT ID: {str(e)}")
             return None
     
+    @staticmethod
+    def extract_offer_id(meta):
+        """
+        Extract the NFTokenOffer index created by an NFTokenCreateOffer
+        """
+        for node in meta.get('AffectedNodes', []):
+            created_node = node.get('CreatedNode', {})
+            if created_node.get('LedgerEntryType') == 'NFTokenOffer':
+                return created_node.get('LedgerIndex')
+        return None
+    
+    def validated_ledger_index(self):
+        """
+        Index of the latest validated ledger, from a node so it can't lag
+        behind the account data read after it
+        """
+        info = self.client.request(ServerInfo())
+        if not info.is_successful():
+            raise RuntimeError("Failed to fetch the validated ledger index")
+        return info.result.get('info', {}).get('validated_ledger', {}).get('seq')
+
+    def get_transaction(self, tx_hash):
+        """
+        A transaction's validated result, or None if it isn't in a validated ledger
+        """
+        response = self.client.request(Tx(transaction=tx_hash))
+        if response.is_successful() and response.result.get('validated'):
+            return response.result
+        return None
+
+    @timed_operation('get_user_nfts')
     def get_user_nfts(self, wallet_address):
         """
-        Get all NFTs owned by a wallet address
+        Get all NFTs owned by a wallet address (following pagination markers)
         """
         try:
-            request = AccountNFTs(account=wallet_address)
-            response = self.client.request(request)
-            
-            if response.is_successful():
-                return {
-                    'success': True,
-                    'nfts': response.result.get('account_nfts', [])
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': 'Failed to fetch NFTs'
-                }
+            nfts = []
+            for page in self._iter_account_nfts(wallet_address):
+                nfts.extend(page)
+            return {
+                'success': True,
+                'nfts': nfts
+            }
         except Exception as e:
             return {
                 'success': False,
                 'error': str(e)
             }
     
-    def verify_nft_ownership(self, nft_id, wallet_address):
+    def get_sell_offers(self, account):
+        """
+        Every NFTokenOffer an account owns (following pagination markers)
         """
-        Verify if a wallet owns a specific NFT
+        offers = []
+        marker = None
+        while True:
+            response = self.client.request(AccountObjects(
+                account=account, type=AccountObjectType.NFT_OFFER, limit=400, marker=marker
+            ))
+            if not response.is_successful():
+                raise RuntimeError(f"Failed to fetch offers for {account}")
+            offers.extend(response.result.get('account_objects', []))
+            marker = response.result.get('marker')
+            if not marker:
+                return offers
+
+    def _iter_account_nfts(self, wallet_address):
+        marker = None
+        while True:
+            response = self.client.request(AccountNFTs(account=wallet_address, limit=400, marker=marker))
+            if not response.is_successful():
+                raise RuntimeError('Failed to fetch NFTs')
+            yield response.result.get('account_nfts', [])
+            marker = response.result.get('marker')
+            if not marker:
+                return
+    
+    def verify_nft_ownership(self, nft_id, wallet_address, verify_on_ledger=False):
+        """
+        Verify if a wallet owns a specific NFT issued by the platform.
+        Inside the app this answers from the local ownership index; pass
+        verify_on_ledger=True to always ask the ledger.
+        """
+        if not verify_on_ledger and has_app_context():
+            from app.services.nft_index import verify_ownership
+            try:
+                return verify_ownership(self, nft_id, wallet_address)
+            except Exception as e:
+                print(f"Error reading NFT ownership index: {str(e)}")
+        return self.verify_nft_ownership_on_ledger(nft_id, wallet_address)
+    
+    @timed_operation('verify_nft_ownership_on_ledger')
+    def verify_nft_ownership_on_ledger(self, nft_id, wallet_address):
+        """
+        Verify ownership with AccountNFTs, stopping at the first page that has the NFT
         """
         try:
-            user_nfts = self.get_user_nfts(wallet_address)
-            if user_nfts['success']:
-                for nft in user_nfts['nfts']:
+            if not self.is_platform_nft(nft_id):
+                return False
+
+            for page in self._iter_account_nfts(wallet_address):
+                for nft in page:
                     if nft.get('NFTokenID') == nft_id:
                         return True
             return False
         except Exception as e:
             print(f"Error verifying NFT ownership: {str(e)}")
             return False
+
+
+_service = None
+_service_pid = None
+_service_lock = threading.Lock()
+
+
+def get_xrpl_service():
+    """
+    The process-wide XRPLService, built on first use. Threads, sockets and
+    HTTP sessions don't survive a fork, so a forked worker that inherited
+    its parent's service builds its own instead.
+    """
+    global _service, _service_pid
+    if _service is not None and _service_pid == os.getpid():
+        return _service
+    with _service_lock:
+        if _service is None or _service_pid != os.getpid():
+            _service = XRPLService()
+            _service_pid = os.getpid()
+        return _service
@@ -0,0 +1,189 @@
+from xrpl.asyncio.clients.client import REQUEST_TIMEOUT
+from xrpl.asyncio.clients.exceptions import XRPLRequestFailureException
+from xrpl.asyncio.clients.utils import json_to_response, request_to_json_rpc
+from xrpl.clients.sync_client import SyncClient
+from xrpl.models.requests import ServerInfo
+from app.services.metrics import metrics
+import httpx
+import threading
+import time
+
+
+RPC_DURATION = metrics.histogram('xrpl_rpc_duration_seconds', "rippled JSON-RPC round trip time", ['method', 'node'])
+RPC_ERRORS = metrics.counter('xrpl_rpc_errors_total', "rippled JSON-RPC requests that failed", ['method', 'node', 'error'])
+
+
+class RpcNode:
+    """
+    One rippled JSON-RPC endpoint with a persistent keep-alive session and
+    latency/health bookkeeping
+    """
+
+    # Weight of the newest sample in the latency moving average
+    LATENCY_ALPHA = 0.3
+    # Consecutive failures before a node is taken out of rotation
+    MAX_FAILURES = 3
+
+    def __init__(self, url, timeout=REQUEST_TIMEOUT):
+        self.url = url
+        self.session = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60)
+        )
+        self.latency = None
+        self.healthy = True
+        self.failures = 0
+        self.requests = 0
+        self.errors = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def post(self, payload, timeout):
+        method = payload.get('method', '')
+        started = time.perf_counter()
+        try:
+            response = self.session.post(self.url, json=payload, timeout=timeout)
+        except httpx.HTTPError:
+            RPC_ERRORS.inc(method=method, node=self.url, error='connection')
+            raise
+        elapsed = time.perf_counter() - started
+        RPC_DURATION.observe(elapsed, method=method, node=self.url)
+        if response.status_code >= 500:
+            RPC_ERRORS.inc(method=method, node=self.url, error=f"http_{response.status_code}")
+            raise httpx.HTTPStatusError(
+                f"{self.url} answered {response.status_code}", request=response.request, response=response
+            )
+        self.record_success(elapsed)
+        return response
+
+    def record_success(self, elapsed):
+        with self._lock:
+            self.requests += 1
+            self.failures = 0
+            self.healthy = True
+            if self.latency is None:
+                self.latency = elapsed
+            else:
+                self.latency = self.LATENCY_ALPHA * elapsed + (1 - self.LATENCY_ALPHA) * self.latency
+
+    def record_failure(self, error):
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            self.failures += 1
+            self.last_error = str(error)[:200]
+            if self.failures >= self.MAX_FAILURES:
+                self.healthy = False
+
+    def rank(self):
+        # Healthy nodes first, then fastest; unmeasured nodes are tried before slow ones
+        return (not self.healthy, self.latency if self.latency is not None else 0)
+
+    def to_json(self):
+        with self._lock:
+            return {
+                'url': self.url,
+                'healthy': self.healthy,
+                'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+                'requests': self.requests,
+                'errors': self.errors,
+                'last_error': self.last_error
+            }
+
+    def close(self):
+        self.session.close()
+
+
+class PooledJsonRpcClient(SyncClient):
+    """
+    xrpl-py sync client that spreads requests over several rippled nodes.
+
+    Each request goes to the fastest healthy node and fails over to the
+    next one on connection errors, timeouts, 5xx answers or rippled
+    overload errors, so a multi-request operation like submit_and_wait
+    survives a node dropping out halfway through. A background thread
+    probes every node with server_info to keep health and latency current.
+    """
+
+    # rippled errors that mean "ask another server"
+    FAILOVER_ERRORS = {'tooBusy', 'noNetwork', 'noCurrent', 'noClosed', 'amendmentBlocked', 'slowDown'}
+    HEALTHY_STATES = {'full', 'proposing', 'validating'}
+
+    def __init__(self, urls, timeout=REQUEST_TIMEOUT, probe_interval=15):
+        if not urls:
+            raise ValueError("PooledJsonRpcClient needs at least one URL")
+        super().__init__(urls[0])
+        self.nodes = [RpcNode(url, timeout) for url in urls]
+        self.timeout = timeout
+        self.probe_interval = probe_interval
+        self._probe_thread = None
+        metrics.gauge('xrpl_node_healthy', "1 while a rippled node is in rotation", ['node'],
+                      callback=lambda: {(node.url,): int(node.healthy) for node in self.nodes})
+        metrics.gauge('xrpl_node_latency_seconds', "Moving average rippled round trip time", ['node'],
+                      callback=lambda: {(node.url,): node.latency or 0 for node in self.nodes})
+
+    async def _request_impl(self, request, *, timeout=REQUEST_TIMEOUT):
+        payload = request_to_json_rpc(request)
+        last_error = None
+
+        for node in self.ranked_nodes():
+            try:
+                response = node.post(payload, timeout)
+                result = response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                node.record_failure(e)
+                last_error = e
+                continue
+
+            error = result.get('result', {}).get('error')
+            if error in self.FAILOVER_ERRORS:
+                RPC_ERRORS.inc(method=payload.get('method', ''), node=node.url, error=error)
+                node.record_failure(error)
+                last_error = error
+                continue
+
+            # Remember which node served us, for logs and xrpl-py's own use
+            self.url = node.url
+            return json_to_response(result)
+
+        raise XRPLRequestFailureException({
+            'error': 'noHealthyNode',
+            'error_message': f"All XRPL nodes failed, last error: {last_error}"
+        })
+
+    def ranked_nodes(self):
+        return sorted(self.nodes, key=lambda node: node.rank())
+
+    def start_health_checks(self):
+        """
+        Start the background server_info prober (idempotent)
+        """
+        if self._probe_thread is not None or len(self.nodes) < 2:
+            return
+        self._probe_thread = threading.Thread(target=self._run_health_checks, name="xrpl-health-check", daemon=True)
+        self._probe_thread.start()
+
+    def probe(self):
+        """
+        Probe every node once and update its health and latency
+        """
+        payload = request_to_json_rpc(ServerInfo())
+        for node in self.nodes:
+            try:
+                info = node.post(payload, self.timeout).json().get('result', {}).get('info', {})
+                if info.get('server_state') not in self.HEALTHY_STATES or info.get('complete_ledgers') in (None, 'empty'):
+                    node.record_failure(f"server_state {info.get('server_state')}")
+                    node.healthy = False
+            except (httpx.HTTPError, ValueError) as e:
+                node.record_failure(e)
+
+    def stats(self):
+        return [node.to_json() for node in self.nodes]
+
+    def _run_health_checks(self):
+        while True:
+            try:
+                self.probe()
+            except Exception as e:
+                print(f"XRPL health check error: {str(e)}")
+            time.sleep(self.probe_interval)
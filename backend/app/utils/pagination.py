@@ -0,0 +1,117 @@
+from datetime import datetime
+from flask import request
+from urllib.parse import urlencode
+from sqlalchemy import and_, or_, literal, String
+import base64
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def parse_limit(args, default=50, maximum=200):
+    """
+    Read ?limit= and clamp it to [1, maximum]
+    """
+    limit = args.get('limit', default, type=int)
+    if limit is None:
+        raise PaginationError('limit must be an integer')
+    return max(1, min(limit, maximum))
+
+
+def encode_cursor(created_at, row_id):
+    raw = f"{created_at.isoformat()}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode('utf-8').split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise PaginationError('Invalid cursor')
+
+
+def parse_date(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise PaginationError(f"{name} must be a YYYY-MM-DD date")
+
+
+def parse_int(args, name):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise PaginationError(f"{name} must be an integer")
+
+
+def set_next_cursor(response, next_cursor):
+    """
+    Advertise the next page in X-Next-Cursor and a Link header; the body stays a plain list
+    """
+    if not next_cursor:
+        return
+    response.headers['X-Next-Cursor'] = next_cursor
+    next_url = request.base_url + '?' + urlencode({**request.args.to_dict(), 'cursor': next_cursor})
+    response.headers['Link'] = f'<{next_url}>; rel="next"'
+
+
+def bind_timestamp(query, value):
+    """
+    value as a parameter to compare query's created_at columns with
+    """
+    # SQLite stores server_default timestamps as 'YYYY-MM-DD HH:MM:SS' text, while a
+    # bound datetime is rendered with microseconds; compare in the stored format
+    if query.session.get_bind().dialect.name == 'sqlite':
+        text = value.strftime('%Y-%m-%d %H:%M:%S')
+        if value.microsecond:
+            text += value.strftime('.%f')
+        return literal(text, String)
+    return value
+
+
+def keyset_page(query, model, cursor=None, limit=50, descending=True):
+    """
+    Return (rows, next_cursor) for one page of query ordered by (created_at, id).
+
+    Each page continues strictly after the cursor row, so with an index on
+    (..., created_at, id) the database does a range scan instead of sorting
+    the whole table.
+    """
+    created_at_column, id_column = model.created_at, model.id
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        created_at_value = bind_timestamp(query, created_at)
+        if descending:
+            query = query.filter(or_(
+                created_at_column < created_at_value,
+                and_(created_at_column == created_at_value, id_column < row_id)
+            ))
+        else:
+            query = query.filter(or_(
+                created_at_column > created_at_value,
+                and_(created_at_column == created_at_value, id_column > row_id)
+            ))
+
+    if descending:
+        query = query.order_by(created_at_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(created_at_column.asc(), id_column.asc())
+
+    # Fetch one extra row to know whether there is a next page
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return rows, next_cursor
@@ -3,26 +3,23 @@
 Database initialization script for RippleGate
 """
 
-from app import create_app, db
-from app.models import User, Event, Ticket
+from app import create_app
+from app.services import database
 
 def init_database():
     """Initialize the database with all tables"""
     app = create_app()
     
     with app.app_context():
-        # Drop all existing tables and recreate them
-        print("Dropping existing tables...")
-        db.drop_all()
-        
-        print("Creating new tables...")
-        db.create_all()
+        # Drop all existing tables (and the search index) and recreate them
+        print("Dropping existing tables and recreating them...")
+        tables = database.reset()
         
         print("Database initialized successfully!")
         print("Tables created:")
-        print("- users")
-        print("- events") 
-        print("- tickets")
+        for table in tables:
+            print(f"- {table}")
+        print("- event search index")
 
 if __name__ == "__main__":
-    init_database() 
\ No newline at end of file
+    init_database()
@@ -0,0 +1,42 @@
+"""
+Shared fixtures: one app on a throwaway SQLite database, with no mint
+workers and no XRPL connections.
+
+Run from backend/: python -m pytest tests
+"""
+import os
+import tempfile
+
+import pytest
+
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), 'tests.db')
+os.environ.setdefault('JWT_SECRET', 'test-secret')
+os.environ['DATABASE_URL'] = f"sqlite:///{DATABASE_PATH}"
+
+from app import create_app, db  # noqa: E402
+from app.services.catalogue import event_catalogue  # noqa: E402
+from app.services.mint_queue import mint_queue  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    # No mint workers or XRPL connections; tests drive the queue directly
+    mint_queue._started = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture
+def clean_db(app):
+    """
+    An empty database for the test
+    """
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    event_catalogue.backend.clear()
+    return app
@@ -0,0 +1,45 @@
+"""
+Purchase Idempotency-Keys: an expired bulk order is forgotten as a whole.
+
+Run from backend/: python -m pytest tests
+"""
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import db
+from app.models import Event, Ticket, User
+from app.services.idempotency import clear_expired_keys, find_purchase, ticket_keys
+
+
+def test_sweep_clears_a_bulk_order_straddling_the_limit(clean_db):
+    with clean_db.app_context():
+        host = User(email='host@example.com', password='x', wallet_address='rHost', profile_picture='')
+        buyer = User(email='buyer@example.com', password='x', wallet_address='rBuyer', profile_picture='')
+        db.session.add_all([host, buyer])
+        db.session.flush()
+        event = Event(
+            title='Event', location='Venue', description='', tickets=100, price=10,
+            image='', date=datetime(2030, 2, 1), time=datetime(2030, 2, 1, 20), host_id=host.id
+        )
+        db.session.add(event)
+        db.session.flush()
+        expired = [
+            Ticket(event_id=event.id, user_id=buyer.id, price=10, status='confirmed', idempotency_key=key)
+            for key in ticket_keys('order', 3)
+        ]
+        fresh = Ticket(event_id=event.id, user_id=buyer.id, price=10, status='confirmed', idempotency_key='recent')
+        db.session.add_all(expired + [fresh])
+        db.session.flush()
+        db.session.execute(
+            text("UPDATE ticket SET created_at = '2020-01-01 00:00:00' WHERE idempotency_key LIKE 'order:%'")
+        )
+        db.session.commit()
+
+        # Two rows per sweep, but the third ticket of the order goes with them
+        assert clear_expired_keys(limit=2) == 3
+        assert Ticket.query.filter(Ticket.idempotency_key.isnot(None)).count() == 1
+
+        # A retry with the expired key is a new purchase, not a conflict
+        assert find_purchase(buyer.id, 'order', event.id, 3) is None
+        assert find_purchase(buyer.id, 'recent', event.id) == [fresh]
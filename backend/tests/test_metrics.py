@@ -0,0 +1,29 @@
+"""
+SQL timing in the metrics registry.
+
+Run from backend/: python -m pytest tests
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.services.metrics import metrics
+
+
+def select_count():
+    return dict(metrics.query_duration.samples()).get(('SELECT',), {}).get('count', 0)
+
+
+def test_failed_statement_leaves_no_start_time_behind(app):
+    with app.app_context():
+        with db.engine.connect() as connection:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    connection.execute(text("SELECT * FROM no_such_table"))
+            assert 'query_started' not in connection.info
+
+            timed = select_count()
+            connection.execute(text("SELECT 1"))
+            assert 'query_started' not in connection.info
+            assert select_count() == timed + 1
@@ -0,0 +1,114 @@
+"""
+A mint whose outcome the platform can't confirm must keep its seat and
+Ticket until reconciliation finds out whether it validated.
+
+Run from backend/: python -m pytest tests
+"""
+import time
+from collections import deque
+from datetime import datetime
+
+import httpx
+import pytest
+import xrpl
+from xrpl.models.transactions import Transaction
+
+from app import db
+from app.models import Event, MintJob, Reservation, Ticket, User
+from app.services import xrp
+from app.services.inventory import reserve_seats
+from app.services.mint_queue import mint_queue
+
+
+@pytest.fixture
+def xrpl_service(monkeypatch):
+    """
+    An XRPLService without a ledger stream, so mints go through
+    submit_and_wait, holding every pool wallet lease with a few Tickets
+    """
+    monkeypatch.setenv('XRPL_WS_URLS', '')
+    service = xrp.XRPLService()
+    service._started = True
+    for minter in service.minters:
+        minter.lease_until = time.monotonic() + 3600
+        minter.ticket_pool._available = deque(range(100, 110))
+        minter.ticket_pool._loaded = True
+        minter.ticket_pool.low_water = 0
+
+    def prepare(transaction, wallet):
+        transaction_json = {**transaction.to_dict(), 'fee': '12', 'last_ledger_sequence': 1000}
+        return xrpl.transaction.sign(Transaction.from_dict(transaction_json), wallet)
+
+    monkeypatch.setattr(service.tx_preparer, 'prepare', prepare)
+    monkeypatch.setattr(xrp, '_service', service)
+    monkeypatch.setattr(xrp, '_service_pid', xrp.os.getpid())
+    return service
+
+
+@pytest.fixture
+def running_job(clean_db):
+    """
+    One held seat and its claimed mint job; returns (job id, event id)
+    """
+    with clean_db.app_context():
+        host = User(email='host@example.com', password='x', wallet_address='rHost', profile_picture='')
+        buyer = User(email='buyer@example.com', password='x', wallet_address='rBuyer', profile_picture='')
+        db.session.add_all([host, buyer])
+        db.session.flush()
+        event = Event(
+            title='Event', location='Venue', description='', tickets=10, price=10,
+            image='', date=datetime(2030, 1, 1), time=datetime(2030, 1, 1, 20), host_id=host.id
+        )
+        db.session.add(event)
+        db.session.flush()
+        ticket = Ticket(event_id=event.id, user_id=buyer.id, price=10, status='pending')
+        db.session.add(ticket)
+        db.session.flush()
+        reserve_seats(event.id, [ticket])
+        job = MintJob(ticket_id=ticket.id, status='running', attempts=1, locked_at=datetime.utcnow())
+        db.session.add(job)
+        db.session.commit()
+        return job.id, event.id
+
+
+@pytest.mark.parametrize('error', [
+    httpx.ConnectError('connection dropped'),
+    xrpl.clients.XRPLRequestFailureException({'error': 'noHealthyNode', 'error_message': 'No healthy node'}),
+])
+def test_fallback_error_after_signing_leaves_the_job_stale(clean_db, xrpl_service, running_job, monkeypatch, error):
+    def submit_and_wait(transaction, client):
+        raise error
+
+    monkeypatch.setattr(xrpl.transaction, 'submit_and_wait', submit_and_wait)
+    job_id, event_id = running_job
+    minter = xrpl_service.minters[0]
+
+    with clean_db.app_context():
+        mint_queue._process_jobs([job_id])
+
+        job = db.session.get(MintJob, job_id)
+        assert job.status == 'stale', job.last_error
+        assert job.transaction_hash
+        assert Reservation.query.filter_by(ticket_id=job.ticket_id).one().status == 'held'
+        assert db.session.get(Event, event_id).tickets == 9
+        assert db.session.get(Ticket, job.ticket_id).status == 'pending'
+
+    # The Ticket the mint was signed with is neither reused nor still counted in use
+    assert 100 not in minter.ticket_pool._available
+    assert not minter.ticket_pool._in_use
+
+
+def test_fallback_rejection_fails_the_job_and_releases_the_seat(clean_db, xrpl_service, running_job, monkeypatch):
+    def submit_and_wait(transaction, client):
+        raise xrpl.transaction.XRPLReliableSubmissionException('Transaction failed: tecINSUFFICIENT_RESERVE')
+
+    monkeypatch.setattr(xrpl.transaction, 'submit_and_wait', submit_and_wait)
+    job_id, event_id = running_job
+
+    with clean_db.app_context():
+        mint_queue._process_jobs([job_id])
+
+        job = db.session.get(MintJob, job_id)
+        assert job.status == 'failed'
+        assert Reservation.query.filter_by(ticket_id=job.ticket_id).one().status == 'released'
+        assert db.session.get(Event, event_id).tickets == 10
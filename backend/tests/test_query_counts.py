@@ -0,0 +1,95 @@
+"""
+The list and dashboard endpoints must not issue a query per row: the
+number of SQL statements a request makes stays the same as the data grows.
+
+Run from backend/: python -m pytest tests
+"""
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event as sqlalchemy_event
+
+from app import db
+from app.models import Event, Ticket, User
+from app.services.auth import auth_manager
+from app.services.catalogue import event_catalogue
+
+SMALL, LARGE = 3, 30
+
+
+@pytest.fixture
+def seed(app):
+    """
+    seed(n) resets the database to one host, one buyer, n events and n
+    tickets per event for the buyer; returns (host, buyer) ids
+    """
+    def seed(n):
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            host = User(email='host@example.com', password='x', wallet_address='rHost', profile_picture='')
+            buyer = User(email='buyer@example.com', password='x', wallet_address='rBuyer', profile_picture='')
+            db.session.add_all([host, buyer])
+            db.session.flush()
+            events = [
+                Event(
+                    title=f"Event {index}", location=f"Venue {index}", description='', tickets=100, price=10,
+                    image='', date=datetime(2030, 1, 1), time=datetime(2030, 1, 1, 20), host_id=host.id
+                )
+                for index in range(n)
+            ]
+            db.session.add_all(events)
+            db.session.flush()
+            db.session.add_all([
+                Ticket(event_id=event.id, user_id=buyer.id, price=10, status='confirmed')
+                for event in events for _ in range(n)
+            ])
+            db.session.commit()
+            ids = host.id, buyer.id
+        event_catalogue.backend.clear()
+        return ids
+    return seed
+
+
+def count_queries(app, path, user_id=None):
+    """
+    SQL statements the request thread issues while serving path
+    """
+    client = app.test_client()
+    if user_id is not None:
+        with app.test_request_context():
+            client.set_cookie('token', auth_manager.issue_token(db.session.get(User, user_id)))
+
+    request_thread = threading.get_ident()
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == request_thread:
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    sqlalchemy_event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(path)
+    finally:
+        sqlalchemy_event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return len(statements)
+
+
+@pytest.mark.parametrize('path, as_host', [
+    ('/api/event/?limit=100', False),
+    ('/api/event/mine/stats', True),
+    ('/api/tickets/user/{buyer}?limit=100', False),
+    ('/api/tickets/user/{buyer}?limit=100&view=slim', False),
+    ('/api/tickets/user/{buyer}/stats', False),
+])
+def test_query_count_does_not_grow_with_rows(app, seed, path, as_host):
+    counts = []
+    for n in (SMALL, LARGE):
+        host, buyer = seed(n)
+        counts.append(count_queries(app, path.format(buyer=buyer), user_id=host if as_host else None))
+    assert counts[0] > 0, f"{path}: no queries counted"
+    assert counts[0] == counts[1], f"{path}: {counts[0]} queries for {SMALL} rows, {counts[1]} for {LARGE}"
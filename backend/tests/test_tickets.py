@@ -0,0 +1,106 @@
+"""
+Ticket routes: list filters and purchase body validation.
+
+Run from backend/: python -m pytest tests
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from app import db
+from app.models import Event, Ticket, User
+from app.services.auth import auth_manager
+
+
+@pytest.fixture
+def buyer_tickets(clean_db):
+    """
+    A buyer with one ticket per created_at below, stored the way the
+    server default writes them; returns the buyer id
+    """
+    created = ['2030-01-01 23:59:59', '2030-01-02 00:00:00', '2030-01-02 23:59:59', '2030-01-03 00:00:00']
+    with clean_db.app_context():
+        host = User(email='host@example.com', password='x', wallet_address='rHost', profile_picture='')
+        buyer = User(email='buyer@example.com', password='x', wallet_address='rBuyer', profile_picture='')
+        db.session.add_all([host, buyer])
+        db.session.flush()
+        event = Event(
+            title='Event', location='Venue', description='', tickets=100, price=10,
+            image='', date=datetime(2030, 2, 1), time=datetime(2030, 2, 1, 20), host_id=host.id
+        )
+        db.session.add(event)
+        db.session.flush()
+        tickets = [Ticket(event_id=event.id, user_id=buyer.id, price=10, status='confirmed') for _ in created]
+        db.session.add_all(tickets)
+        db.session.flush()
+        for ticket, created_at in zip(tickets, created):
+            db.session.execute(
+                text("UPDATE ticket SET created_at = :created_at WHERE id = :id"),
+                {'created_at': created_at, 'id': ticket.id}
+            )
+        db.session.commit()
+        return buyer.id
+
+
+def test_date_filters_include_midnight_on_the_first_day_only(clean_db, buyer_tickets):
+    response = clean_db.test_client().get(
+        f"/api/tickets/user/{buyer_tickets}?date_from=2030-01-02&date_to=2030-01-02&view=slim"
+    )
+    assert response.status_code == 200, response.get_data(as_text=True)
+    created = sorted(ticket['created_at'] for ticket in response.get_json())
+    assert [value[:19].replace('T', ' ') for value in created] == ['2030-01-02 00:00:00', '2030-01-02 23:59:59']
+
+
+@pytest.fixture
+def buyer_client(clean_db):
+    """
+    A test client logged in as a buyer, and an event with seats left;
+    returns (client, event id)
+    """
+    with clean_db.app_context():
+        host = User(email='host@example.com', password='x', wallet_address='rHost', profile_picture='')
+        buyer = User(email='buyer@example.com', password='x', wallet_address='rBuyer', profile_picture='')
+        db.session.add_all([host, buyer])
+        db.session.flush()
+        event = Event(
+            title='Event', location='Venue', description='', tickets=100, price=10,
+            image='', date=datetime(2030, 2, 1), time=datetime(2030, 2, 1, 20), host_id=host.id
+        )
+        db.session.add(event)
+        db.session.commit()
+        event_id = event.id
+        client = clean_db.test_client()
+        with clean_db.test_request_context():
+            client.set_cookie('token', auth_manager.issue_token(buyer))
+    return client, event_id
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/api/tickets/buy', {'event_id': True}),
+    ('/api/tickets/buy', {'event_id': '1x'}),
+    ('/api/tickets/buy', {'event_id': {'id': 1}}),
+    ('/api/tickets/buy/bulk', {'event_id': '{event_id}', 'quantity': True}),
+    ('/api/tickets/buy/bulk', {'event_id': '{event_id}', 'quantity': 2.5}),
+    ('/api/tickets/buy/bulk', {'event_id': '{event_id}', 'quantity': -1}),
+    ('/api/tickets/buy/bulk', {'event_id': '{event_id}', 'quantity': [2]}),
+    ('/api/tickets/buy/bulk', {'event_id': '{event_id}', 'quantity': 0}),
+    ('/api/tickets/buy/bulk', {'event_id': True, 'quantity': 2}),
+])
+def test_purchase_rejects_malformed_bodies(clean_db, buyer_client, path, body):
+    client, event_id = buyer_client
+    body = {name: event_id if value == '{event_id}' else value for name, value in body.items()}
+    response = client.post(path, json=body)
+    assert response.status_code == 400, response.get_data(as_text=True)
+    with clean_db.app_context():
+        assert Ticket.query.count() == 0
+        assert db.session.get(Event, event_id).tickets == 100
+
+
+def test_bulk_purchase_accepts_an_integer_quantity(clean_db, buyer_client):
+    client, event_id = buyer_client
+    response = client.post('/api/tickets/buy/bulk', json={'event_id': event_id, 'quantity': 3})
+    assert response.status_code == 202, response.get_data(as_text=True)
+    with clean_db.app_context():
+        assert Ticket.query.count() == 3
+        assert db.session.get(Event, event_id).tickets == 97
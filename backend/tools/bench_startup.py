@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the RippleGate backend.
+
+Each run starts a fresh interpreter (so nothing is cached in sys.modules)
+and times the steps a pre-fork worker, CLI command or test goes through:
+importing the app package, create_app(), the first request (which starts
+the mint workers), and building the XRPL service on first use. It also
+records which heavy modules each step pulled in. Reports the median of
+--runs and can fail when boot time regresses.
+
+    python -m tools.bench_startup --runs 7
+    python -m tools.bench_startup --output startup.json --max-boot-ms 400
+"""
+
+from datetime import datetime, timezone
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON line of timings
+PROBE = r"""
+import json, sys, time
+
+def loaded():
+    return {name: name in sys.modules for name in ('xrpl', 'websockets', 'bcrypt', 'httpx')}
+
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+after_import = loaded()
+
+application = app.create_app()
+created = time.perf_counter()
+after_create = loaded()
+
+client = application.test_client()
+response = client.get('/api/event/?limit=1')
+first_request = time.perf_counter()
+after_request = loaded()
+
+from app.services.xrp import get_xrpl_service
+get_xrpl_service()
+service_built = time.perf_counter()
+
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'boot_ms': (created - started) * 1000,
+    'first_request_ms': (first_request - created) * 1000,
+    'first_request_status': response.status_code,
+    'xrpl_service_ms': (service_built - first_request) * 1000,
+    'loaded_after_import': after_import,
+    'loaded_after_create_app': after_create,
+    'loaded_after_first_request': after_request,
+}))
+"""
+
+TIMINGS = ['import_ms', 'create_app_ms', 'boot_ms', 'first_request_ms', 'xrpl_service_ms']
+
+
+def run_probe(env):
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    # Startup output from the app (prints, warnings) comes before the JSON line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time a cold import and boot of the backend")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--output', default=None, help="write the results as JSON")
+    parser.add_argument('--max-boot-ms', type=float, default=None, help="exit non-zero if the median boot takes longer")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='ripplegate-startup-')
+    env = dict(
+        os.environ,
+        DATABASE_URL='sqlite:///' + os.path.join(workdir, 'startup.db'),
+        JWT_SECRET=os.getenv('JWT_SECRET', 'bench-secret'),
+        # Nothing in the probe should reach the network; unroutable URLs make sure of it
+        XRPL_RPC_URLS='http://127.0.0.1:9/',
+        XRPL_WS_URLS='',
+        MINT_WORKERS='0',
+    )
+
+    # One throwaway run creates the database file, so every timed run sees the same state
+    run_probe(env)
+    runs = [run_probe(env) for _ in range(args.runs)]
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'runs': args.runs,
+            'python': sys.version.split()[0]
+        },
+        'median': {name: round(statistics.median(run[name] for run in runs), 1) for name in TIMINGS},
+        'min': {name: round(min(run[name] for run in runs), 1) for name in TIMINGS},
+        'loaded_after_import': runs[-1]['loaded_after_import'],
+        'loaded_after_create_app': runs[-1]['loaded_after_create_app'],
+        'loaded_after_first_request': runs[-1]['loaded_after_first_request'],
+    }
+
+    for name in TIMINGS:
+        print(f"{name:<18} median {results['median'][name]:>8.1f}  min {results['min'][name]:>8.1f}")
+    for step in ('loaded_after_import', 'loaded_after_create_app', 'loaded_after_first_request'):
+        heavy = [name for name, loaded in results[step].items() if loaded]
+        print(f"{step:<27} {', '.join(heavy) or '-'}")
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.max_boot_ms is not None and results['median']['boot_ms'] > args.max_boot_ms:
+        print(f"Median boot {results['median']['boot_ms']}ms is over the {args.max_boot_ms}ms budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for rippled's WebSocket subscription API.
+
+Either follows a FakeLedger (from tools.fake_rippled) and pushes
+ledgerClosed/transaction messages as it closes ledgers, or replays a
+recorded JSON-lines file of stream messages to every subscriber.
+
+    python -m tools.fake_ledger_stream --port 6006 --rpc-port 5005
+    python -m tools.fake_ledger_stream --port 6006 --replay messages.jsonl
+"""
+
+from tools.fake_rippled import FakeLedger, FakeRippledServer, add_fault_arguments, parse_failure_rates
+import argparse
+import asyncio
+import json
+import threading
+import time
+import websockets
+
+
+class FakeLedgerStreamServer:
+    def __init__(self, ledger=None, host='127.0.0.1', port=0, replay=None, replay_interval=0.5):
+        self.ledger = ledger
+        self.host = host
+        self.port = port
+        self.replay = replay or []
+        self.replay_interval = replay_interval
+        self.loop = None
+        self.server = None
+        self.connections = {}
+        self._ready = threading.Event()
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}/"
+
+    def start(self):
+        threading.Thread(target=self._run_loop, name="fake-ledger-stream", daemon=True).start()
+        self._ready.wait()
+        if self.ledger is not None:
+            self.ledger.listeners.append(self._on_ledger_closed)
+            self.ledger.start()
+        return self
+
+    def stop(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.server.close)
+
+    def drop_connections(self):
+        """
+        Close every client connection, to exercise reconnect logic
+        """
+        for websocket in list(self.connections):
+            asyncio.run_coroutine_threadsafe(websocket.close(), self.loop)
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(websockets.serve(self._handle, self.host, self.port))
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self.loop.run_forever()
+
+    async def _handle(self, websocket):
+        subscription = {'ledger': False, 'accounts': set()}
+        self.connections[websocket] = subscription
+        try:
+            async for raw in websocket:
+                request = json.loads(raw)
+                command = request.get('command')
+                if command == 'subscribe':
+                    subscription['ledger'] = subscription['ledger'] or 'ledger' in request.get('streams', [])
+                    subscription['accounts'].update(request.get('accounts', []))
+                    result = {}
+                    if self.ledger is not None:
+                        result = {'ledger_index': self.ledger.validated_index, 'validated_ledgers': f"1-{self.ledger.validated_index}"}
+                    await websocket.send(json.dumps({'id': request.get('id'), 'type': 'response', 'status': 'success', 'result': result}))
+                    if self.replay:
+                        asyncio.ensure_future(self._replay(websocket))
+                elif self.ledger is not None:
+                    params = {key: value for key, value in request.items() if key not in ('id', 'command')}
+                    result = self.ledger.handle(command, params)
+                    status = 'error' if 'error' in result else 'success'
+                    await websocket.send(json.dumps({'id': request.get('id'), 'type': 'response', 'status': status, 'result': result}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.connections.pop(websocket, None)
+
+    async def _replay(self, websocket):
+        for message in self.replay:
+            await asyncio.sleep(self.replay_interval)
+            try:
+                await websocket.send(json.dumps(message))
+            except websockets.ConnectionClosed:
+                return
+
+    def _on_ledger_closed(self, ledger_index, applied):
+        # Called from the FakeLedger close thread
+        messages = []
+        for record in applied:
+            tx = record['tx']
+            accounts = FakeLedger._affected_accounts(tx, record['meta'])
+            messages.append((accounts, {
+                'type': 'transaction',
+                'validated': True,
+                'status': 'closed',
+                'engine_result': record['meta']['TransactionResult'],
+                'ledger_index': ledger_index,
+                'meta': record['meta'],
+                'transaction': tx
+            }))
+        ledger_message = {
+            'type': 'ledgerClosed',
+            'ledger_index': ledger_index,
+            'ledger_time': int(time.time()),
+            'fee_base': 10,
+            'txn_count': len(applied)
+        }
+        asyncio.run_coroutine_threadsafe(self._broadcast(messages, ledger_message), self.loop)
+
+    async def _broadcast(self, messages, ledger_message):
+        for websocket, subscription in list(self.connections.items()):
+            try:
+                for accounts, message in messages:
+                    if accounts & subscription['accounts']:
+                        await websocket.send(json.dumps(message))
+                if subscription['ledger']:
+                    await websocket.send(json.dumps(ledger_message))
+            except websockets.ConnectionClosed:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake rippled WebSocket subscription server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6006)
+    parser.add_argument('--rpc-port', type=int, default=5005, help="also serve the fake ledger over JSON-RPC on this port")
+    parser.add_argument('--close-interval', type=float, default=1.0, help="seconds between ledger closes")
+    parser.add_argument('--replay', help="JSON-lines file of stream messages to replay instead of a live fake ledger")
+    parser.add_argument('--replay-interval', type=float, default=0.5)
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    if args.replay:
+        with open(args.replay) as replay_file:
+            messages = [json.loads(line) for line in replay_file if line.strip()]
+        server = FakeLedgerStreamServer(host=args.host, port=args.port, replay=messages, replay_interval=args.replay_interval).start()
+    else:
+        ledger = FakeLedger(
+            close_interval=args.close_interval,
+            rpc_latency=args.rpc_latency,
+            failure_rates=parse_failure_rates(args.fail),
+            seed=args.seed
+        )
+        rpc = FakeRippledServer(ledger, host=args.host, port=args.rpc_port).start()
+        print(f"Fake rippled listening on {rpc.url}")
+        server = FakeLedgerStreamServer(ledger, host=args.host, port=args.port).start()
+
+    print(f"Fake ledger stream listening on {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
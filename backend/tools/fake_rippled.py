@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for a rippled JSON-RPC server.
+
+Keeps a tiny in-memory ledger that closes every few seconds and understands
+just enough of the XRPL for RippleGate: TicketCreate, NFTokenMint,
+NFTokenCreateOffer, NFTokenAcceptOffer and Payment, plus the read requests
+xrpl-py and XRPLService use. Point XRPL_RPC_URLS at it for local runs.
+
+For load tests it can add latency to every request and fail a share of
+transactions (with a tec result) or requests (with tooBusy), keyed by
+transaction type or RPC method:
+
+    python -m tools.fake_rippled --port 5005 --close-interval 1
+    python -m tools.fake_rippled --rpc-latency 0.05 --fail NFTokenMint=0.05 --fail account_nfts=0.1
+"""
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xrpl.core.addresscodec import decode_classic_address
+from xrpl.models.transactions.transaction import Transaction
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+
+# Starting balance for accounts the fake has never seen, in drops
+DEFAULT_BALANCE = 1000 * 1000000
+RESERVE_BASE = 10
+RESERVE_INC = 2
+# Result for transactions failed by failure injection: validated, fee and ticket consumed
+INJECTED_FAILURE = 'tecINSUFFICIENT_RESERVE'
+
+
+def nftoken_id(flags, transfer_fee, issuer, taxon, sequence):
+    """
+    Build an NFTokenID the way rippled does (including the taxon scrambling)
+    """
+    scrambled_taxon = taxon ^ ((384160001 * sequence + 2459) % 4294967296)
+    return (
+        f"{flags & 0xFFFF:04X}{transfer_fee & 0xFFFF:04X}"
+        f"{decode_classic_address(issuer).hex().upper()}"
+        f"{scrambled_taxon:08X}{sequence:08X}"
+    )
+
+
+def object_id(*parts):
+    return hashlib.sha512('|'.join(str(part) for part in parts).encode()).hexdigest()[:64].upper()
+
+
+class FakeLedger:
+    def __init__(self, close_interval=1.0, ledger_index=1000, network_id=1, rpc_latency=0.0, failure_rates=None, seed=None):
+        self.close_interval = close_interval
+        self.rpc_latency = rpc_latency
+        # {'NFTokenMint': 0.05, 'account_nfts': 0.1, ...}: share of transactions/requests to fail
+        self.failure_rates = dict(failure_rates or {})
+        self.injected_failures = Counter()
+        self.random = random.Random(seed)
+        self.validated_index = ledger_index
+        self.network_id = network_id
+        self.accounts = {}
+        self.nfts = {}
+        self.offers = {}
+        self.transactions = {}
+        self.account_transactions = {}
+        self.pending = []
+        self.listeners = []
+        # Requests served per method, to compare round trips between runs
+        self.request_counts = Counter()
+        self.lock = threading.RLock()
+        self._closer = None
+
+    @property
+    def current_index(self):
+        return self.validated_index + 1
+
+    def start(self):
+        if self._closer is None:
+            self._closer = threading.Thread(target=self._run_closer, name="fake-ledger-close", daemon=True)
+            self._closer.start()
+
+    def account(self, address):
+        if address not in self.accounts:
+            self.accounts[address] = {
+                'Account': address,
+                'Balance': DEFAULT_BALANCE,
+                'Sequence': 1,
+                'OwnerCount': 0,
+                'MintedNFTokens': 0,
+                'tickets': set()
+            }
+        return self.accounts[address]
+
+    # Submission and ledger close
+
+    def submit(self, tx_blob):
+        transaction = Transaction.from_blob(tx_blob)
+        tx_json = transaction.to_xrpl()
+        tx_hash = transaction.get_hash()
+
+        with self.lock:
+            if tx_hash in self.transactions:
+                return 'tefALREADY', tx_json, tx_hash
+
+            account = self.account(tx_json['Account'])
+            ticket_sequence = tx_json.get('TicketSequence')
+            if ticket_sequence is not None:
+                if ticket_sequence not in account['tickets']:
+                    return 'tefNO_TICKET', tx_json, tx_hash
+            elif tx_json.get('Sequence', 0) < account['Sequence']:
+                return 'tefPAST_SEQ', tx_json, tx_hash
+            elif tx_json.get('Sequence', 0) > account['Sequence'] + len([
+                tx for tx in self.pending if tx['Account'] == account['Account'] and tx.get('TicketSequence') is None
+            ]):
+                return 'terPRE_SEQ', tx_json, tx_hash
+
+            tx_json['hash'] = tx_hash
+            self.transactions[tx_hash] = {'tx': tx_json, 'validated': False, 'meta': None}
+            self.pending.append(tx_json)
+            return 'tesSUCCESS', tx_json, tx_hash
+
+    def close_ledger(self):
+        with self.lock:
+            self.validated_index += 1
+            applied = []
+            for tx_json in self.pending:
+                last_ledger = tx_json.get('LastLedgerSequence')
+                if last_ledger is not None and last_ledger < self.validated_index:
+                    # Expired: never makes it into a ledger
+                    del self.transactions[tx_json['hash']]
+                    continue
+                meta = self._apply(tx_json)
+                meta['TransactionIndex'] = len(applied)
+                record = self.transactions[tx_json['hash']]
+                record.update({'validated': True, 'meta': meta, 'ledger_index': self.validated_index})
+                for address in self._affected_accounts(tx_json, meta):
+                    self.account_transactions.setdefault(address, []).append(tx_json['hash'])
+                applied.append(record)
+            self.pending = []
+            listeners = list(self.listeners)
+            ledger_index = self.validated_index
+
+        for listener in listeners:
+            try:
+                listener(ledger_index, applied)
+            except Exception as e:
+                print(f"Fake ledger listener error: {str(e)}")
+        return ledger_index
+
+    def _run_closer(self):
+        while True:
+            time.sleep(self.close_interval)
+            self.close_ledger()
+
+    def _consume_sequence(self, account, tx_json):
+        if tx_json.get('TicketSequence') is not None:
+            account['tickets'].discard(tx_json['TicketSequence'])
+            account['OwnerCount'] -= 1
+        else:
+            account['Sequence'] += 1
+
+    def _apply(self, tx_json):
+        account = self.account(tx_json['Account'])
+        if tx_json.get('TicketSequence') is not None and tx_json['TicketSequence'] not in account['tickets']:
+            return {'TransactionResult': 'tefNO_TICKET', 'AffectedNodes': []}
+        self._consume_sequence(account, tx_json)
+        account['Balance'] -= int(tx_json.get('Fee', '10'))
+
+        if self._inject_failure(tx_json['TransactionType']):
+            return {'TransactionResult': INJECTED_FAILURE, 'AffectedNodes': []}
+
+        handler = getattr(self, f"_apply_{tx_json['TransactionType']}", None)
+        if handler is None:
+            return {'TransactionResult': 'tesSUCCESS', 'AffectedNodes': []}
+        return handler(account, tx_json)
+
+    def _apply_TicketCreate(self, account, tx_json):
+        nodes = []
+        first = account['Sequence']
+        for ticket_sequence in range(first, first + tx_json['TicketCount']):
+            account['tickets'].add(ticket_sequence)
+            nodes.append({'CreatedNode': {
+                'LedgerEntryType': 'Ticket',
+                'LedgerIndex': object_id('ticket', account['Account'], ticket_sequence),
+                'NewFields': {'Account': account['Account'], 'TicketSequence': ticket_sequence}
+            }})
+        account['Sequence'] += tx_json['TicketCount']
+        account['OwnerCount'] += tx_json['TicketCount']
+        return {'TransactionResult': 'tesSUCCESS', 'AffectedNodes': nodes}
+
+    def _apply_NFTokenMint(self, account, tx_json):
+        issuer = tx_json.get('Issuer', account['Account'])
+        sequence = account['MintedNFTokens']
+        account['MintedNFTokens'] += 1
+        token_id = nftoken_id(tx_json.get('Flags', 0), tx_json.get('TransferFee', 0), issuer, tx_json['NFTokenTaxon'], sequence)
+        self.nfts[token_id] = {'owner': account['Account'], 'issuer': issuer, 'uri': tx_json.get('URI'), 'flags': tx_json.get('Flags', 0), 'taxon': tx_json['NFTokenTaxon']}
+        account['OwnerCount'] += 1
+        nftoken = {'NFToken': {'NFTokenID': token_id, 'URI': tx_json.get('URI')}}
+        return {'TransactionResult': 'tesSUCCESS', 'nftoken_id': token_id, 'AffectedNodes': [{'CreatedNode': {
+            'LedgerEntryType': 'NFTokenPage',
+            'LedgerIndex': object_id('page', token_id),
+            'NewFields': {'NFTokens': [nftoken]}
+        }}]}
+
+    def _apply_NFTokenCreateOffer(self, account, tx_json):
+        nft = self.nfts.get(tx_json['NFTokenID'])
+        if not nft or nft['owner'] != account['Account']:
+            return {'TransactionResult': 'tecNO_ENTRY', 'AffectedNodes': []}
+        offer_id = object_id('offer', tx_json['hash'])
+        self.offers[offer_id] = {
+            'nft_offer_index': offer_id,
+            'NFTokenID': tx_json['NFTokenID'],
+            'Owner': account['Account'],
+            'Destination': tx_json.get('Destination'),
+            'Amount': tx_json.get('Amount', '0'),
+            'Flags': tx_json.get('Flags', 0)
+        }
+        account['OwnerCount'] += 1
+        return {'TransactionResult': 'tesSUCCESS', 'offer_id': offer_id, 'AffectedNodes': [{'CreatedNode': {
+            'LedgerEntryType': 'NFTokenOffer',
+            'LedgerIndex': offer_id,
+            'NewFields': {
+                'NFTokenID': tx_json['NFTokenID'],
+                'Owner': account['Account'],
+                'Destination': tx_json.get('Destination'),
+                'Amount': tx_json.get('Amount', '0'),
+                'Flags': tx_json.get('Flags', 0)
+            }
+        }}]}
+
+    def _apply_NFTokenAcceptOffer(self, account, tx_json):
+        offer = self.offers.pop(tx_json.get('NFTokenSellOffer'), None)
+        if not offer or (offer['Destination'] and offer['Destination'] != account['Account']):
+            return {'TransactionResult': 'tecOBJECT_NOT_FOUND', 'AffectedNodes': []}
+        nft = self.nfts[offer['NFTokenID']]
+        seller = self.account(offer['Owner'])
+        seller['OwnerCount'] -= 2
+        account['OwnerCount'] += 1
+        nft['owner'] = account['Account']
+        return {'TransactionResult': 'tesSUCCESS', 'AffectedNodes': [{'DeletedNode': {
+            'LedgerEntryType': 'NFTokenOffer',
+            'LedgerIndex': tx_json['NFTokenSellOffer'],
+            'FinalFields': {
+                'NFTokenID': offer['NFTokenID'],
+                'Owner': offer['Owner'],
+                'Destination': offer['Destination'],
+                'Amount': offer['Amount'],
+                'Flags': offer['Flags']
+            }
+        }}]}
+
+    def _apply_Payment(self, account, tx_json):
+        amount = tx_json.get('Amount')
+        if isinstance(amount, str):
+            account['Balance'] -= int(amount)
+            self.account(tx_json['Destination'])['Balance'] += int(amount)
+        return {'TransactionResult': 'tesSUCCESS', 'AffectedNodes': []}
+
+    @staticmethod
+    def _affected_accounts(tx_json, meta):
+        accounts = {tx_json['Account']}
+        if tx_json.get('Destination'):
+            accounts.add(tx_json['Destination'])
+        for node in meta.get('AffectedNodes', []):
+            fields = next(iter(node.values())).get('FinalFields') or next(iter(node.values())).get('NewFields') or {}
+            if fields.get('Owner'):
+                accounts.add(fields['Owner'])
+        return accounts
+
+    # Read requests
+
+    def handle(self, method, params):
+        handler = getattr(self, f"rpc_{method}", None)
+        if handler is None:
+            return {'error': 'unknownCmd', 'error_message': f"Unknown method {method}"}
+        if self.rpc_latency:
+            time.sleep(self.rpc_latency)
+        with self.lock:
+            self.request_counts[method] += 1
+            if self._inject_failure(method):
+                return {'error': 'tooBusy', 'error_message': 'The server is too busy to help you now.'}
+            return handler(params)
+
+    def _inject_failure(self, name):
+        # Called with the lock held
+        rate = self.failure_rates.get(name)
+        if rate and self.random.random() < rate:
+            self.injected_failures[name] += 1
+            return True
+        return False
+
+    def rpc_server_info(self, params):
+        return {'info': {
+            'server_state': 'full',
+            'complete_ledgers': f"1-{self.validated_index}",
+            'network_id': self.network_id,
+            'build_version': 'fake-rippled',
+            'validated_ledger': {
+                'seq': self.validated_index,
+                'base_fee_xrp': 0.00001,
+                'reserve_base_xrp': RESERVE_BASE,
+                'reserve_inc_xrp': RESERVE_INC
+            }
+        }}
+
+    def rpc_fee(self, params):
+        return {
+            'ledger_current_index': self.current_index,
+            'current_queue_size': '0',
+            'max_queue_size': '2000',
+            'drops': {'base_fee': '10', 'median_fee': '5000', 'minimum_fee': '10', 'open_ledger_fee': '10'},
+            'levels': {'median_level': '128000', 'minimum_level': '256', 'open_ledger_level': '256', 'reference_level': '256'}
+        }
+
+    def rpc_ledger(self, params):
+        if params.get('ledger_index') == 'current':
+            return {'ledger_current_index': self.current_index, 'validated': False}
+        return {'ledger_index': self.validated_index, 'ledger_hash': object_id('ledger', self.validated_index), 'validated': True}
+
+    def rpc_ledger_current(self, params):
+        return {'ledger_current_index': self.current_index}
+
+    def rpc_ledger_closed(self, params):
+        return {'ledger_index': self.validated_index, 'ledger_hash': object_id('ledger', self.validated_index)}
+
+    def rpc_account_info(self, params):
+        account = self.account(params['account'])
+        account_data = {key: value for key, value in account.items() if key != 'tickets'}
+        account_data['Balance'] = str(account['Balance'])
+        account_data['TicketCount'] = len(account['tickets'])
+        return {'account_data': account_data, 'ledger_current_index': self.current_index, 'validated': params.get('ledger_index') == 'validated'}
+
+    def rpc_account_objects(self, params):
+        account = self.account(params['account'])
+        objects = []
+        if params.get('type') in (None, 'ticket'):
+            objects += [{'LedgerEntryType': 'Ticket', 'Account': account['Account'], 'TicketSequence': ticket_sequence} for ticket_sequence in sorted(account['tickets'])]
+        if params.get('type') in (None, 'nft_offer'):
+            objects += [dict(offer, LedgerEntryType='NFTokenOffer', index=offer_id) for offer_id, offer in self.offers.items() if offer['Owner'] == account['Account']]
+        return self._paginate('account_objects', objects, params, {'account': account['Account']})
+
+    def rpc_account_nfts(self, params):
+        owned = [
+            {'NFTokenID': token_id, 'Issuer': nft['issuer'], 'URI': nft['uri'], 'Flags': nft['flags'], 'NFTokenTaxon': nft['taxon'], 'nft_serial': int(token_id[-8:], 16)}
+            for token_id, nft in self.nfts.items() if nft['owner'] == params['account']
+        ]
+        return self._paginate('account_nfts', owned, params, {'account': params['account']})
+
+    def rpc_nft_sell_offers(self, params):
+        offers = [
+            {'nft_offer_index': offer_id, 'owner': offer['Owner'], 'destination': offer['Destination'], 'amount': offer['Amount'], 'flags': offer['Flags']}
+            for offer_id, offer in self.offers.items() if offer['NFTokenID'] == params['nft_id']
+        ]
+        if not offers:
+            return {'error': 'objectNotFound', 'error_message': 'The requested object was not found.'}
+        return {'nft_id': params['nft_id'], 'offers': offers}
+
+    def rpc_account_tx(self, params):
+        ledger_min = params.get('ledger_index_min', -1)
+        ledger_max = params.get('ledger_index_max', -1)
+        records = []
+        for tx_hash in self.account_transactions.get(params['account'], []):
+            record = self.transactions.get(tx_hash)
+            if not record or not record['validated']:
+                continue
+            if ledger_min not in (None, -1) and record['ledger_index'] < ledger_min:
+                continue
+            if ledger_max not in (None, -1) and record['ledger_index'] > ledger_max:
+                continue
+            records.append({'tx': dict(record['tx'], ledger_index=record['ledger_index']), 'meta': record['meta'], 'validated': True})
+        if not params.get('forward'):
+            records.reverse()
+        page = self._paginate('transactions', records, params, {'account': params['account']})
+        page.update({'ledger_index_min': ledger_min, 'ledger_index_max': self.validated_index})
+        return page
+
+    def rpc_tx(self, params):
+        record = self.transactions.get(params['transaction'])
+        if record is None:
+            return {'error': 'txnNotFound', 'error_message': 'Transaction not found.'}
+        result = dict(record['tx'], validated=record['validated'])
+        if record['validated']:
+            result.update({'meta': record['meta'], 'ledger_index': record['ledger_index']})
+        return result
+
+    def rpc_submit(self, params):
+        engine_result, tx_json, tx_hash = self.submit(params['tx_blob'])
+        return {
+            'engine_result': engine_result,
+            'engine_result_message': engine_result,
+            'accepted': engine_result == 'tesSUCCESS',
+            'tx_blob': params['tx_blob'],
+            'tx_json': dict(tx_json, hash=tx_hash)
+        }
+
+    @staticmethod
+    def _paginate(key, items, params, extra):
+        start = int(params.get('marker') or 0)
+        limit = int(params.get('limit') or 200)
+        page = {key: items[start:start + limit], 'validated': True, **extra}
+        if start + limit < len(items):
+            page['marker'] = str(start + limit)
+        return page
+
+
+class FakeRippledServer:
+    """
+    Serves a FakeLedger over HTTP JSON-RPC from a background thread
+    """
+
+    def __init__(self, ledger=None, host='127.0.0.1', port=0):
+        self.ledger = ledger or FakeLedger()
+        ledger = self.ledger
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                method = body.get('method')
+                params = (body.get('params') or [{}])[0]
+                result = ledger.handle(method, params)
+                result.setdefault('status', 'error' if 'error' in result else 'success')
+                payload = json.dumps({'result': result}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self.ledger.start()
+        threading.Thread(target=self.httpd.serve_forever, name="fake-rippled", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def add_fault_arguments(parser):
+    parser.add_argument('--rpc-latency', type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument('--fail', action='append', default=[], metavar='NAME=RATE',
+                        help="fail this share of a transaction type or RPC method, e.g. NFTokenMint=0.05")
+    parser.add_argument('--seed', type=int, default=None, help="seed for failure injection")
+
+
+def parse_failure_rates(values):
+    rates = {}
+    for value in values:
+        name, _, rate = value.partition('=')
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake rippled JSON-RPC server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5005)
+    parser.add_argument('--close-interval', type=float, default=1.0, help="seconds between ledger closes")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    ledger = FakeLedger(
+        close_interval=args.close_interval,
+        rpc_latency=args.rpc_latency,
+        failure_rates=parse_failure_rates(args.fail),
+        seed=args.seed
+    )
+    server = FakeRippledServer(ledger, host=args.host, port=args.port).start()
+    print(f"Fake rippled listening on {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Load test and benchmark harness for the RippleGate backend.
+
+Starts create_app() on a throwaway SQLite database behind a real HTTP
+server, points it at a fake rippled (JSON-RPC and ledger stream) with
+configurable ledger close time, request latency and failure rates, then
+drives a weighted mix of catalogue, purchase, activity, search and login
+traffic from concurrent clients. Once the purchases' mints have drained it
+reports throughput, p50/p95/p99 latency per operation, SQL queries per
+request, mint outcomes and any oversold events, and writes everything to a
+JSON file tagged with the current commit so runs can be compared.
+
+    python -m tools.loadtest --duration 30 --concurrency 16
+    python -m tools.loadtest --mix events=40,buy=20,activity=30,login=10 --fail NFTokenMint=0.05
+    python -m tools.loadtest --output after.json --compare before.json
+"""
+
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from tools.fake_rippled import FakeLedger, FakeRippledServer, add_fault_arguments, parse_failure_rates
+from tools.fake_ledger_stream import FakeLedgerStreamServer
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+DEFAULT_MIX = 'events=40,buy=15,activity=30,search=5,login=10'
+PASSWORD = 'loadtest-password'
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize(latencies):
+    return {
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+        'max_ms': round(max(latencies) * 1000, 2) if latencies else None
+    }
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        raise SystemExit(f"Unknown operations in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+class QueryCounter:
+    """
+    Counts SQL statements per request thread (and in total, mint workers included)
+    """
+
+    def __init__(self):
+        self.total = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def before_cursor_execute(self, *args, **kwargs):
+        with self._lock:
+            self.total += 1
+        if getattr(self._local, 'count', None) is not None:
+            self._local.count += 1
+
+    def start_request(self):
+        self._local.count = 0
+
+    def finish_request(self):
+        count, self._local.count = self._local.count, None
+        return count
+
+
+# Each operation takes (client, state) and returns the httpx response
+def op_events(client, state):
+    return client.get('/api/event/', params={'limit': 50})
+
+
+def op_buy(client, state):
+    user = state.rng.choice(state.users)
+    event_id = state.rng.choice(state.event_ids)
+    return client.post('/api/tickets/buy', json={'event_id': event_id}, cookies={'token': user['token']})
+
+
+def op_activity(client, state):
+    return client.get('/api/tickets/activity')
+
+
+def op_search(client, state):
+    return client.get('/api/event/search', params={'q': state.rng.choice(state.search_terms), 'limit': 20})
+
+
+def op_login(client, state):
+    user = state.rng.choice(state.users)
+    return client.post('/api/auth/login', json={'email': user['email'], 'password': PASSWORD})
+
+
+OPERATIONS = {
+    'events': op_events,
+    'buy': op_buy,
+    'activity': op_activity,
+    'search': op_search,
+    'login': op_login,
+}
+
+
+class LoadState:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.users = []
+        self.event_ids = []
+        self.search_terms = ['rock', 'jazz', 'fest', 'night', 'gala', 'summer', 'tech']
+        self.latencies = defaultdict(list)
+        self.status_codes = defaultdict(Counter)
+        self.errors = Counter()
+        self.queries = defaultdict(list)
+        self.lock = threading.Lock()
+
+
+def seed_data(app, args, state):
+    """
+    Users (with real password hashes and tokens) and events, written straight to the DB
+    """
+    import xrpl
+    from app import db
+    from app.models import User, Event
+    from app.services.auth import auth_manager
+    from app.services.passwords import password_hasher
+
+    words = 'rock jazz festival summer night gala comedy theatre opera techno indie folk'.split()
+    with app.app_context():
+        db.create_all()
+        password_hash = password_hasher.hash(PASSWORD)
+        users = [
+            User(email=f"user{index}@loadtest.local", password=password_hash,
+                 profile_picture='https://example.com/avatar.png', wallet_address=xrpl.wallet.Wallet.create().classic_address)
+            for index in range(args.users)
+        ]
+        db.session.add_all(users)
+        db.session.flush()
+
+        start = datetime(2030, 1, 1)
+        events = [
+            Event(
+                title=f"{state.rng.choice(words).title()} {state.rng.choice(words).title()} {index}",
+                location=f"Venue {index}",
+                description=' '.join(state.rng.sample(words, 5)),
+                tickets=args.seats,
+                price=state.rng.randint(1, 100),
+                image='https://example.com/event.png',
+                date=start + timedelta(days=index),
+                time=start,
+                host_id=users[index % len(users)].id
+            )
+            for index in range(args.events)
+        ]
+        db.session.add_all(events)
+        db.session.commit()
+
+        with app.test_request_context():
+            state.users = [{'email': user.email, 'token': auth_manager.issue_token(user)} for user in users]
+        state.event_ids = [event.id for event in events]
+
+
+def run_client(base_url, state, operations, weights, deadline, remaining):
+    import httpx
+
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        while time.monotonic() < deadline:
+            if remaining is not None:
+                with state.lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+            with state.lock:
+                name = state.rng.choices(operations, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = OPERATIONS[name](client, state)
+                elapsed = time.perf_counter() - started
+                query_count = response.headers.get('X-Loadtest-Queries')
+                with state.lock:
+                    state.latencies[name].append(elapsed)
+                    state.status_codes[name][response.status_code] += 1
+                    if query_count is not None:
+                        state.queries[name].append(int(query_count))
+            except Exception as e:
+                with state.lock:
+                    state.errors[f"{name}: {type(e).__name__}"] += 1
+
+
+def drain_mints(app, timeout):
+    """
+    Wait for purchases to leave 'pending'; returns the final ticket status counts
+    """
+    from app import db
+    from app.models import Ticket
+    from sqlalchemy import func
+
+    deadline = time.monotonic() + timeout
+    while True:
+        with app.app_context():
+            counts = dict(db.session.query(Ticket.status, func.count(Ticket.id)).group_by(Ticket.status).all())
+        if not counts.get('pending') or time.monotonic() >= deadline:
+            return counts
+        time.sleep(0.5)
+
+
+def check_inventory(app, seats):
+    """
+    Events that sold (or hold) more seats than they had, and aggregate drift
+    """
+    from app import db
+    from app.models import Event, Ticket
+    from app.services import stats
+    from sqlalchemy import func
+
+    with app.app_context():
+        taken = dict(db.session.query(Ticket.event_id, func.count(Ticket.id)).filter(
+            Ticket.status.in_(['pending', 'confirmed'])
+        ).group_by(Ticket.event_id).all())
+        oversold = []
+        for event in Event.query.all():
+            if event.tickets < 0 or taken.get(event.id, 0) > seats or taken.get(event.id, 0) + event.tickets > seats:
+                oversold.append({'event_id': event.id, 'remaining': event.tickets, 'taken': taken.get(event.id, 0)})
+        return oversold, len(stats.rebuild(check_only=True))
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    print(f"\nCompared with {baseline_path} ({baseline['meta'].get('commit')}):")
+    print(f"  throughput {baseline['throughput_rps']} -> {current['throughput_rps']} req/s")
+    for name, result in current['operations'].items():
+        before = baseline['operations'].get(name)
+        if before and before['p95_ms'] is not None and result['p95_ms'] is not None:
+            print(f"  {name:<9} p95 {before['p95_ms']} -> {result['p95_ms']} ms, "
+                  f"queries/request {before['queries_per_request']} -> {result['queries_per_request']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the backend against a fake XRPL node")
+    parser.add_argument('--duration', type=float, default=30, help="seconds of load (unless --requests is reached first)")
+    parser.add_argument('--requests', type=int, default=None, help="stop after this many requests")
+    parser.add_argument('--concurrency', type=int, default=16, help="concurrent clients")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"operation weights (default {DEFAULT_MIX})")
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--events', type=int, default=20)
+    parser.add_argument('--seats', type=int, default=25, help="tickets per event; purchases beyond this must be refused")
+    parser.add_argument('--close-interval', type=float, default=1.0, help="fake ledger close time in seconds")
+    parser.add_argument('--drain-timeout', type=float, default=60, help="seconds to wait for queued mints after the load")
+    parser.add_argument('--bcrypt-rounds', type=int, default=None, help="override BCRYPT_LOG_ROUNDS for the run")
+    parser.add_argument('--output', default=None, help="results file (default loadtest-<commit>-<time>.json)")
+    parser.add_argument('--compare', default=None, help="earlier results file to compare against")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    operations = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in operations]
+
+    ledger = FakeLedger(
+        close_interval=args.close_interval,
+        rpc_latency=args.rpc_latency,
+        failure_rates=parse_failure_rates(args.fail),
+        seed=args.seed
+    )
+    rpc = FakeRippledServer(ledger).start()
+    stream = FakeLedgerStreamServer(ledger).start()
+
+    # Configuration is read at import time, so set it before importing the app
+    workdir = tempfile.mkdtemp(prefix='ripplegate-loadtest-')
+    os.environ.update({
+        'DATABASE_URL': 'sqlite:///' + os.path.join(workdir, 'loadtest.db'),
+        'XRPL_RPC_URLS': rpc.url,
+        'XRPL_WS_URLS': stream.url,
+        'JWT_SECRET': os.getenv('JWT_SECRET', 'loadtest-secret'),
+    })
+    if args.bcrypt_rounds:
+        os.environ['BCRYPT_LOG_ROUNDS'] = str(args.bcrypt_rounds)
+
+    from app import create_app, db
+    from sqlalchemy import event as sqlalchemy_event
+    from werkzeug.serving import make_server
+
+    app = create_app()
+    state = LoadState(args.seed)
+    seed_data(app, args, state)
+
+    counter = QueryCounter()
+    with app.app_context():
+        sqlalchemy_event.listen(db.engine, 'before_cursor_execute', counter.before_cursor_execute)
+
+    @app.before_request
+    def count_queries():
+        counter.start_request()
+
+    @app.after_request
+    def report_queries(response):
+        response.headers['X-Loadtest-Queries'] = str(counter.finish_request() or 0)
+        return response
+
+    # One log line per request would swamp the report
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="loadtest-http", daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    print(f"Serving on {base_url}, fake rippled on {rpc.url}; {args.concurrency} clients for up to {args.duration}s")
+
+    queries_before = counter.total
+    remaining = [args.requests] if args.requests else None
+    started = time.monotonic()
+    clients = [
+        threading.Thread(target=run_client, args=(base_url, state, operations, weights, started + args.duration, remaining))
+        for _ in range(args.concurrency)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.monotonic() - started
+    load_queries = counter.total - queries_before
+
+    print("Load finished, waiting for queued mints...")
+    ticket_statuses = drain_mints(app, args.drain_timeout)
+    oversold, stats_mismatches = check_inventory(app, args.seats)
+    server.shutdown()
+
+    total_requests = sum(len(latencies) for latencies in state.latencies.values())
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'args': vars(args),
+            'python': sys.version.split()[0]
+        },
+        'duration_s': round(elapsed, 2),
+        'requests': total_requests,
+        'throughput_rps': round(total_requests / elapsed, 2) if elapsed else None,
+        'operations': {
+            name: {
+                'count': len(state.latencies[name]),
+                'status_codes': {str(code): count for code, count in sorted(state.status_codes[name].items())},
+                'queries_per_request': round(sum(state.queries[name]) / len(state.queries[name]), 2) if state.queries[name] else None,
+                **summarize(state.latencies[name])
+            }
+            for name in operations
+        },
+        'client_errors': dict(state.errors),
+        'db_queries': {'during_load': load_queries, 'total': counter.total},
+        'tickets': ticket_statuses,
+        'oversold_events': oversold,
+        'stats_mismatches': stats_mismatches,
+        'xrpl': {
+            'requests': dict(ledger.request_counts),
+            'injected_failures': dict(ledger.injected_failures),
+            'ledgers_closed': ledger.validated_index - 1000
+        }
+    }
+
+    output = args.output or f"loadtest-{results['meta']['commit'] or 'local'}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, 'w') as output_file:
+        json.dump(results, output_file, indent=2)
+
+    print(f"\n{total_requests} requests in {elapsed:.1f}s ({results['throughput_rps']} req/s)")
+    for name, result in results['operations'].items():
+        print(f"  {name:<9} n={result['count']:<6} p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+              f"p99={result['p99_ms']}ms queries/request={result['queries_per_request']} codes={result['status_codes']}")
+    print(f"Tickets: {ticket_statuses}; oversold events: {len(oversold)}; aggregate rows out of date: {stats_mismatches}")
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+    stream.stop()
+    rpc.stop()
+    return 1 if oversold else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
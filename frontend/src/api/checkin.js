@@ -0,0 +1,44 @@
+import axios from "axios";
+
+const API_URL = import.meta.env.VITE_API_URL
+  ? `${import.meta.env.VITE_API_URL.replace("/auth", "")}/checkin/`
+  : "https://ripplegate.onrender.com/api/checkin/";
+
+// Signed QR payload the ticket holder shows at the door
+export const getTicketCredential = async (ticketId) => {
+  try {
+    const response = await axios.get(`${API_URL}tickets/${ticketId}/credential`, {
+      withCredentials: true,
+    });
+    return response.data;
+  } catch (error) {
+    throw error.response?.data || error.message;
+  }
+};
+
+// Event manifest for offline scanning; pass the last cursor to get only new check-ins
+export const getCheckInManifest = async (eventId, since) => {
+  try {
+    const response = await axios.get(`${API_URL}events/${eventId}/manifest`, {
+      params: since === undefined ? {} : { since },
+      withCredentials: true,
+    });
+    return response.data;
+  } catch (error) {
+    throw error.response?.data || error.message;
+  }
+};
+
+// Upload scans a door verified offline
+export const syncCheckIns = async (eventId, scannerId, scans, since) => {
+  try {
+    const response = await axios.post(
+      `${API_URL}events/${eventId}/sync`,
+      { scanner_id: scannerId, scans, since },
+      { withCredentials: true }
+    );
+    return response.data;
+  } catch (error) {
+    throw error.response?.data || error.message;
+  }
+};
@@ -1,19 +1,48 @@
 import axios from "axios";
+import { fetchPage } from "../helper";
 
 const API_URL = import.meta.env.VITE_API_URL
   ? `${import.meta.env.VITE_API_URL.replace("/auth", "")}/event/`
   : "https://ripplegate.onrender.com/api/event/";
 
-// Get all events
-export const getEvents = async () => {
+// Get one page of events: { items, nextCursor }. Pass nextCursor for the next page.
+export const getEvents = async (cursor = null) => {
   try {
-    const response = await axios.get(API_URL, { withCredentials: true });
+    return await fetchPage(
+      (params) => axios.get(API_URL, { params, withCredentials: true }),
+      cursor
+    );
+  } catch (error) {
+    throw error.response?.data || error.message;
+  }
+};
+
+// Get a single event by id
+export const getEvent = async (eventId) => {
+  try {
+    const response = await axios.get(`${API_URL}${eventId}`, {
+      withCredentials: true,
+    });
     return response.data;
   } catch (error) {
     throw error.response?.data || error.message;
   }
 };
 
+// Search events by title, description and location (best match first).
+// filters may hold date_from, date_to, min_price, max_price, limit and offset.
+export const searchEvents = async (query, filters = {}) => {
+  try {
+    const response = await axios.get(`${API_URL}search`, {
+      params: { q: query, ...filters },
+      withCredentials: true,
+    });
+    return response.data.results;
+  } catch (error) {
+    throw error.response?.data || error.message;
+  }
+};
+
 // Create a new event
 export const createEvent = async (eventData) => {
   try {
@@ -1,35 +1,99 @@
 import axios from "axios";
+import { fetchPage } from "../helper";
 
 const API_URL = import.meta.env.VITE_API_URL
   ? `${import.meta.env.VITE_API_URL.replace("/auth", "")}/tickets/`
   : "https://ripplegate.onrender.com/api/tickets/";
 
+// POST a purchase, retrying requests that got no response. Every attempt
+// sends the same Idempotency-Key, so a retry never buys a second ticket.
+const postPurchase = async (url, body, idempotencyKey, attempts = 3) => {
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await axios.post(url, body, {
+        withCredentials: true,
+        headers: {
+          "Content-Type": "application/json",
+          "Idempotency-Key": idempotencyKey,
+        },
+      });
+    } catch (error) {
+      if (error.response || attempt >= attempts) throw error;
+      await new Promise((resolve) => setTimeout(resolve, 500 * attempt));
+    }
+  }
+};
+
 // Buy a ticket
-export const buyTicket = async (eventId, userId) => {
+export const buyTicket = async (eventId, userId, idempotencyKey = crypto.randomUUID()) => {
   try {
-    const response = await axios.post(
+    const response = await postPurchase(
       `${API_URL}buy`,
       {
         event_id: eventId,
         user_id: userId,
       },
-      {
-        withCredentials: true,
-        headers: {
-          "Content-Type": "application/json",
-        },
+      idempotencyKey
+    );
+
+    // Minting runs in the background; wait for the ticket to leave "pending"
+    let { ticket } = response.data;
+    while (ticket.status === "pending") {
+      const status = await getTicketStatus(ticket.id, 25);
+      ticket = status.ticket;
+      if (status.status === "failed") {
+        throw { error: status.error || "Failed to mint NFT ticket" };
       }
+    }
+    return { ...response.data, ticket };
+  } catch (error) {
+    if (error.error) throw error;
+    throw error.response?.data || error.message;
+  }
+};
+
+// Buy several tickets for one event in a single order. Each ticket is
+// minted on its own, so some may fail while the rest are confirmed.
+export const buyTickets = async (eventId, quantity, idempotencyKey = crypto.randomUUID()) => {
+  try {
+    const response = await postPurchase(
+      `${API_URL}buy/bulk`,
+      {
+        event_id: eventId,
+        quantity,
+      },
+      idempotencyKey
     );
+
+    const ids = response.data.tickets.map((ticket) => ticket.id);
+    let status = await getTicketsStatus(ids, 25);
+    while (status.summary.pending > 0) {
+      status = await getTicketsStatus(ids, 25);
+    }
+    return { ...response.data, ...status };
+  } catch (error) {
+    throw error.response?.data || error.message;
+  }
+};
+
+// Get (or long-poll for) the mint status of several tickets
+export const getTicketsStatus = async (ticketIds, wait = 0) => {
+  try {
+    const response = await axios.get(`${API_URL}status`, {
+      params: { ids: ticketIds.join(","), wait },
+      withCredentials: true,
+    });
     return response.data;
   } catch (error) {
     throw error.response?.data || error.message;
   }
 };
 
-// Get user tickets
-export const getUserTickets = async (userId) => {
+// Get (or long-poll for) the mint status of a ticket
+export const getTicketStatus = async (ticketId, wait = 0) => {
   try {
-    const response = await axios.get(`${API_URL}user/${userId}`, {
+    const response = await axios.get(`${API_URL}${ticketId}/status`, {
+      params: { wait },
       withCredentials: true,
     });
     return response.data;
@@ -38,6 +102,49 @@ export const getUserTickets = async (userId) => {
   }
 };
 
+// Get one page of a user's tickets, newest first: { items, nextCursor }.
+// Pass nextCursor for the next page; limit is capped at 200 by the API.
+export const getUserTickets = async (userId, cursor = null, limit = 50) => {
+  try {
+    return await fetchPage(
+      (params) =>
+        axios.get(`${API_URL}user/${userId}`, { params, withCredentials: true }),
+      cursor,
+      { limit }
+    );
+  } catch (error) {
+    throw error.response?.data || error.message;
+  }
+};
+
+// Ticket totals for a user (pending, confirmed, failed, total_spent), however many they own
+export const getUserTicketStats = async (userId) => {
+  try {
+    const response = await axios.get(`${API_URL}user/${userId}/stats`, {
+      withCredentials: true,
+    });
+    return response.data;
+  } catch (error) {
+    throw error.response?.data || error.message;
+  }
+};
+
+// Subscribe to the live activity feed (Server-Sent Events). onSnapshot gets
+// the full list on connect, onActivity each new or updated entry.
+// Returns a function that closes the stream.
+export const subscribeToActivity = (onSnapshot, onActivity) => {
+  const source = new EventSource(`${API_URL}activity/stream`, {
+    withCredentials: true,
+  });
+  source.addEventListener("snapshot", (event) =>
+    onSnapshot(JSON.parse(event.data))
+  );
+  source.addEventListener("activity", (event) =>
+    onActivity(JSON.parse(event.data))
+  );
+  return () => source.close();
+};
+
 // Get recent ticket activity
 export const getRecentActivity = async () => {
   try {
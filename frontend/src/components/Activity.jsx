@@ -6,7 +6,7 @@ import {
   FaClock,
   FaUser,
 } from "react-icons/fa";
-import { getRecentActivity } from "../api/tickets";
+import { getRecentActivity, subscribeToActivity } from "../api/tickets";
 import { toast } from "react-toastify";
 import { getStatusColor, formatRelativeTime } from "../helper";
 
@@ -17,6 +17,18 @@ export default function Activity() {
 
   useEffect(() => {
     fetchActivity();
+
+    // Live updates: new purchases go on top, status changes replace their entry
+    return subscribeToActivity(setActivities, (entry) =>
+      setActivities((current) => {
+        if (current.some((activity) => activity.id === entry.id)) {
+          return current.map((activity) =>
+            activity.id === entry.id ? entry : activity
+          );
+        }
+        return [entry, ...current].slice(0, 20);
+      })
+    );
   }, []);
 
   const fetchActivity = async () => {
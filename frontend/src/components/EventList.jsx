@@ -1,18 +1,23 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { getEvents } from "../api/events";
+import { handleScrollEnd } from "../helper";
 import Event from "./Event";
 
 export default function EventList() {
   const [events, setEvents] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
+  const loadingMoreRef = useRef(false);
 
   useEffect(() => {
     const fetchEvents = async () => {
       try {
         setLoading(true);
-        const eventsData = await getEvents();
-        setEvents(eventsData);
+        const page = await getEvents();
+        setEvents(page.items);
+        setNextCursor(page.nextCursor);
         setError(null);
       } catch (err) {
         setError("Failed to load events");
@@ -25,6 +30,23 @@ export default function EventList() {
     fetchEvents();
   }, []);
 
+  // Next page on scroll or "Load more"; the ref keeps scroll events from firing it twice
+  const loadMore = async () => {
+    if (!nextCursor || loadingMoreRef.current) return;
+    loadingMoreRef.current = true;
+    setLoadingMore(true);
+    try {
+      const page = await getEvents(nextCursor);
+      setEvents((current) => [...current, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error(err);
+    } finally {
+      loadingMoreRef.current = false;
+      setLoadingMore(false);
+    }
+  };
+
   return (
     <div className="h-full flex flex-col">
       {loading ? (
@@ -45,12 +67,22 @@ export default function EventList() {
         <div
           className="overflow-y-auto pr-2 custom-scrollbar flex-grow"
           style={{ maxHeight: "500px" }}
+          onScroll={handleScrollEnd(loadMore)}
         >
           <div className="grid grid-cols-1 gap-4">
             {events.map((event) => (
               <Event key={event.id} event={event} />
             ))}
           </div>
+          {nextCursor && (
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="w-full mt-4 py-2 rounded-xl bg-black/20 text-gray-300 border border-purple-500/30 hover:border-cyan-400/50 transition-all disabled:opacity-50"
+            >
+              {loadingMore ? "Loading..." : "Load more events"}
+            </button>
+          )}
         </div>
       )}
     </div>
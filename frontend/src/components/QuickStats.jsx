@@ -6,7 +6,7 @@ import {
   FaCalendarCheck,
 } from "react-icons/fa";
 import { fetchCurrentUser } from "../api/auth";
-import { getUserTickets } from "../api/tickets";
+import { getUserTickets, getUserTicketStats } from "../api/tickets";
 
 export default function QuickStats() {
   const [user, setUser] = useState(null);
@@ -30,26 +30,23 @@ export default function QuickStats() {
       setUser(userData);
 
       if (userData?.user_id) {
-        const userTickets = await getUserTickets(userData.user_id);
-
-        // Calculate stats
-        const totalSpent = userTickets.reduce(
-          (sum, ticket) => sum + Number.parseFloat(ticket.price),
-          0
-        );
-        const confirmedTickets = userTickets.filter(
-          (t) => t.status === "confirmed"
-        ).length;
-        const upcomingEvents = userTickets.filter((t) => {
+        // Totals from the stats endpoint; upcoming events from the newest
+        // page of tickets, where tickets for future events are
+        const [totals, recent] = await Promise.all([
+          getUserTicketStats(userData.user_id),
+          getUserTickets(userData.user_id, null, 200),
+        ]);
+        const upcomingEvents = recent.items.filter((t) => {
           if (!t.event?.date) return false;
           const eventDate = new Date(t.event.date);
           return eventDate > new Date();
         }).length;
 
         setStats({
-          totalTickets: userTickets.length,
-          totalSpent: totalSpent,
-          confirmedTickets: confirmedTickets,
+          totalTickets:
+            totals.tickets_pending + totals.tickets_confirmed + totals.tickets_failed,
+          totalSpent: totals.total_spent,
+          confirmedTickets: totals.tickets_confirmed,
           upcomingEvents: upcomingEvents,
         });
       }
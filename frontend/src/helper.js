@@ -103,3 +103,21 @@ export const convertXRPToFiat = (xrpAmount, exchangeRate) => {
 
   return parseFloat(xrpAmount) * exchangeRate;
 };
+
+// Fetch one page of a list endpoint. Pass the returned nextCursor back to
+// load the following page; it is null on the last one.
+export const fetchPage = async (request, cursor = null, params = {}) => {
+  const response = await request(cursor ? { ...params, cursor } : params);
+  return {
+    items: response.data,
+    nextCursor: response.headers["x-next-cursor"] || null,
+  };
+};
+
+// Call onEnd when a scrollable element is scrolled to within threshold px of its bottom
+export const handleScrollEnd = (onEnd, threshold = 200) => (event) => {
+  const { scrollTop, scrollHeight, clientHeight } = event.currentTarget;
+  if (scrollHeight - scrollTop - clientHeight < threshold) {
+    onEnd();
+  }
+};
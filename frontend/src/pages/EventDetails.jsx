@@ -13,7 +13,7 @@ import {
   FaUserTie,
 } from "react-icons/fa";
 import Navbar from "../components/Navbar";
-import { getEvents } from "../api/events";
+import { getEvent } from "../api/events";
 import { buyTicket } from "../api/tickets";
 import { toast } from "react-toastify";
 import { fetchCurrentUser } from "../api/auth";
@@ -40,15 +40,12 @@ function EventDetails() {
     try {
       setLoading(true);
       setError(null);
-      const events = await getEvents();
-      const selectedEvent = events.find((e) => e.id === parseInt(id));
-
-      if (selectedEvent) {
-        setEvent(selectedEvent);
-      } else {
+      setEvent(await getEvent(parseInt(id)));
+    } catch (err) {
+      if (err?.message === "Event not found") {
         setError("Event not found");
+        return;
       }
-    } catch (err) {
       setError("Failed to load event details");
       toast.error("Failed to load event details");
     } finally {
@@ -8,12 +8,15 @@ import {
 import { useNavigate } from "react-router-dom";
 import Navbar from "../components/Navbar";
 import TicketDisplay from "../components/TicketDisplay";
-import { getUserTickets } from "../api/tickets";
+import { getUserTickets, getUserTicketStats } from "../api/tickets";
 import { fetchCurrentUser } from "../api/auth";
 import { toast } from "react-toastify";
 
 export default function MyTickets() {
   const [tickets, setTickets] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [summary, setSummary] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [user, setUser] = useState(null);
@@ -60,8 +63,14 @@ export default function MyTickets() {
     try {
       setLoading(true);
       setError(null);
-      const userTickets = await getUserTickets(user.user_id);
-      setTickets(userTickets);
+      // First page only; totals come from the stats endpoint, not the loaded tickets
+      const [page, stats] = await Promise.all([
+        getUserTickets(user.user_id),
+        getUserTicketStats(user.user_id),
+      ]);
+      setTickets(page.items);
+      setNextCursor(page.nextCursor);
+      setSummary(stats);
     } catch (err) {
       setError(err.error || "Failed to fetch tickets");
       toast.error("Failed to load tickets");
@@ -70,6 +79,20 @@ export default function MyTickets() {
     }
   };
 
+  const loadMoreTickets = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await getUserTickets(user.user_id, nextCursor);
+      setTickets((current) => [...current, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      toast.error("Failed to load more tickets");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleRefresh = () => {
     if (user && user.user_id) {
       fetchUserTickets();
@@ -216,6 +239,19 @@ export default function MyTickets() {
               ))}
             </div>
 
+            {nextCursor && (
+              <div className="flex justify-center mt-6">
+                <button
+                  onClick={loadMoreTickets}
+                  disabled={loadingMore}
+                  className="flex items-center cursor-pointer gap-2 px-4 py-2 rounded-xl bg-black/20 text-gray-300 border border-purple-500/30 hover:border-cyan-400/50 transition-all disabled:opacity-50"
+                >
+                  {loadingMore && <FaSpinner className="animate-spin" />}
+                  <span>{loadingMore ? "Loading..." : "Load more tickets"}</span>
+                </button>
+              </div>
+            )}
+
             {/* Stats */}
             <div className="mt-8 bg-black/20 backdrop-blur-sm rounded-xl p-6 border border-purple-500/20">
               <h3 className="text-lg font-medium text-white mb-4">
@@ -224,24 +260,31 @@ export default function MyTickets() {
               <div className="grid grid-cols-1 sm:grid-cols-3 gap-4">
                 <div className="text-center">
                   <div className="text-2xl font-bold text-cyan-400">
-                    {tickets.length}
+                    {summary
+                      ? summary.tickets_pending +
+                        summary.tickets_confirmed +
+                        summary.tickets_failed
+                      : tickets.length}
                   </div>
                   <div className="text-sm text-gray-400">Total Tickets</div>
                 </div>
                 <div className="text-center">
                   <div className="text-2xl font-bold text-green-400">
-                    {tickets.filter((t) => t.status === "confirmed").length}
+                    {summary
+                      ? summary.tickets_confirmed
+                      : tickets.filter((t) => t.status === "confirmed").length}
                   </div>
                   <div className="text-sm text-gray-400">Confirmed</div>
                 </div>
                 <div className="text-center">
                   <div className="text-2xl font-bold text-purple-400">
-                    {tickets
-                      .reduce(
-                        (sum, ticket) => sum + parseFloat(ticket.price),
-                        0
-                      )
-                      .toFixed(2)}
+                    {(summary
+                      ? summary.total_spent
+                      : tickets.reduce(
+                          (sum, ticket) => sum + parseFloat(ticket.price),
+                          0
+                        )
+                    ).toFixed(2)}
                   </div>
                   <div className="text-sm text-gray-400">Total Spent (XRP)</div>
                 </div>